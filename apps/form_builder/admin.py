@@ -1,14 +1,15 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import DynamicForm, Page, QuestionType, Question, FormVersion, FormSubmission, QuestionGroup, QuestionGroupTemplate
+from .models import DynamicForm, Page, QuestionType, Question, FormVersion, FormSubmission, QuestionGroup, QuestionGroupTemplate, PublishError
 
 
 class FormVersionInline(admin.TabularInline):
     model = FormVersion
     extra = 0
     fields = ['version_number', 'is_published', 'notes', 'created_by', 'created_datetime']
-    readonly_fields = ['version_number', 'created_datetime']
+    # Versions are published with the FormVersion admin action, which checks them first
+    readonly_fields = ['version_number', 'is_published', 'created_datetime']
     ordering = ['-version_number']
     can_delete = False
 
@@ -157,13 +158,35 @@ class FormVersionAdmin(admin.ModelAdmin):
     list_display = ['form_name', 'version_number', 'is_published', 'created_by', 'created_datetime', 'view_data']
     list_filter = ['is_published', 'created_datetime', 'form']
     search_fields = ['form__name', 'notes', 'created_by']
-    readonly_fields = ['id', 'version_number', 'created_datetime', 'serialized_form_data_display']
+    readonly_fields = ['id', 'version_number', 'is_published', 'published_datetime', 'created_datetime', 'serialized_form_data_display']
+    actions = ['publish_versions']
     
     def form_name(self, obj):
         return obj.form.name
     form_name.short_description = 'Form'
     form_name.admin_order_field = 'form__name'
     
+    def publish_versions(self, request, queryset):
+        published = 0
+        for version in queryset.filter(is_published=False).select_related('form'):
+            try:
+                version.publish()
+            except PublishError as e:
+                reasons = '; '.join(
+                    ' -> '.join(error.get('questions', [])) or error.get('type', '') for error in e.errors
+                )
+                self.message_user(
+                    request,
+                    f"{version.form.name} v{version.version_number} was not published: {e}"
+                    + (f" ({reasons})" if reasons else ''),
+                    messages.ERROR
+                )
+            else:
+                published += 1
+        if published:
+            self.message_user(request, f"Published {published} version(s).", messages.SUCCESS)
+    publish_versions.short_description = 'Publish selected versions'
+    
     def view_data(self, obj):
         return format_html(
             '<a href="#" onclick="toggleFormData(\'form-data-{}\'); return false;">View Structure</a>'
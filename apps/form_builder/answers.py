@@ -0,0 +1,178 @@
+"""
+Incremental updates of ``FormSubmission.answers``.
+
+Autosave only needs to send what changed, either as an RFC 7396 JSON merge
+patch (``null`` removes a key, objects merge recursively) or as a list of
+per-slug operations::
+
+    [{"op": "set", "slug": "email", "value": "a@example.com"},
+     {"op": "unset", "slug": "phone"}]
+
+Unlike a merge patch, ``set`` can store an explicit ``null``.
+
+Patches are applied atomically in the database and bump the submission's
+``revision``. On PostgreSQL a single ``UPDATE`` rewrites the column with
+``||``, ``-`` and ``jsonb_set``, so no answers are read back into Python;
+elsewhere the answers are merged in Python and written with a conditional
+``UPDATE ... WHERE revision = n``, retried if another write got in first.
+Either way concurrent patches touching different slugs never overwrite
+each other, and no row lock is held.
+
+Passing ``expected_revision`` makes the patch conditional on the client's
+copy being current; otherwise ``RevisionConflict`` is raised.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F, JSONField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .models import FormSubmission
+
+
+OPERATIONS = ('set', 'unset')
+
+# Conditional writes retried before giving up on a busy submission
+MAX_ATTEMPTS = 5
+
+
+class AnswerPatchError(ValueError):
+    """Raised when a merge patch or operation list is malformed."""
+
+
+class RevisionConflict(Exception):
+    """Raised when a submission is no longer at the revision a write expected."""
+
+
+def merge_patch(target, patch):
+    """Return ``target`` with the RFC 7396 merge ``patch`` applied; inputs are not modified."""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def split_merge_patch(patch):
+    """
+    Split an object merge patch into ``(sets, removes, nested)``.
+
+    ``sets`` replace keys outright, ``removes`` are the keys to delete and
+    ``nested`` maps keys to the sub-patches merged into their current value.
+    """
+    if not isinstance(patch, dict):
+        raise AnswerPatchError('Merge patch must be a JSON object')
+    sets, removes, nested = {}, [], {}
+    for key, value in patch.items():
+        if value is None:
+            removes.append(key)
+        elif isinstance(value, dict):
+            nested[key] = value
+        else:
+            sets[key] = value
+    return sets, removes, nested
+
+
+def parse_operations(operations):
+    """Validate a set/unset operation list and return ``(sets, removes)``; later operations win."""
+    if not isinstance(operations, list):
+        raise AnswerPatchError('Operations must be a list of {"op", "slug"} objects')
+
+    sets, removes = {}, {}
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise AnswerPatchError(f'Operation {index} must be an object')
+        op = operation.get('op')
+        slug = operation.get('slug')
+        if op not in OPERATIONS:
+            raise AnswerPatchError(f'Operation {index} has unknown op "{op}", expected one of {", ".join(OPERATIONS)}')
+        if not isinstance(slug, str) or not slug:
+            raise AnswerPatchError(f'Operation {index} needs a slug')
+        if op == 'set':
+            if 'value' not in operation:
+                raise AnswerPatchError(f'Operation {index} needs a value')
+            removes.pop(slug, None)
+            sets[slug] = operation['value']
+        else:
+            sets.pop(slug, None)
+            removes[slug] = True
+    return sets, list(removes)
+
+
+def patched_answers(answers, sets, removes, nested=None):
+    """Return a copy of ``answers`` with a split patch applied."""
+    answers = dict(answers) if isinstance(answers, dict) else {}
+    answers.update(sets)
+    for key in removes:
+        answers.pop(key, None)
+    for key, sub_patch in (nested or {}).items():
+        answers[key] = merge_patch(answers.get(key), sub_patch)
+    return answers
+
+
+def apply_answer_patch(submission_id, sets, removes, nested=None, expected_revision=None):
+    """
+    Apply a split patch (see ``split_merge_patch``) to a submission's answers.
+
+    Returns ``(modified_datetime, revision)`` after the write, or None if the
+    submission does not exist.
+    """
+    nested = nested or {}
+    if connection.vendor == 'postgresql':
+        return _apply_in_database(submission_id, sets, removes, nested, expected_revision)
+
+    for _ in range(MAX_ATTEMPTS):
+        submission = FormSubmission.objects.only('answers', 'revision').filter(pk=submission_id).first()
+        if submission is None:
+            return None
+        if expected_revision is not None and submission.revision != expected_revision:
+            raise RevisionConflict
+        submission.answers = patched_answers(submission.answers, sets, removes, nested)
+        if submission.save_if_unchanged(['answers']):
+            return submission.modified_datetime, submission.revision
+    raise RevisionConflict
+
+
+def _apply_in_database(submission_id, sets, removes, nested, expected_revision):
+    sql, params = _merge_sql(connection.ops.quote_name('answers'), [], sets, removes, nested)
+    submissions = FormSubmission.objects.filter(pk=submission_id)
+    now = timezone.now()
+    with transaction.atomic():
+        matched = submissions
+        if expected_revision is not None:
+            matched = matched.filter(revision=expected_revision)
+        updated = matched.update(
+            answers=RawSQL(sql, params, output_field=JSONField()),
+            revision=F('revision') + 1,
+            modified_datetime=now
+        )
+        if updated:
+            # The UPDATE keeps the row locked until commit, so this is our revision
+            return now, submissions.values_list('revision', flat=True).get()
+    if expected_revision is not None and submissions.exists():
+        raise RevisionConflict
+    return None
+
+
+def _merge_sql(expr, expr_params, sets, removes, nested):
+    """Build a jsonb expression merging into ``expr``; returns ``(sql, params)``."""
+    # Merging into a missing or non-object value starts from an empty object
+    sql = f"CASE WHEN jsonb_typeof({expr}) = 'object' THEN {expr} ELSE '{{}}'::jsonb END"
+    params = [*expr_params, *expr_params]
+    if sets:
+        sql = f'({sql}) || %s::jsonb'
+        params.append(json.dumps(sets, cls=DjangoJSONEncoder))
+    if removes:
+        sql = f'({sql}) - %s::text[]'
+        params.append(list(removes))
+    for key, sub_patch in nested.items():
+        child_sql, child_params = _merge_sql(f'({expr} -> %s::text)', [*expr_params, key], *split_merge_patch(sub_patch))
+        sql = f'jsonb_set({sql}, ARRAY[%s]::text[], {child_sql}, true)'
+        params += [key, *child_params]
+    return sql, params
@@ -0,0 +1,115 @@
+"""
+Dependency graph of a form version's conditional logic.
+
+Question ``conditional_logic`` rules and ``disabled_condition``, and page
+``conditional_logic``, ``disabled_condition`` and ``tag_display_condition``,
+read other answers by slug. The graph records, for every answer slug, the
+questions and pages whose state depends on it, plus a topological order of
+the answer slugs (dependencies first), so renderers can re-evaluate only the
+transitive dependents of a changed answer in a single ordered pass. The
+server's ``LogicPlan`` indexes its compiled rules by the stored graph.
+
+Questions whose conditions depend on each other, directly or through other
+questions, form a cycle; such versions cannot be published. The graph is
+stored on ``FormVersion.dependency_graph`` whenever the version's
+``serialized_form_data`` is saved::
+
+    {
+        "dependents": {"employed": ["employer"]},
+        "page_dependents": {"employed": ["income"]},
+        "order": ["employed", "employer", ...],
+        "cycles": [["a", "b"]]
+    }
+"""
+from .tree import iter_questions
+
+
+def condition_slugs(item):
+    """Answer slugs read by an item's conditions, in first-use order."""
+    slugs = []
+    for rule in (item.get('conditional_logic') or {}).get('rules') or []:
+        for condition in rule.get('conditions') or []:
+            slugs.append(condition.get('question_slug'))
+    for field in ('disabled_condition', 'tag_display_condition'):
+        condition = item.get(field)
+        if condition:
+            slugs.append(condition.get('field'))
+    return [slug for slug in dict.fromkeys(slugs) if isinstance(slug, str) and slug]
+
+
+def strongly_connected_components(nodes, edges):
+    """
+    Tarjan's algorithm, iterative so long dependency chains cannot hit the
+    recursion limit. Components come out dependents first.
+    """
+    index, low = {}, {}
+    stack, on_stack = [], set()
+    components = []
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(edges.get(root, ())))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(edges.get(child, ()))))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+def build_dependency_graph(serialized_form_data):
+    """Build the dependency graph stored on a form version."""
+    dependents, page_dependents = {}, {}
+    slugs = []
+    for question in iter_questions(serialized_form_data):
+        slugs.append(question['slug'])
+        for slug in condition_slugs(question):
+            dependents.setdefault(slug, []).append(question['slug'])
+    for page in serialized_form_data.get('pages', []):
+        for slug in condition_slugs(page):
+            page_dependents.setdefault(slug, []).append(page.get('slug'))
+
+    # Slugs that are only referenced (e.g. address ``<slug>__<field>`` keys) are nodes too
+    nodes = list(dict.fromkeys(slugs + list(dependents)))
+    position = {slug: i for i, slug in enumerate(nodes)}
+    # Walked backwards, so unrelated slugs keep display order once reversed
+    components = strongly_connected_components(
+        nodes[::-1], {slug: targets[::-1] for slug, targets in dependents.items()}
+    )
+
+    order, cycles = [], []
+    for component in reversed(components):
+        component.sort(key=position.__getitem__)
+        order.extend(component)
+        if len(component) > 1 or component[0] in dependents.get(component[0], ()):
+            cycles.append(component)
+    return {
+        'dependents': dependents,
+        'page_dependents': page_dependents,
+        'order': order,
+        'cycles': cycles,
+    }
+
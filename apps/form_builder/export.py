@@ -0,0 +1,121 @@
+"""
+Streaming export of form submissions.
+
+Submissions of one form version are read with ``iterator(chunk_size=...)``
+(a server-side cursor on PostgreSQL) and written out row by row, so memory
+stays flat no matter how many submissions are exported. Answer columns come
+from the version's ``serialized_form_data``: every question slug, grouped
+questions included, in the order the form presents them. Address questions,
+whose answers are stored as ``<slug>__street``, ``<slug>__city`` and so on,
+get one column per field.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import question_type_configs
+from .tree import answer_keys, iter_questions
+
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Default number of submissions fetched from the database per round trip
+CHUNK_SIZE = 2000
+
+SUBMISSION_COLUMNS = (
+    'id', 'user_session_id', 'user_email', 'is_complete',
+    'started_datetime', 'completed_datetime', 'created_datetime', 'modified_datetime',
+)
+META_COLUMNS = ('submission_id',) + SUBMISSION_COLUMNS[1:] + ('form_version',)
+
+
+def question_slugs(serialized_form_data):
+    """Return every question slug of a form version, in display order."""
+    return list(dict.fromkeys(question['slug'] for question in iter_questions(serialized_form_data)))
+
+
+def answer_columns(serialized_form_data, type_configs):
+    """Return the answer keys of a form version as export columns, in display order."""
+    return list(dict.fromkeys(
+        key
+        for question in iter_questions(serialized_form_data)
+        for key in answer_keys(question['slug'], type_configs.get(question.get('type')))
+    ))
+
+
+def version_answer_columns(version):
+    data = version.serialized_form_data
+    return answer_columns(data, question_type_configs(data))
+
+
+def export_columns(version, keys=None):
+    return list(META_COLUMNS) + (version_answer_columns(version) if keys is None else keys)
+
+
+def iter_submission_rows(version, chunk_size=CHUNK_SIZE, keys=None):
+    """Yield one flat dict per submission of ``version``, oldest first."""
+    if keys is None:
+        keys = version_answer_columns(version)
+    submissions = (
+        version.submissions
+        .order_by('created_datetime', 'id')
+        .values_list(*SUBMISSION_COLUMNS, 'answers')
+        .iterator(chunk_size=chunk_size)
+    )
+    for *values, answers in submissions:
+        row = dict(zip(META_COLUMNS, values))
+        row['form_version'] = version.version_number
+        answers = answers or {}
+        for key in keys:
+            row[key] = answers.get(key)
+        yield row
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the data, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(version, chunk_size=CHUNK_SIZE):
+    """Yield the CSV export of ``version`` line by line, header first."""
+    keys = version_answer_columns(version)
+    columns = export_columns(version, keys)
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in iter_submission_rows(version, chunk_size, keys):
+        yield writer.writerow([_csv_value(row[column]) for column in columns])
+
+
+def iter_ndjson(version, chunk_size=CHUNK_SIZE):
+    """Yield the export of ``version`` as one JSON object per line."""
+    for row in iter_submission_rows(version, chunk_size):
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def iter_export(version, export_format, chunk_size=CHUNK_SIZE):
+    if export_format == 'csv':
+        return iter_csv(version, chunk_size)
+    if export_format == 'ndjson':
+        return iter_ndjson(version, chunk_size)
+    raise ValueError(f'Unknown export format: {export_format}')
+
+
+def export_filename(version, export_format):
+    return f'{version.form.slug}-v{version.version_number}-submissions.{export_format}'
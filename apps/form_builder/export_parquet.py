@@ -0,0 +1,203 @@
+"""
+Columnar (Parquet) export of form submissions for analytics.
+
+Each question slug becomes a typed column named ``answer_<slug>``, so
+questions can never shadow the submission columns (``submission_id``,
+``created_datetime``, ...). The type is taken from the question's type slug
+in the versions' ``serialized_form_data``: numbers are floats, yes/no answers
+booleans, dropdowns dictionary-encoded strings and everything else strings.
+Address questions get one string column per stored field
+(``answer_<slug>__street``, ...). Submissions are streamed with ``iterator()`` and
+written ``row_group_size`` rows at a time, so memory is bounded by one row
+group regardless of form size.
+
+pyarrow is optional (``pipenv run pip install pyarrow``); without it
+``write_parquet`` raises ImportError.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .export import CHUNK_SIZE, SUBMISSION_COLUMNS
+from .models import FormSubmission, QuestionType
+from .tree import answer_keys, iter_questions
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional: only needed to write Parquet files
+    pyarrow = None
+
+
+ROW_GROUP_SIZE = 50000
+
+# Column kind per question type slug; unlisted types are exported as strings
+QUESTION_TYPE_KINDS = {
+    'number': 'number',
+    'yes-no': 'boolean',
+    'dropdown': 'category',
+}
+
+# Prefix of answer columns, which keeps them apart from META_KINDS
+ANSWER_COLUMN_PREFIX = 'answer_'
+
+META_KINDS = {
+    'submission_id': 'string',
+    'form_version': 'integer',
+    'user_session_id': 'string',
+    'user_email': 'string',
+    'is_complete': 'boolean',
+    'started_datetime': 'timestamp',
+    'completed_datetime': 'timestamp',
+    'created_datetime': 'timestamp',
+    'modified_datetime': 'timestamp',
+}
+
+TRUE_VALUES = {'yes', 'true', '1', 'on'}
+FALSE_VALUES = {'no', 'false', '0', 'off'}
+
+
+def question_kinds(versions):
+    """
+    Return ``{answer key: kind}`` for every question of ``versions``, in display order.
+
+    Address questions contribute one string key per field. Versions are
+    read newest first; a key whose type changed between versions falls
+    back to a string column.
+    """
+    questions = [
+        question
+        for version in sorted(versions, key=lambda version: version.version_number, reverse=True)
+        for question in iter_questions(version.serialized_form_data)
+    ]
+    type_configs = dict(
+        QuestionType.objects
+        .filter(slug__in={question.get('type') for question in questions})
+        .values_list('slug', 'config')
+    )
+    kinds = {}
+    for question in questions:
+        keys = answer_keys(question['slug'], type_configs.get(question.get('type')))
+        kind = QUESTION_TYPE_KINDS.get(question.get('type'), 'string') if len(keys) == 1 else 'string'
+        for key in keys:
+            if kinds.setdefault(key, kind) != kind:
+                kinds[key] = 'string'
+    return kinds
+
+
+def answer_column(key):
+    return f'{ANSWER_COLUMN_PREFIX}{key}'
+
+
+def column_kinds(versions):
+    """Return ``{column: kind}`` for the submission and answer columns of ``versions``."""
+    return {**META_KINDS, **{answer_column(key): kind for key, kind in question_kinds(versions).items()}}
+
+
+def to_number(value):
+    if isinstance(value, bool) or value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_boolean(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    return None
+
+
+def to_string(value):
+    if value is None:
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    return str(value)
+
+
+CONVERTERS = {
+    'number': to_number,
+    'boolean': to_boolean,
+    'category': to_string,
+    'string': to_string,
+}
+
+
+def iter_column_batches(versions, row_group_size=ROW_GROUP_SIZE, chunk_size=CHUNK_SIZE):
+    """
+    Yield ``{column: [values]}`` batches of at most ``row_group_size`` rows.
+
+    Answers are converted to their column kind; values that do not fit
+    (e.g. text in a number question) become null.
+    """
+    kinds = question_kinds(versions)
+    converters = [(key, answer_column(key), CONVERTERS[kind]) for key, kind in kinds.items()]
+    submissions = (
+        FormSubmission.objects
+        .filter(form_version__in=versions)
+        .order_by('created_datetime', 'id')
+        .values_list(*SUBMISSION_COLUMNS, 'form_version__version_number', 'answers')
+        .iterator(chunk_size=chunk_size)
+    )
+
+    def empty_batch():
+        return {column: [] for column in [*META_KINDS, *(column for _, column, _ in converters)]}
+
+    batch = empty_batch()
+    size = 0
+    for pk, session_id, email, is_complete, started, completed, created, modified, version_number, answers in submissions:
+        batch['submission_id'].append(str(pk))
+        batch['form_version'].append(version_number)
+        batch['user_session_id'].append(session_id)
+        batch['user_email'].append(email)
+        batch['is_complete'].append(is_complete)
+        batch['started_datetime'].append(started)
+        batch['completed_datetime'].append(completed)
+        batch['created_datetime'].append(created)
+        batch['modified_datetime'].append(modified)
+        answers = answers or {}
+        for key, column, convert in converters:
+            batch[column].append(convert(answers.get(key)))
+        size += 1
+        if size == row_group_size:
+            yield batch
+            batch = empty_batch()
+            size = 0
+    if size:
+        yield batch
+
+
+def arrow_schema(kinds):
+    """Build the pyarrow schema for ``{column: kind}``."""
+    types = {
+        'string': pyarrow.string(),
+        'number': pyarrow.float64(),
+        'integer': pyarrow.int32(),
+        'boolean': pyarrow.bool_(),
+        'category': pyarrow.dictionary(pyarrow.int32(), pyarrow.string()),
+        'timestamp': pyarrow.timestamp('us', tz='UTC'),
+    }
+    return pyarrow.schema([(column, types[kind]) for column, kind in kinds.items()])
+
+
+def write_parquet(versions, path, row_group_size=ROW_GROUP_SIZE, chunk_size=CHUNK_SIZE):
+    """Write the submissions of ``versions`` to ``path``; returns the row count."""
+    if pyarrow is None:
+        raise ImportError('pyarrow is required for Parquet exports (pip install pyarrow)')
+
+    schema = arrow_schema(column_kinds(versions))
+    rows = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for batch in iter_column_batches(versions, row_group_size, chunk_size):
+            writer.write_table(pyarrow.Table.from_pydict(batch, schema=schema), row_group_size=row_group_size)
+            rows += len(batch['submission_id'])
+        if not rows:
+            writer.write_table(schema.empty_table())
+    return rows
@@ -0,0 +1,61 @@
+"""
+Management command to time server-side answer validation on large payloads.
+Usage: python manage.py benchmark_answer_validation [--answers N] [--repeat R]
+
+Builds a synthetic form with one question per answer (a mix of text,
+pattern, email, number and dropdown rules), then reports the one-off
+compile time and the per-payload and per-answer validation time.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.form_builder_api.validation import compile_version
+
+
+def synthetic_form(count):
+    """Return ``(serialized_form_data, answers)`` with ``count`` questions."""
+    kinds = [
+        ('short-text', {'min_length': 2, 'max_length': 50}, {}, 'Jane Doe'),
+        ('short-text', {'pattern': r'^[A-Z]{2}\d{4}$'}, {}, 'AB1234'),
+        ('short-text', {'email': True}, {}, 'jane@example.com'),
+        ('number', {'min_value': 0, 'max_value': 1000}, {}, '42'),
+        ('dropdown', {}, {'options': {'en': [{'value': f'option{i}'} for i in range(20)]}}, 'option7'),
+    ]
+    questions, answers = [], {}
+    for i in range(count):
+        question_type, validation, config, answer = kinds[i % len(kinds)]
+        slug = f'q{i}'
+        questions.append({
+            'slug': slug, 'type': question_type, 'order': i, 'required': True,
+            'validation': validation, 'config': config
+        })
+        answers[slug] = answer
+    return {'pages': [{'order': 1, 'questions': questions}]}, answers
+
+
+class Command(BaseCommand):
+    help = 'Benchmark compiling a form version validator and validating large answer payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--answers', type=int, default=10000, help='Questions and answers per payload')
+        parser.add_argument('--repeat', type=int, default=20, help='Validation runs to average')
+
+    def handle(self, *args, **options):
+        count, repeat = options['answers'], options['repeat']
+        form_data, answers = synthetic_form(count)
+
+        start = time.perf_counter()
+        validator = compile_version(form_data)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            errors = validator.validate(answers, complete=True)
+        validate_ms = (time.perf_counter() - start) / repeat * 1000
+
+        self.stdout.write(f'Compiled {count} questions in {compile_ms:.2f} ms')
+        self.stdout.write(
+            f'Validated {count} answers in {validate_ms:.2f} ms '
+            f'({validate_ms * 1000 / max(count, 1):.2f} µs per answer, {len(errors)} errors)'
+        )
@@ -0,0 +1,115 @@
+"""
+Management command to show query plans and timings for the submission query paths.
+Usage: python manage.py benchmark_submission_queries [--compare] [--seed N]
+
+--compare also runs every query with the submission indexes dropped (inside a
+transaction that is rolled back), giving a before/after view of the plans.
+--seed inserts N throwaway submissions first, also rolled back.
+"""
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.form_builder.models import DynamicForm, FormSubmission, FormVersion
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Explain and time the submission list, resume and reporting queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compare', action='store_true', help='Also run without the submission indexes')
+        parser.add_argument('--seed', type=int, default=0, help='Insert N temporary submissions first')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query for timing')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.seed(options['seed'])
+                self.run_queries('with indexes', options['repeat'])
+                if options['compare']:
+                    self.drop_indexes()
+                    self.run_queries('without indexes', options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def query_paths(self):
+        """Querysets issued by the submission API, keyed by label."""
+        submission = FormSubmission.objects.order_by('-created_datetime', '-id').first()
+        session_id = submission.user_session_id if submission else 'missing-session'
+        version_id = submission.form_version_id if submission else uuid.uuid4()
+        form_slug = submission.form_version.form.slug if submission else 'missing-form'
+
+        paths = {
+            'list newest': FormSubmission.objects.order_by('-created_datetime', '-id')[:100],
+            'resume by session': FormSubmission.objects.filter(
+                user_session_id=session_id
+            ).order_by('-created_datetime', '-id')[:100],
+            'list by form': FormSubmission.objects.filter(
+                form_version__form__slug=form_slug
+            ).order_by('-created_datetime', '-id')[:100],
+            'list by version': FormSubmission.objects.filter(
+                form_version_id=version_id
+            ).order_by('-created_datetime', '-id')[:100],
+            'completed since': FormSubmission.objects.filter(
+                is_complete=True, completed_datetime__gte=timezone.now() - timedelta(days=7)
+            ).order_by('completed_datetime'),
+        }
+        if connection.vendor == 'postgresql':
+            paths['answers has key'] = FormSubmission.objects.filter(answers__has_key='email')
+        return paths
+
+    def run_queries(self, title, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== {title} =='))
+        for label, queryset in self.query_paths().items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset)
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            self.stdout.write(self.style.MIGRATE_LABEL(f'{label}: {elapsed:.2f} ms'))
+            self.stdout.write(self.explain(queryset, title))
+            self.stdout.write('')
+
+    def explain(self, queryset, title):
+        # Tag the statement so sqlite3's statement cache cannot return a plan
+        # prepared before the indexes were dropped
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql} /* {title} */', params)
+            return '\n'.join(' '.join(str(value) for value in row) for row in cursor.fetchall())
+
+    def drop_indexes(self):
+        # Plain DROP INDEX, since the SQLite schema editor refuses to run inside atomic()
+        names = [index.name for index in FormSubmission._meta.indexes] + ['submission_answers_gin']
+        with connection.cursor() as cursor:
+            for name in names:
+                cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(name)}')
+
+    def seed(self, count):
+        form = DynamicForm.objects.create(name=f'Benchmark {uuid.uuid4().hex[:8]}')
+        version = FormVersion.objects.create(form=form, version_number=1, serialized_form_data={})
+        now = timezone.now()
+        FormSubmission.objects.bulk_create(
+            [
+                FormSubmission(
+                    form_version=version,
+                    user_session_id=f'session-{i % max(count // 10, 1)}',
+                    answers={'email': f'user{i}@example.com'} if i % 2 else {},
+                    is_complete=bool(i % 3),
+                    completed_datetime=now - timedelta(minutes=i) if i % 3 else None,
+                    created_datetime=now - timedelta(seconds=i)
+                )
+                for i in range(count)
+            ],
+            batch_size=1000
+        )
+        self.stdout.write(f'Seeded {count} submissions (rolled back afterwards)')
@@ -0,0 +1,45 @@
+"""
+Management command to export the submissions of a form version.
+Usage: python manage.py export_submissions <form_slug> [--version-number N] [--format csv|ndjson] [--output FILE]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.form_builder.export import CHUNK_SIZE, EXPORT_FORMATS, iter_export
+from apps.form_builder.models import DynamicForm
+
+
+class Command(BaseCommand):
+    help = 'Stream the submissions of a form version to CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('form_slug')
+        parser.add_argument(
+            '--version-number', type=int,
+            help='Version number to export (default: latest published version)'
+        )
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', help='File to write to (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        form = DynamicForm.objects.filter(slug=options['form_slug']).first()
+        if form is None:
+            raise CommandError(f'Form "{options["form_slug"]}" not found')
+
+        if options['version_number']:
+            version = form.versions.filter(version_number=options['version_number']).first()
+        else:
+            version = form.get_latest_published_version()
+        if version is None:
+            raise CommandError('No matching form version found')
+
+        lines = iter_export(version, options['export_format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(
+                f'Exported {version.submissions.count()} submissions of {form.slug} v{version.version_number} to {options["output"]}'
+            ))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,56 @@
+"""
+Management command to export a form's submissions to Parquet for analytics.
+Usage: python manage.py export_submissions_parquet <form_slug> <output.parquet> [--from-version N] [--to-version M]
+
+Requires pyarrow, which is not in the Pipfile because only this export uses it.
+Install it next to the app before running the command:
+
+    pipenv run pip install pyarrow
+
+Answer columns are named ``answer_<question slug>``; see apps.form_builder.export_parquet.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.form_builder.export import CHUNK_SIZE
+from apps.form_builder.export_parquet import ROW_GROUP_SIZE, write_parquet
+from apps.form_builder.models import DynamicForm
+
+
+class Command(BaseCommand):
+    help = 'Write submissions of a form (optionally a version range) to a Parquet file with typed columns (requires pyarrow)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('form_slug')
+        parser.add_argument('output')
+        parser.add_argument('--from-version', type=int, help='First version number to include')
+        parser.add_argument('--to-version', type=int, help='Last version number to include')
+        parser.add_argument('--row-group-size', type=int, default=ROW_GROUP_SIZE)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        form = DynamicForm.objects.filter(slug=options['form_slug']).first()
+        if form is None:
+            raise CommandError(f'Form "{options["form_slug"]}" not found')
+
+        versions = form.versions.only('id', 'version_number', 'serialized_form_data')
+        if options['from_version'] is not None:
+            versions = versions.filter(version_number__gte=options['from_version'])
+        if options['to_version'] is not None:
+            versions = versions.filter(version_number__lte=options['to_version'])
+        versions = list(versions)
+        if not versions:
+            raise CommandError('No form versions in the requested range')
+
+        try:
+            rows = write_parquet(
+                versions, options['output'],
+                row_group_size=options['row_group_size'],
+                chunk_size=options['chunk_size']
+            )
+        except ImportError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {rows} submissions of {form.slug} '
+            f'(versions {", ".join(str(v.version_number) for v in versions)}) to {options["output"]}'
+        ))
@@ -0,0 +1,23 @@
+"""
+Management command to write out the autosave buffer.
+Usage: python manage.py flush_autosaves
+
+Useful with the shared ('django') buffer backend, e.g. from a deploy hook
+after workers stop, or from cron if no worker runs a background flush.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.form_builder_api.autosave import get_autosave_buffer
+
+
+class Command(BaseCommand):
+    help = 'Write all buffered autosave answer patches to the database'
+
+    def handle(self, *args, **options):
+        buffer = get_autosave_buffer()
+        written = buffer.flush()
+        metrics = buffer.metrics()
+        self.stdout.write(self.style.SUCCESS(
+            f'Flushed {written} submissions ({metrics["queue_depth"]} still pending, '
+            f'{metrics["last_flush_ms"] or 0} ms)'
+        ))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.utils import timezone
 from apps.form_builder.models import QuestionType, QuestionGroupTemplate, QuestionGroup, Question
 
 
@@ -208,13 +209,10 @@ class Command(BaseCommand):
             self.stdout.write('Updating existing Address QuestionGroups...')
             
             address_groups = QuestionGroup.objects.filter(display_type='address', template__isnull=True)
-            updated_count = 0
             
-            for group in address_groups:
-                group.template = address_template
-                group.save()
-                updated_count += 1
-                self.stdout.write(f'  Updated group: {group.name} (ID: {group.id})')
+            for group_id, group_name in address_groups.values_list('id', 'name'):
+                self.stdout.write(f'  Updated group: {group_name} (ID: {group_id})')
+            updated_count = address_groups.update(template=address_template, modified_datetime=timezone.now())
             
             self.stdout.write(
                 self.style.SUCCESS(f'✓ Updated {updated_count} existing Address QuestionGroups')
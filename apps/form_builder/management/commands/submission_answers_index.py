@@ -0,0 +1,39 @@
+"""
+Management command to create or drop the GIN index on submission answers.
+Usage: python manage.py submission_answers_index [--drop]
+
+The index speeds up answers__has_key / answers__contains lookups but makes
+every answers write (autosave) more expensive, so it is not created by the
+migrations. It only exists on PostgreSQL and is built CONCURRENTLY, so
+submissions stay writable while it is created.
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.form_builder.models import FormSubmission
+
+
+INDEX_NAME = 'submission_answers_gin'
+
+
+class Command(BaseCommand):
+    help = 'Create (or with --drop, remove) the GIN index on FormSubmission.answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drop', action='store_true', help='Drop the index instead of creating it')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f'The answers GIN index needs PostgreSQL; nothing to do on {connection.vendor}'
+            ))
+            return
+
+        with connection.cursor() as cursor:
+            if options['drop']:
+                cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}')
+                self.stdout.write(self.style.SUCCESS(f'Dropped {INDEX_NAME}'))
+                return
+            table = connection.ops.quote_name(FormSubmission._meta.db_table)
+            cursor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} ON {table} USING gin (answers)')
+        self.stdout.write(self.style.SUCCESS(f'Created {INDEX_NAME}'))
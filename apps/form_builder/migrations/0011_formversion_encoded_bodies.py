@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:34
+
+import gzip
+import json
+
+from django.db import migrations, models
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Published-form responses send encoded_body as is, so the backfill writes
+# the bytes FormVersion.save() wrote when this migration was added: compact
+# JSON with U+2028/U+2029 escaped, gzip at level 9 with a zero mtime, and
+# brotli only when it is installed. Later changes to the encoding in
+# models.py re-encode through save(), not by editing this migration.
+
+def encode_json_body(data):
+    body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    body = body.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    return body.encode('utf-8')
+
+
+def compress_body(body):
+    return {
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+        'br': brotli.compress(body) if brotli else None,
+    }
+
+
+def encode_existing_versions(apps, schema_editor):
+    FormVersion = apps.get_model('form_builder', 'FormVersion')
+    versions = FormVersion.objects.filter(encoded_body__isnull=True).only('id', 'serialized_form_data')
+    for version in versions.iterator(chunk_size=100):
+        body = encode_json_body(version.serialized_form_data)
+        compressed = compress_body(body)
+        version.encoded_body = body
+        version.encoded_body_gzip = compressed['gzip']
+        version.encoded_body_br = compressed['br']
+        version.save(update_fields=['encoded_body', 'encoded_body_gzip', 'encoded_body_br'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0010_add_tag_link_to_page'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formversion',
+            name='encoded_body',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='formversion',
+            name='encoded_body_br',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='formversion',
+            name='encoded_body_gzip',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.RunPython(encode_existing_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:35
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_published_datetime(apps, schema_editor):
+    FormVersion = apps.get_model('form_builder', 'FormVersion')
+    FormVersion.objects.filter(is_published=True, published_datetime__isnull=True).update(
+        published_datetime=F('created_datetime')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0011_formversion_encoded_bodies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formversion',
+            name='published_datetime',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_published_datetime, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import F, Max
+
+# Matches apps.form_builder.ordering.ORDER_GAP at the time of writing
+ORDER_GAP = 1024
+
+
+def park_orders(model):
+    """Shift every order below zero so final orders can be written without clashes."""
+    top = model.objects.aggregate(top=Max('order'))['top']
+    if top is not None:
+        model.objects.update(order=F('order') - (top + 1))
+
+
+def spread_orders(apps, schema_editor):
+    Page = apps.get_model('form_builder', 'Page')
+    QuestionGroup = apps.get_model('form_builder', 'QuestionGroup')
+    Question = apps.get_model('form_builder', 'Question')
+
+    # Collect (order, kind, pk) per sequence before any row moves
+    sequences = defaultdict(list)
+    for pk, form_id, order in Page.objects.values_list('pk', 'form_id', 'order'):
+        sequences[('form', form_id)].append((order, 0, Page, pk))
+    # A page's questions and groups form one sequence, questions first on ties
+    for pk, page_id, group_id, order in Question.objects.values_list('pk', 'page_id', 'question_group_id', 'order'):
+        if group_id:
+            sequences[('group', group_id)].append((order, 0, Question, pk))
+        else:
+            sequences[('page', page_id)].append((order, 0, Question, pk))
+    for pk, page_id, order in QuestionGroup.objects.values_list('pk', 'page_id', 'order'):
+        sequences[('page', page_id)].append((order, 1, QuestionGroup, pk))
+
+    updates = defaultdict(list)
+    for items in sequences.values():
+        items.sort(key=lambda item: item[:2])
+        for rank, (_, _, model, pk) in enumerate(items, start=1):
+            updates[model].append(model(pk=pk, order=rank * ORDER_GAP))
+
+    for model in (Page, Question, QuestionGroup):
+        park_orders(model)
+        model.objects.bulk_update(updates[model], ['order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0012_formversion_published_datetime'),
+    ]
+
+    operations = [
+        # Rank keys stay valid orders, so there is nothing to undo
+        migrations.RunPython(spread_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0013_spread_order_rank_keys'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='formsubmission',
+            index=models.Index(fields=['-created_datetime', '-id'], name='submission_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='formsubmission',
+            index=models.Index(fields=['user_session_id', '-created_datetime', '-id'], name='submission_session_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='formsubmission',
+            index=models.Index(fields=['form_version', '-created_datetime', '-id'], name='submission_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='formsubmission',
+            index=models.Index(fields=['completed_datetime'], condition=models.Q(is_complete=True), name='submission_completed_idx'),
+        ),
+    ]
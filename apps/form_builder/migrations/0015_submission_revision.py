@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0014_submission_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formsubmission',
+            name='revision',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,137 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:13
+
+from operator import itemgetter
+
+from django.db import migrations, models
+
+
+# The graph layout LogicPlan reads back ('dependents', 'page_dependents',
+# 'order', 'cycles'), built the way dependencies.py built it when the
+# column was added. Importing dependencies.py instead would tie the
+# backfill to whatever keys that module produces in the future.
+
+def iter_questions(serialized_form_data):
+    """Yield every question of a form version, grouped ones included, in display order."""
+    for page in sorted(serialized_form_data.get('pages', []), key=itemgetter('order')):
+        # Direct questions and groups share positions; questions come first on ties
+        items = [(question['order'], 0, question) for question in page.get('questions', [])]
+        items += [(group['order'], 1, group) for group in page.get('question_groups', [])]
+        for _, is_group, item in sorted(items, key=itemgetter(0, 1)):
+            if is_group:
+                yield from sorted(item.get('questions', []), key=itemgetter('order'))
+            else:
+                yield item
+
+
+def condition_slugs(item):
+    """Answer slugs read by an item's conditions, in first-use order."""
+    slugs = []
+    for rule in (item.get('conditional_logic') or {}).get('rules') or []:
+        for condition in rule.get('conditions') or []:
+            slugs.append(condition.get('question_slug'))
+    for field in ('disabled_condition', 'tag_display_condition'):
+        condition = item.get(field)
+        if condition:
+            slugs.append(condition.get('field'))
+    return [slug for slug in dict.fromkeys(slugs) if isinstance(slug, str) and slug]
+
+
+def strongly_connected_components(nodes, edges):
+    """
+    Tarjan's algorithm, iterative so long dependency chains cannot hit the
+    recursion limit. Components come out dependents first.
+    """
+    index, low = {}, {}
+    stack, on_stack = [], set()
+    components = []
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(edges.get(root, ())))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(edges.get(child, ()))))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+def build_dependency_graph(serialized_form_data):
+    """Build the dependency graph stored on a form version."""
+    dependents, page_dependents = {}, {}
+    slugs = []
+    for question in iter_questions(serialized_form_data):
+        slugs.append(question['slug'])
+        for slug in condition_slugs(question):
+            dependents.setdefault(slug, []).append(question['slug'])
+    for page in serialized_form_data.get('pages', []):
+        for slug in condition_slugs(page):
+            page_dependents.setdefault(slug, []).append(page.get('slug'))
+
+    # Slugs that are only referenced (e.g. address ``<slug>__<field>`` keys) are nodes too
+    nodes = list(dict.fromkeys(slugs + list(dependents)))
+    position = {slug: i for i, slug in enumerate(nodes)}
+    # Walked backwards, so unrelated slugs keep display order once reversed
+    components = strongly_connected_components(
+        nodes[::-1], {slug: targets[::-1] for slug, targets in dependents.items()}
+    )
+
+    order, cycles = [], []
+    for component in reversed(components):
+        component.sort(key=position.__getitem__)
+        order.extend(component)
+        if len(component) > 1 or component[0] in dependents.get(component[0], ()):
+            cycles.append(component)
+    return {
+        'dependents': dependents,
+        'page_dependents': page_dependents,
+        'order': order,
+        'cycles': cycles,
+    }
+
+
+def analyze_existing_versions(apps, schema_editor):
+    FormVersion = apps.get_model('form_builder', 'FormVersion')
+    versions = FormVersion.objects.filter(dependency_graph__isnull=True).only('id', 'serialized_form_data')
+    for version in versions.iterator(chunk_size=100):
+        version.dependency_graph = build_dependency_graph(version.serialized_form_data)
+        version.save(update_fields=['dependency_graph'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0015_submission_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formversion',
+            name='dependency_graph',
+            field=models.JSONField(editable=False, null=True),
+        ),
+        migrations.RunPython(analyze_existing_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:02
+
+import json
+
+from django.db import migrations, models
+
+
+# body_size must equal the length of the encoded_body that 0011 stored, so
+# the same compact encoding is repeated here. Pages and questions are
+# counted the way version summaries counted them when these columns were
+# added, with grouped questions included.
+
+def encode_json_body(data):
+    body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    body = body.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    return body.encode('utf-8')
+
+
+def count_form_items(serialized_form_data):
+    pages = serialized_form_data.get('pages', [])
+    questions = 0
+    for page in pages:
+        questions += len(page.get('questions', []))
+        questions += sum(len(group.get('questions', [])) for group in page.get('question_groups', []))
+    return len(pages), questions
+
+
+def summarize_existing_versions(apps, schema_editor):
+    FormVersion = apps.get_model('form_builder', 'FormVersion')
+    versions = FormVersion.objects.filter(page_count__isnull=True).only('id', 'serialized_form_data')
+    for version in versions.iterator(chunk_size=100):
+        version.body_size = len(encode_json_body(version.serialized_form_data))
+        version.page_count, version.question_count = count_form_items(version.serialized_form_data)
+        version.save(update_fields=['body_size', 'page_count', 'question_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0016_formversion_dependency_graph'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formversion',
+            name='body_size',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='formversion',
+            name='page_count',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='formversion',
+            name='question_count',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(summarize_existing_versions, migrations.RunPython.noop),
+    ]
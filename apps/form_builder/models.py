@@ -1,8 +1,64 @@
+import gzip
+import hashlib
+import json
 import uuid
-from django.db import models
+from collections import defaultdict
+from django.db import models, transaction
+from django.db.models import Max, Prefetch, Q
 from django.utils import timezone
 from django.utils.text import slugify
 
+from .dependencies import build_dependency_graph
+from .ordering import ORDER_GAP, assign_positions, next_order
+from .tree import iter_questions
+
+try:
+    import brotli
+except ImportError:  # Optional: brotli variants are skipped when unavailable
+    brotli = None
+
+
+def encode_json_body(data):
+    """Encode data as compact UTF-8 JSON, matching DRF's JSONRenderer output."""
+    body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    # Escape line/paragraph separators like DRF does for JSONP-safe output
+    body = body.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    return body.encode('utf-8')
+
+
+def make_version_etag(version_id, version_number, content_encoding=None):
+    """Build a strong ETag for a form version, distinct per content coding."""
+    digest = hashlib.sha256(f'{version_id}:{version_number}'.encode()).hexdigest()[:32]
+    if content_encoding:
+        digest = f'{digest}-{content_encoding}'
+    return f'"{digest}"'
+
+
+def compress_body(body):
+    """Return the gzip and brotli variants of an encoded body."""
+    return {
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+        'br': brotli.compress(body) if brotli else None,
+    }
+
+
+def count_form_items(serialized_form_data):
+    """Count the pages and questions, grouped ones included, of a serialized form."""
+    pages = serialized_form_data.get('pages', [])
+    questions = 0
+    for page in pages:
+        questions += len(page.get('questions', []))
+        questions += sum(len(group.get('questions', [])) for group in page.get('question_groups', []))
+    return len(pages), questions
+
+
+class PublishError(ValueError):
+    """A form version that cannot be published, with the reasons in ``errors``."""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
 
 class DynamicForm(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -23,86 +79,30 @@ class DynamicForm(models.Model):
 
     def get_current_version_number(self):
         """Get the next version number for this form"""
-        latest = self.versions.first()
-        return (latest.version_number + 1) if latest else 1
-
-    def create_version(self, notes="", created_by=""):
-        """Create a new version from current form structure"""
-        form_data = {
+        latest = self.versions.values_list('version_number', flat=True).first()
+        return (latest + 1) if latest else 1
+
+    def build_snapshot(self):
+        """Build the serialized form structure stored in a FormVersion.
+
+        The whole page/question/group tree is loaded with a fixed number of
+        queries regardless of form size, then assembled in memory.
+        """
+        pages = [
+            page.to_snapshot()
+            for page in self.pages.order_by('order').prefetch_related(*page_tree_prefetches())
+        ]
+        assign_positions(pages)
+        return {
             'form_id': str(self.id),
             'name': self.name,
             'slug': self.slug,
-            'pages': []
+            'pages': pages
         }
-        
-        for page in self.pages.all().order_by('order'):
-            page_data = {
-                'id': str(page.id),
-                'name': page.name,
-                'slug': page.slug,
-                'order': page.order,
-                'conditional_logic': page.conditional_logic,
-                'disabled_condition': page.disabled_condition,
-                'tag_text': page.tag_text,
-                'tag_hover_text': page.tag_hover_text,
-                'tag_display_condition': page.tag_display_condition,
-                'tag_link': page.tag_link,
-                'config': page.config,
-                'questions': [],
-                'question_groups': []
-            }
-            
-            # Add regular questions
-            for question in page.questions.all().order_by('order'):
-                question_data = {
-                    'id': str(question.id),
-                    'type': question.type.slug,  # Just store the slug, not the full config
-                    'name': question.name,
-                    'slug': question.slug,
-                    'text': question.text,
-                    'subtext': question.subtext,
-                    'required': question.required,
-                    'config': question.config,
-                    'validation': question.validation,
-                    'conditional_logic': question.conditional_logic,
-                    'disabled_condition': question.disabled_condition,
-                    'order': question.order
-                }
-                page_data['questions'].append(question_data)
-            
-            # Add question groups
-            for group in page.question_groups.all().order_by('order'):
-                group_data = {
-                    'id': str(group.id),
-                    'name': group.name,
-                    'slug': group.slug,
-                    'display_type': group.display_type,
-                    'config': group.config,
-                    'order': group.order,
-                    'template_slug': group.template.slug if group.template else None,
-                    'questions': []
-                }
-                
-                for question in group.questions.all().order_by('order'):
-                    question_data = {
-                        'id': str(question.id),
-                        'type': question.type.slug,
-                        'name': question.name,
-                        'slug': question.slug,
-                        'text': question.text,
-                        'subtext': question.subtext,
-                        'required': question.required,
-                        'config': question.config,
-                        'validation': question.validation,
-                        'conditional_logic': question.conditional_logic,
-                        'disabled_condition': question.disabled_condition,
-                        'order': question.order
-                    }
-                    group_data['questions'].append(question_data)
-                
-                page_data['question_groups'].append(group_data)
-            
-            form_data['pages'].append(page_data)
+
+    def create_version(self, notes="", created_by=""):
+        """Create a new version from current form structure"""
+        form_data = self.build_snapshot()
         
         version = FormVersion.objects.create(
             form=self,
@@ -114,6 +114,43 @@ class DynamicForm(models.Model):
         
         return version
 
+    def duplicate(self, name, slug):
+        """Copy this form with its whole page/question/group tree.
+
+        The tree is read with three queries and written with one bulk insert
+        per model, with ids generated up front so children can point at their
+        new parents before anything is saved.
+        """
+        pages = list(self.pages.all())
+        groups = list(QuestionGroup.objects.filter(page__form=self))
+        questions = list(Question.objects.filter(Q(page__form=self) | Q(question_group__page__form=self)))
+
+        new_form = copy_instance(self, name=name, slug=slug)
+        new_pages = {
+            page.id: copy_instance(page, form_id=new_form.id, slug=f"{page.slug}-copy")
+            for page in pages
+        }
+        new_groups = {
+            group.id: copy_instance(group, page_id=new_pages[group.page_id].id)
+            for group in groups
+        }
+        new_questions = [
+            copy_instance(
+                question,
+                page_id=new_pages[question.page_id].id if question.page_id else None,
+                question_group_id=new_groups[question.question_group_id].id if question.question_group_id else None,
+                slug=f"{question.slug}-copy"
+            )
+            for question in questions
+        ]
+
+        with transaction.atomic():
+            new_form.save()
+            Page.objects.bulk_create(new_pages.values())
+            QuestionGroup.objects.bulk_create(new_groups.values())
+            Question.objects.bulk_create(new_questions)
+        return new_form
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
@@ -129,9 +166,25 @@ class FormVersion(models.Model):
     version_number = models.PositiveIntegerField()
     serialized_form_data = models.JSONField()
     is_published = models.BooleanField(default=False)
+    published_datetime = models.DateTimeField(null=True, blank=True)
     notes = models.TextField(blank=True)
     created_datetime = models.DateTimeField(default=timezone.now)
     created_by = models.CharField(max_length=255, blank=True)
+    # Pre-encoded response bodies, computed whenever serialized_form_data is saved
+    encoded_body = models.BinaryField(null=True, editable=False)
+    encoded_body_gzip = models.BinaryField(null=True, editable=False)
+    encoded_body_br = models.BinaryField(null=True, editable=False)
+    # Conditional logic dependencies (see dependencies.py), computed with the bodies
+    dependency_graph = models.JSONField(null=True, editable=False)
+    # Shown in version summaries without loading serialized_form_data, computed with the bodies
+    body_size = models.PositiveIntegerField(null=True, editable=False)
+    page_count = models.PositiveIntegerField(null=True, editable=False)
+    question_count = models.PositiveIntegerField(null=True, editable=False)
+
+    # Columns derived from serialized_form_data, which API listings never read
+    DERIVED_FIELDS = ('encoded_body', 'encoded_body_gzip', 'encoded_body_br', 'dependency_graph')
+    # Columns summarizing serialized_form_data
+    SUMMARY_FIELDS = ('body_size', 'page_count', 'question_count')
 
     class Meta:
         verbose_name = "Form Version"
@@ -139,6 +192,59 @@ class FormVersion(models.Model):
         unique_together = ['form', 'version_number']
         ordering = ['-version_number']
 
+    def publish(self):
+        """Mark this version as published, unless its conditional logic has cycles"""
+        cycles = self.get_dependency_graph()['cycles']
+        if cycles:
+            raise PublishError(
+                'Conditional logic has circular references',
+                errors=[{'type': 'cycle', 'questions': cycle} for cycle in cycles]
+            )
+        self.is_published = True
+        self.published_datetime = timezone.now()
+        self.save(update_fields=['is_published', 'published_datetime'])
+
+    def get_etag(self, content_encoding=None):
+        """Get a strong ETag for this version's definition"""
+        return make_version_etag(self.id, self.version_number, content_encoding)
+
+    def render_encoded_bodies(self):
+        """Encode serialized_form_data as JSON plus gzip/brotli variants"""
+        body = encode_json_body(self.serialized_form_data)
+        compressed = compress_body(body)
+        self.encoded_body = body
+        self.encoded_body_gzip = compressed['gzip']
+        self.encoded_body_br = compressed['br']
+        self.body_size = len(body)
+
+    def get_encoded_bodies(self):
+        """Get the encoded bodies keyed by content coding ('identity', 'gzip', 'br')"""
+        if self.encoded_body is None:
+            # Versions saved before bodies were stored are encoded on the fly
+            self.render_encoded_bodies()
+        return {
+            'identity': bytes(self.encoded_body),
+            'gzip': bytes(self.encoded_body_gzip) if self.encoded_body_gzip is not None else None,
+            'br': bytes(self.encoded_body_br) if self.encoded_body_br is not None else None,
+        }
+
+    def get_dependency_graph(self):
+        """Get the conditional logic dependency graph of this version"""
+        if self.dependency_graph is None:
+            # Versions saved before graphs were stored are analyzed on the fly
+            self.dependency_graph = build_dependency_graph(self.serialized_form_data)
+        return self.dependency_graph
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'serialized_form_data' in update_fields:
+            self.render_encoded_bodies()
+            self.dependency_graph = build_dependency_graph(self.serialized_form_data)
+            self.page_count, self.question_count = count_form_items(self.serialized_form_data)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.DERIVED_FIELDS) | set(self.SUMMARY_FIELDS)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.form.name} v{self.version_number}"
 
@@ -183,6 +289,31 @@ class Page(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+    def get_order_sequences(self):
+        """Sequence this page is ordered within (see ``ordering``)"""
+        return form_page_sequences(self.form_id)
+
+    def to_snapshot(self):
+        """Serialize this page for a form version (uses prefetched questions/groups)"""
+        questions = [question.to_snapshot() for question in self.questions.all()]
+        question_groups = [group.to_snapshot() for group in self.question_groups.all()]
+        assign_positions(questions, question_groups)
+        return {
+            'id': str(self.id),
+            'name': self.name,
+            'slug': self.slug,
+            'order': self.order,
+            'conditional_logic': self.conditional_logic,
+            'disabled_condition': self.disabled_condition,
+            'tag_text': self.tag_text,
+            'tag_hover_text': self.tag_hover_text,
+            'tag_display_condition': self.tag_display_condition,
+            'tag_link': self.tag_link,
+            'config': self.config,
+            'questions': questions,
+            'question_groups': question_groups
+        }
+
     class Meta:
         ordering = ['order']
         unique_together = [
@@ -218,6 +349,12 @@ class QuestionType(models.Model):
         return self.name
 
 
+def question_type_configs(serialized_form_data):
+    """Map the question type slugs a serialized form uses to their type ``config``."""
+    types = {question.get('type') for question in iter_questions(serialized_form_data)}
+    return dict(QuestionType.objects.filter(slug__in=types).values_list('slug', 'config'))
+
+
 class QuestionGroupTemplate(models.Model):
     """Reusable templates for creating question groups (e.g., Address, Contact Info)"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -261,40 +398,69 @@ class QuestionGroupTemplate(models.Model):
 
     def create_group_from_template(self, page, group_name=None, order=None):
         """Create a QuestionGroup instance from this template"""
-        
-        # Create the group
-        import uuid
-        unique_suffix = str(uuid.uuid4())[:8]
-        
-        group = QuestionGroup.objects.create(
-            page=page,
-            template=self,
-            name=group_name or self.name,
-            slug=f"{self.slug}-{unique_suffix}",
-            display_type=self.display_type,
-            config=self.config.copy(),
-            order=order or (page.question_groups.count() + 1)
+        order = order or next_order(page_item_sequences(page.id))
+        return self._instantiate([(page, order)], group_name)[0]
+
+    def create_groups_from_template(self, pages, group_name=None):
+        """Add a group from this template to the end of each page, in one transaction"""
+        pages = list(pages)
+        tops = defaultdict(int)
+        for model in (Question, QuestionGroup):
+            rows = model.objects.filter(page__in=pages).values_list('page_id').annotate(top=Max('order'))
+            for page_id, top in rows:
+                tops[page_id] = max(tops[page_id], top)
+        return self._instantiate(
+            [(page, tops[page.id] + ORDER_GAP) for page in pages],
+            group_name
         )
-        
-        # Create questions from template
-        for i, question_def in enumerate(self.question_template):
-            question_type = QuestionType.objects.get(slug=question_def['type_slug'])
-            
-            Question.objects.create(
-                question_group=group,
-                type=question_type,
-                name=question_def['name'],
-                slug=f"{group.slug}_{question_def['slug_suffix']}",
-                text=question_def['text'],
-                subtext=question_def.get('subtext', ''),
-                required=question_def.get('required', False),
-                config=question_def.get('config', {}),
-                validation=question_def.get('validation', {}),
-                conditional_logic=question_def.get('conditional_logic', {}),
-                order=i + 1
+
+    def resolve_question_types(self):
+        """Return ``{type_slug: QuestionType}`` for the template's questions in one query"""
+        slugs = {question_def['type_slug'] for question_def in self.question_template}
+        question_types = QuestionType.objects.in_bulk(slugs, field_name='slug')
+        missing = slugs - set(question_types)
+        if missing:
+            raise QuestionType.DoesNotExist(f"Unknown question types: {', '.join(sorted(missing))}")
+        return question_types
+
+    def _instantiate(self, placements, group_name):
+        """Bulk-create one group with the template's questions per ``(page, order)``"""
+        question_types = self.resolve_question_types()
+        groups = []
+        questions = []
+        for page, order in placements:
+            group = QuestionGroup(
+                id=uuid.uuid4(),
+                page=page,
+                template=self,
+                name=group_name or self.name,
+                slug=f"{self.slug}-{str(uuid.uuid4())[:8]}",
+                display_type=self.display_type,
+                config=self.config.copy(),
+                order=order
             )
-        
-        return group
+            groups.append(group)
+            questions.extend(
+                Question(
+                    question_group=group,
+                    type=question_types[question_def['type_slug']],
+                    name=question_def['name'],
+                    slug=f"{group.slug}_{question_def['slug_suffix']}",
+                    text=question_def['text'],
+                    subtext=question_def.get('subtext', ''),
+                    required=question_def.get('required', False),
+                    config=question_def.get('config', {}),
+                    validation=question_def.get('validation', {}),
+                    conditional_logic=question_def.get('conditional_logic', {}),
+                    order=(i + 1) * ORDER_GAP
+                )
+                for i, question_def in enumerate(self.question_template)
+            )
+
+        with transaction.atomic():
+            QuestionGroup.objects.bulk_create(groups)
+            Question.objects.bulk_create(questions)
+        return groups
 
     def __str__(self):
         return self.name
@@ -340,6 +506,25 @@ class QuestionGroup(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+    def get_order_sequences(self):
+        """Sequence this group is ordered within (see ``ordering``)"""
+        return page_item_sequences(self.page_id)
+
+    def to_snapshot(self):
+        """Serialize this group for a form version (uses prefetched questions)"""
+        questions = [question.to_snapshot() for question in self.questions.all()]
+        assign_positions(questions)
+        return {
+            'id': str(self.id),
+            'name': self.name,
+            'slug': self.slug,
+            'display_type': self.display_type,
+            'config': self.config,
+            'order': self.order,
+            'template_slug': self.template.slug if self.template else None,
+            'questions': questions
+        }
+
     class Meta:
         ordering = ['order']
         unique_together = [
@@ -385,6 +570,29 @@ class Question(models.Model):
             raise ValueError("Question must belong to either a page or a question group")
         super().save(*args, **kwargs)
 
+    def get_order_sequences(self):
+        """Sequence this question is ordered within (see ``ordering``)"""
+        if self.question_group_id:
+            return group_question_sequences(self.question_group_id)
+        return page_item_sequences(self.page_id)
+
+    def to_snapshot(self):
+        """Serialize this question for a form version"""
+        return {
+            'id': str(self.id),
+            'type': self.type.slug,  # Just store the slug, not the full config
+            'name': self.name,
+            'slug': self.slug,
+            'text': self.text,
+            'subtext': self.subtext,
+            'required': self.required,
+            'config': self.config,
+            'validation': self.validation,
+            'conditional_logic': self.conditional_logic,
+            'disabled_condition': self.disabled_condition,
+            'order': self.order
+        }
+
     class Meta:
         ordering = ['order']
         # Unique constraint depends on whether it's in a page or group
@@ -409,6 +617,91 @@ class Question(models.Model):
         return self.name
 
 
+def copy_instance(instance, **overrides):
+    """Return an unsaved copy of ``instance`` with a new id.
+
+    Every concrete column is copied, including modeltranslation's per-language
+    columns; ``overrides`` replaces columns by attname (``page_id``, ...). For
+    translated fields an override only sets the active language's column.
+    """
+    model = type(instance)
+    now = timezone.now()
+    clone = model(**{
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+    })
+    clone.id = uuid.uuid4()
+    clone.created_datetime = now
+    clone.modified_datetime = now
+    for attname, value in overrides.items():
+        setattr(clone, attname, value)
+    return clone
+
+
+def form_page_sequences(form_id):
+    """Order sequence of a form's pages."""
+    return [(Page, {'form_id': form_id})]
+
+
+def page_item_sequences(page_id):
+    """Order sequence of a page's direct questions and groups, rendered interleaved."""
+    return [(Question, {'page_id': page_id}), (QuestionGroup, {'page_id': page_id})]
+
+
+def group_question_sequences(group_id):
+    """Order sequence of the questions in a group."""
+    return [(Question, {'question_group_id': group_id})]
+
+
+def page_tree_prefetches(prefix='', deferred=None):
+    """Prefetches that load every question and group below a Page queryset.
+
+    Use ``prefix='pages__'`` to prefetch the tree from a DynamicForm queryset.
+    Question types and group templates are joined in, so walking the tree
+    never issues further queries.
+
+    ``deferred`` maps models to the columns to leave unloaded, as reported
+    by a projected serializer; models it does not list are not prefetched.
+    """
+    def columns(model):
+        return deferred.get(model, ()) if deferred is not None else ()
+
+    def wanted(model):
+        return deferred is None or model in deferred
+
+    prefetches = []
+    if wanted(Question):
+        prefetches.append(Prefetch(
+            f'{prefix}questions',
+            queryset=Question.objects.select_related('type').defer(*columns(Question)).order_by('order')
+        ))
+    if wanted(QuestionGroup):
+        prefetches.append(Prefetch(
+            f'{prefix}question_groups',
+            queryset=QuestionGroup.objects.select_related('template').defer(*columns(QuestionGroup)).order_by('order')
+        ))
+        if wanted(Question):
+            prefetches.append(Prefetch(
+                f'{prefix}question_groups__questions',
+                queryset=Question.objects.select_related('type').defer(*columns(Question)).order_by('order')
+            ))
+    return prefetches
+
+
+def form_tree_prefetches(deferred=None):
+    """Prefetches that load a DynamicForm's full page/question/group tree.
+
+    ``deferred`` narrows the tree as in ``page_tree_prefetches``.
+    """
+    if deferred is not None and Page not in deferred:
+        return []
+    return [
+        Prefetch('pages', queryset=Page.objects.defer(*(deferred or {}).get(Page, ())).order_by('order')),
+        *page_tree_prefetches('pages__', deferred),
+    ]
+
+
 class FormSubmission(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     form_version = models.ForeignKey(FormVersion, on_delete=models.CASCADE, related_name='submissions')
@@ -421,12 +714,40 @@ class FormSubmission(models.Model):
     completed_datetime = models.DateTimeField(null=True, blank=True)
     created_datetime = models.DateTimeField(default=timezone.now)
     modified_datetime = models.DateTimeField(auto_now=True)
+    # Bumped on every write through save_if_unchanged(), for optimistic concurrency
+    revision = models.PositiveIntegerField(default=1)
 
     class Meta:
         verbose_name = "Form Submission"
         verbose_name_plural = "Form Submissions"
         ordering = ['-created_datetime']
+        # Match the submission list filters and its (created_datetime, id) keyset order
+        indexes = [
+            models.Index(fields=['-created_datetime', '-id'], name='submission_created_idx'),
+            models.Index(fields=['user_session_id', '-created_datetime', '-id'], name='submission_session_idx'),
+            models.Index(fields=['form_version', '-created_datetime', '-id'], name='submission_version_idx'),
+            models.Index(fields=['completed_datetime'], condition=models.Q(is_complete=True), name='submission_completed_idx'),
+        ]
 
     def __str__(self):
         status = "Complete" if self.is_complete else "In Progress"
-        return f"{self.form_version.form.name} v{self.form_version.version_number} - {status} ({self.created_datetime.strftime('%Y-%m-%d %H:%M')})"
\ No newline at end of file
+        return f"{self.form_version.form.name} v{self.form_version.version_number} - {status} ({self.created_datetime.strftime('%Y-%m-%d %H:%M')})"
+
+    def save_if_unchanged(self, update_fields):
+        """
+        Write ``update_fields`` only if the row is still at ``self.revision``.
+
+        A single conditional UPDATE, so concurrent writers never overwrite each
+        other and no row lock is held. On success the revision is bumped and
+        True returned; False means another write got there first.
+        """
+        now = timezone.now()
+        updated = FormSubmission.objects.filter(pk=self.pk, revision=self.revision).update(
+            revision=models.F('revision') + 1,
+            modified_datetime=now,
+            **{field: getattr(self, field) for field in update_fields}
+        )
+        if updated:
+            self.revision += 1
+            self.modified_datetime = now
+        return bool(updated)
\ No newline at end of file
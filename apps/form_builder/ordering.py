@@ -0,0 +1,241 @@
+"""
+Helpers for maintaining the ``order`` column of pages, questions and groups.
+
+``order`` is a rank key: it only has to sort items correctly and be unique
+among siblings, so keys are spaced ``ORDER_GAP`` apart and a moved item is
+given a key halfway between its new neighbours. APIs and form versions never
+expose rank keys directly; they report 1..n positions instead.
+
+A page's direct questions and its question groups share one sequence, since
+the builder renders them interleaved. Models describe the sequence they
+belong to with ``get_order_sequences()``, a list of ``(model, filters)``
+pairs; on equal keys, items of earlier pairs come first.
+"""
+from operator import itemgetter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+
+# Spacing between rank keys, leaving room to move items in between
+ORDER_GAP = 1024
+
+
+class ReorderError(ValueError):
+    """Raised when a reorder request does not describe a valid ordering."""
+
+
+def is_position(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
+
+def _parse_orders(model, orders):
+    """Validate ``[{'id': ..., 'order': ...}]`` and return ``{pk: order}``."""
+    if not isinstance(orders, list):
+        raise ReorderError('Orders must be a list of {"id", "order"} objects')
+
+    pk_field = model._meta.pk
+    new_orders = {}
+    for item in orders:
+        if not isinstance(item, dict) or 'id' not in item or 'order' not in item:
+            raise ReorderError('Each entry needs an "id" and an "order"')
+        try:
+            pk = pk_field.to_python(item['id'])
+        except ValidationError:
+            raise ReorderError(f'Invalid id: {item["id"]}')
+        order = item['order']
+        if not is_position(order):
+            raise ReorderError(f'Invalid order for {pk}: {order}')
+        if pk in new_orders:
+            raise ReorderError(f'Duplicate id: {pk}')
+        new_orders[pk] = order
+
+    if len(set(new_orders.values())) != len(new_orders):
+        raise ReorderError('Orders must be unique')
+    return new_orders
+
+
+def write_orders(model, current, new_orders):
+    """
+    Move rows from their ``current`` orders to ``new_orders`` ({pk: order}).
+
+    Changed rows are written with two bulk UPDATEs: first to temporary
+    negative orders so the unique constraint on order never sees a clash,
+    then to their final orders.
+    """
+    changed = [pk for pk, order in current.items() if order != new_orders[pk]]
+    if not changed:
+        return 0
+
+    # Park changed rows below every existing order
+    offset = max(abs(order) for order in current.values()) + 1
+    model.objects.bulk_update(
+        [model(pk=pk, order=-(offset + position)) for position, pk in enumerate(changed, start=1)],
+        ['order']
+    )
+
+    now = timezone.now()
+    model.objects.bulk_update(
+        [model(pk=pk, order=new_orders[pk], modified_datetime=now) for pk in changed],
+        ['order', 'modified_datetime']
+    )
+    return len(changed)
+
+
+def apply_orders(queryset, orders, sequences=None):
+    """
+    Apply ``orders`` to the sibling set ``queryset`` atomically.
+
+    ``orders`` are positions, as the API reports them: they must list every
+    sibling exactly once with distinct positive integers, so a reorder can
+    never leave duplicates or stray rows behind. Only their relative order
+    matters; keys are rewritten ``ORDER_GAP`` apart.
+
+    When the siblings share ``sequences`` with items of another model (a
+    page's questions and groups), they are rearranged among the places they
+    already hold, so the other items keep theirs.
+    """
+    model = queryset.model
+    positions = _parse_orders(model, orders)
+
+    with transaction.atomic():
+        current = dict(queryset.select_for_update().values_list('pk', 'order'))
+
+        unknown = set(positions) - set(current)
+        if unknown:
+            raise ReorderError(f'Unknown ids: {", ".join(sorted(str(pk) for pk in unknown))}')
+        missing = set(current) - set(positions)
+        if missing:
+            raise ReorderError(f'Missing ids: {", ".join(sorted(str(pk) for pk in missing))}')
+
+        ranked = sorted(current, key=positions.__getitem__)
+        if sequences is None:
+            sequences = [(model, None)]
+            items = [(current[pk], 0, model, pk) for pk in ranked]
+        else:
+            items = _load_sequence(sequences, lock=True)
+            siblings = {item[3]: item for item in items if item[2] is model}
+            reordered = iter(ranked)
+            items = [siblings[next(reordered)] if item[2] is model else item for item in items]
+        return _respace(sequences, items)
+
+
+def _load_sequence(sequences, lock=False):
+    """Return ``(order, index, model, pk)`` for every item, in position order."""
+    items = []
+    for index, (model, filters) in enumerate(sequences):
+        queryset = model.objects.filter(**filters)
+        if lock:
+            queryset = queryset.select_for_update()
+        items.extend((order, index, model, pk) for pk, order in queryset.values_list('pk', 'order'))
+    items.sort(key=itemgetter(0, 1))
+    return items
+
+
+def _respace(sequences, items):
+    """
+    Write keys ``ORDER_GAP`` apart to ``items`` (``(order, index, model, pk)``,
+    in their new position order); returns the number of rows written.
+    """
+    written = 0
+    for seq_index, (seq_model, _) in enumerate(sequences):
+        current_orders = {}
+        new_orders = {}
+        for rank, (order, item_index, _, pk) in enumerate(items, start=1):
+            if item_index == seq_index:
+                current_orders[pk] = order
+                new_orders[pk] = rank * ORDER_GAP
+        written += write_orders(seq_model, current_orders, new_orders)
+    return written
+
+
+def next_order(sequences):
+    """Return a rank key that places a new item after everything in ``sequences``."""
+    top = 0
+    for model, filters in sequences:
+        top = max(top, model.objects.filter(**filters).aggregate(top=Max('order'))['top'] or 0)
+    return top + ORDER_GAP
+
+
+def get_position(obj):
+    """Return the 1-based position of ``obj`` in its sequence."""
+    sequences = obj.get_order_sequences()
+    own_index = next(index for index, (model, _) in enumerate(sequences) if isinstance(obj, model))
+    position = 1
+    for index, (model, filters) in enumerate(sequences):
+        # Items of earlier sequences win ties on order
+        lookup = 'order__lte' if index < own_index else 'order__lt'
+        position += model.objects.filter(**filters, **{lookup: obj.order}).count()
+    return position
+
+
+def get_positions(objs):
+    """Return ``{pk: position}`` for ``objs``, loading each sequence once."""
+    loaded = {}
+    positions = {}
+    for obj in objs:
+        sequences = obj.get_order_sequences()
+        key = tuple((model, tuple(sorted(filters.items()))) for model, filters in sequences)
+        if key not in loaded:
+            loaded[key] = {
+                (model, pk): position
+                for position, (_, _, model, pk) in enumerate(_load_sequence(sequences), start=1)
+            }
+        positions[obj.pk] = loaded[key][(type(obj), obj.pk)]
+    return positions
+
+
+def assign_positions(*sequences):
+    """
+    Replace the rank keys of serialized items with their 1..n positions.
+
+    Each argument is a list of dicts with an ``order`` key; several lists are
+    numbered as one sequence, earlier lists first on equal keys. The dicts are
+    updated in place.
+    """
+    items = [
+        (item['order'], index, item)
+        for index, sequence in enumerate(sequences)
+        for item in sequence
+    ]
+    items.sort(key=itemgetter(0, 1))
+    for position, (_, _, item) in enumerate(items, start=1):
+        item['order'] = position
+
+
+def move_to_position(obj, position):
+    """
+    Move ``obj`` to the 1-based ``position`` in its sequence.
+
+    Positions past the end move the item last. Normally only ``obj`` is
+    written, with a rank key halfway between its new neighbours; if the
+    neighbours' keys are adjacent the sequence is first spread ``ORDER_GAP``
+    apart, so moves cost O(1) row writes amortised.
+    """
+    if not is_position(position):
+        raise ReorderError(f'Invalid position: {position}')
+
+    model = type(obj)
+    sequences = obj.get_order_sequences()
+    with transaction.atomic():
+        items = _load_sequence(sequences, lock=True)
+        current = next((item for item in items if item[2] is model and item[3] == obj.pk), None)
+        if current is None:
+            raise ReorderError(f'Unknown id: {obj.pk}')
+        items.remove(current)
+
+        index = min(position, len(items) + 1) - 1
+        before = items[index - 1][0] if index > 0 else 0
+        after = items[index][0] if index < len(items) else before + 2 * ORDER_GAP
+
+        if after - before > 1:
+            obj.order = (before + after) // 2
+            model.objects.filter(pk=obj.pk).update(order=obj.order, modified_datetime=timezone.now())
+            return obj
+
+        items.insert(index, current)
+        _respace(sequences, items)
+        obj.order = (index + 1) * ORDER_GAP
+    return obj
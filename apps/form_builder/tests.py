@@ -1,12 +1,20 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
+from io import StringIO
+from unittest import skipUnless
 from unittest.mock import patch
 import json
 
+from .answers import RevisionConflict, _apply_in_database, _merge_sql, apply_answer_patch
 from .models import (
-    DynamicForm, FormVersion, Page, Question, QuestionType, FormSubmission
+    DynamicForm, FormVersion, Page, Question, QuestionType, FormSubmission,
+    QuestionGroup, QuestionGroupTemplate, PublishError
 )
 from .factories import (
     DynamicFormFactory, FormVersionFactory, PageFactory, QuestionFactory,
@@ -115,6 +123,39 @@ class DynamicFormModelTests(TestCase):
         self.assertEqual(data['pages'][0]['questions'][0]['order'], 1)
         self.assertEqual(data['pages'][0]['questions'][1]['order'], 2)
     
+    def _build_form_tree(self, form, page_count, questions_per_page, template):
+        question_type = QuestionTypeFactory()
+        for p in range(1, page_count + 1):
+            page = PageFactory(form=form, order=p)
+            for q in range(1, questions_per_page + 1):
+                QuestionFactory(page=page, type=question_type, order=q)
+            group = QuestionGroup.objects.create(
+                page=page, template=template, name=f"Group {p}", slug=f"group-{p}", order=1
+            )
+            for q in range(1, questions_per_page + 1):
+                QuestionFactory(page=None, question_group=group, type=question_type, order=q)
+    
+    def test_create_version_query_count_independent_of_form_size(self):
+        """Test snapshotting uses a constant number of queries"""
+        template = QuestionGroupTemplate.objects.create(name="Address", display_type='address')
+        small_form = DynamicFormFactory()
+        large_form = DynamicFormFactory()
+        self._build_form_tree(small_form, page_count=1, questions_per_page=1, template=template)
+        self._build_form_tree(large_form, page_count=6, questions_per_page=4, template=template)
+        
+        with CaptureQueriesContext(connection) as small_queries:
+            small_form.create_version()
+        with CaptureQueriesContext(connection) as large_queries:
+            version = large_form.create_version()
+        
+        self.assertEqual(len(small_queries), len(large_queries))
+        data = version.serialized_form_data
+        self.assertEqual(len(data['pages']), 6)
+        self.assertEqual(len(data['pages'][0]['questions']), 4)
+        group_data = data['pages'][0]['question_groups'][0]
+        self.assertEqual(group_data['template_slug'], 'address')
+        self.assertEqual([q['order'] for q in group_data['questions']], [1, 2, 3, 4])
+    
     def test_string_representation(self):
         """Test model string representation"""
         form = DynamicFormFactory(name="Test Form")
@@ -157,6 +198,92 @@ class FormVersionModelTests(TestCase):
         
         versions = list(form.versions.all())
         self.assertEqual(versions, [v3, v2, v1])
+    
+    def test_encoded_bodies_rendered_on_save(self):
+        """Test versions store pre-encoded JSON and gzip bodies"""
+        import gzip
+        version = FormVersionFactory(serialized_form_data={'name': 'Caf\u00e9', 'pages': []})
+        version.refresh_from_db()
+        
+        bodies = version.get_encoded_bodies()
+        self.assertEqual(bodies['identity'], '{"name":"Caf\u00e9","pages":[]}'.encode('utf-8'))
+        self.assertEqual(gzip.decompress(bodies['gzip']), bodies['identity'])
+    
+    def test_encoded_bodies_not_recomputed_for_other_fields(self):
+        """Test saving only is_published leaves the stored bodies alone"""
+        version = FormVersionFactory(is_published=False)
+        with patch.object(FormVersion, 'render_encoded_bodies') as render:
+            version.is_published = True
+            version.save(update_fields=['is_published'])
+        render.assert_not_called()
+
+    def test_dependency_graph_computed_on_save(self):
+        """Test dependents, evaluation order and cycles of conditional logic"""
+        def depends_on(*slugs):
+            return {'rules': [{
+                'conditions': [{'question_slug': slug, 'operator': 'is_empty'} for slug in slugs],
+                'actions': [{'type': 'hide'}]
+            }]}
+
+        version = FormVersionFactory(serialized_form_data={'pages': [
+            {'slug': 'one', 'order': 1, 'questions': [
+                {'slug': 'c', 'order': 1, 'conditional_logic': depends_on('b')},
+                {'slug': 'b', 'order': 2, 'disabled_condition': {'field': 'a', 'operator': 'is_empty'}},
+                {'slug': 'a', 'order': 3},
+                {'slug': 'x', 'order': 4, 'conditional_logic': depends_on('y')},
+                {'slug': 'y', 'order': 5, 'conditional_logic': depends_on('x', 'y')},
+            ]},
+            {'slug': 'two', 'order': 2, 'tag_display_condition': {'field': 'c', 'operator': 'is_empty'}, 'questions': []}
+        ]})
+        version.refresh_from_db()
+
+        graph = version.dependency_graph
+        self.assertEqual(graph['dependents']['a'], ['b'])
+        self.assertEqual(graph['page_dependents'], {'c': ['two']})
+        self.assertEqual(graph['order'], ['a', 'b', 'c', 'x', 'y'])
+        self.assertEqual(graph['cycles'], [['x', 'y']])
+
+        with self.assertRaises(PublishError):
+            version.publish()
+
+    def test_admin_publish_action(self):
+        """Test the admin publishes versions through publish() and reports the ones it refuses"""
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin_user)
+        valid = FormVersionFactory(is_published=False, serialized_form_data={'pages': []})
+        cyclic = FormVersionFactory(is_published=False, serialized_form_data={'pages': [{'slug': 'one', 'order': 1, 'questions': [
+            {'slug': 'x', 'order': 1, 'disabled_condition': {'field': 'x', 'operator': 'is_empty'}},
+        ]}]})
+
+        response = self.client.post(reverse('admin:form_builder_formversion_changelist'), {
+            'action': 'publish_versions', '_selected_action': [valid.pk, cyclic.pk]
+        }, follow=True)
+
+        valid.refresh_from_db()
+        cyclic.refresh_from_db()
+        self.assertTrue(valid.is_published)
+        self.assertIsNotNone(valid.published_datetime)
+        self.assertFalse(cyclic.is_published)
+        sent = [str(message) for message in response.context['messages']]
+        self.assertIn('Published 1 version(s).', sent)
+        self.assertTrue(any('circular' in message and '(x)' in message for message in sent))
+
+    def test_summary_counts_computed_on_save(self):
+        """Test body size and page/question counts follow serialized_form_data"""
+        version = FormVersionFactory(serialized_form_data={'pages': [
+            {'slug': 'one', 'order': 1, 'questions': [{'slug': 'a', 'order': 1}], 'question_groups': [
+                {'order': 2, 'questions': [{'slug': 'b', 'order': 1}, {'slug': 'c', 'order': 2}]}
+            ]},
+            {'slug': 'two', 'order': 2, 'questions': []}
+        ]})
+
+        self.assertEqual((version.page_count, version.question_count), (2, 3))
+        self.assertEqual(version.body_size, len(version.get_encoded_bodies()['identity']))
+
+        version.serialized_form_data = {'pages': []}
+        version.save(update_fields=['serialized_form_data'])
+        version.refresh_from_db()
+        self.assertEqual((version.page_count, version.question_count, version.body_size), (0, 0, len(b'{"pages":[]}')))
 
 
 class PageModelTests(TestCase):
@@ -327,6 +454,47 @@ class FormSubmissionModelTests(TestCase):
         self.assertIsNotNone(complete_submission.completed_datetime)
 
 
+class AnswerPatchTests(TestCase):
+
+    def setUp(self):
+        self.submission = FormSubmissionFactory(
+            answers={'name': 'Jane', 'phone': '555', 'home': {'city': 'Oslo', 'zip': '0150'}}, revision=1
+        )
+        self.patch = ({'name': 'John'}, ['phone'], {'home': {'zip': None, 'street': 'Main'}, 'pet': {'kind': 'cat'}})
+        self.expected = {'name': 'John', 'home': {'city': 'Oslo', 'street': 'Main'}, 'pet': {'kind': 'cat'}}
+
+    def test_apply_answer_patch(self):
+        """Test a split patch is applied and bumps the revision"""
+        modified, revision = apply_answer_patch(self.submission.pk, *self.patch)
+
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answers, self.expected)
+        self.assertEqual(revision, 2)
+        self.assertEqual(self.submission.modified_datetime, modified)
+        with self.assertRaises(RevisionConflict):
+            apply_answer_patch(self.submission.pk, {'name': 'Jim'}, [], expected_revision=1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Answers are only merged in SQL on PostgreSQL')
+    def test_apply_in_database(self):
+        """Test the jsonb UPDATE merges like the Python fallback"""
+        sql, params = _merge_sql('"answers"', [], *self.patch)
+        self.assertEqual(sql.count('jsonb_set'), 2)
+        self.assertIn(json.dumps({'name': 'John'}), params)
+
+        modified, revision = _apply_in_database(self.submission.pk, *self.patch, expected_revision=1)
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answers, self.expected)
+        self.assertEqual((self.submission.modified_datetime, self.submission.revision), (modified, revision))
+
+        with self.assertRaises(RevisionConflict):
+            _apply_in_database(self.submission.pk, {'name': 'Jim'}, [], {}, expected_revision=1)
+        FormSubmission.objects.filter(pk=self.submission.pk).update(answers=['not', 'an', 'object'])
+        _apply_in_database(self.submission.pk, {'name': 'Jim'}, [], {}, None)
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answers, {'name': 'Jim'})
+        self.assertIsNone(_apply_in_database(FormSubmission().pk, {}, [], {}, None))
+
+
 class ModelIntegrationTests(TestCase):
     
     def test_full_form_structure_creation(self):
@@ -400,3 +568,31 @@ class ModelIntegrationTests(TestCase):
         self.assertFalse(Question.objects.filter(id=question_id).exists())
         self.assertFalse(FormVersion.objects.filter(id=version_id).exists())
         self.assertFalse(FormSubmission.objects.filter(id=submission_id).exists())
+
+
+class SubmissionIndexTests(TestCase):
+    
+    def test_answers_index_command_needs_postgresql(self):
+        """Test the GIN index command leaves other databases alone"""
+        if connection.vendor == 'postgresql':
+            self.skipTest('CREATE INDEX CONCURRENTLY cannot run inside a test transaction')
+        out = StringIO()
+        call_command('submission_answers_index', stdout=out)
+        self.assertIn('needs PostgreSQL', out.getvalue())
+
+    def test_benchmark_shows_index_plans(self):
+        """Test the benchmark command reports plans with and without the submission indexes"""
+        out = StringIO()
+        call_command('benchmark_submission_queries', '--compare', '--seed', '50', '--repeat', '1', stdout=out)
+        
+        with_indexes, without_indexes = out.getvalue().split('== without indexes ==')
+        for name in ['submission_created_idx', 'submission_session_idx', 'submission_version_idx', 'submission_completed_idx']:
+            self.assertIn(name, with_indexes)
+            self.assertNotIn(name, without_indexes)
+        # Seeded rows and dropped indexes are rolled back
+        self.assertEqual(FormSubmission.objects.count(), 0)
+        with connection.cursor() as cursor:
+            self.assertIn(
+                'submission_session_idx',
+                connection.introspection.get_constraints(cursor, FormSubmission._meta.db_table)
+            )
@@ -0,0 +1,27 @@
+"""
+Walking the page/group/question tree of a form version's ``serialized_form_data``.
+"""
+from operator import itemgetter
+
+# Flat answer keys (``<slug>__<field>``) the client stores for address questions
+ADDRESS_FIELDS = ('street', 'city', 'state', 'postal_code', 'country')
+
+
+def iter_questions(serialized_form_data):
+    """Yield every question of a form version, grouped ones included, in display order."""
+    for page in sorted(serialized_form_data.get('pages', []), key=itemgetter('order')):
+        # Direct questions and groups share positions; questions come first on ties
+        items = [(question['order'], 0, question) for question in page.get('questions', [])]
+        items += [(group['order'], 1, group) for group in page.get('question_groups', [])]
+        for _, is_group, item in sorted(items, key=itemgetter(0, 1)):
+            if is_group:
+                yield from sorted(item.get('questions', []), key=itemgetter('order'))
+            else:
+                yield item
+
+
+def answer_keys(slug, type_config):
+    """Keys a question's answer is stored under; address questions use one flat key per field."""
+    if (type_config or {}).get('input_type') == 'address':
+        return tuple(f'{slug}__{field}' for field in ADDRESS_FIELDS)
+    return (slug,)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FormBuilderApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.form_builder_api"
+
+    def ready(self):
+        from . import autosave, signals  # noqa: F401
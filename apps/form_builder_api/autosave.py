@@ -0,0 +1,423 @@
+"""
+Write-behind buffer for submission autosaves.
+
+Autosave sends far more answer patches than there are completions. With the
+buffer enabled, flat answer patches (set/unset operations, or merge patches
+without nested objects) are not written straight away: they are coalesced
+per submission and flushed in batches with ``bulk_update``, either every
+``FLUSH_INTERVAL`` seconds by a background thread or as soon as
+``MAX_PENDING`` submissions are waiting. Anything that needs the stored
+answers (reading or updating a submission, conditional patches and
+``complete``) flushes that submission synchronously first, and a
+submission is not completed while patches for it are still pending.
+Patches for completed submissions are written straight away, and pending
+ones that find their submission completed by the time they are flushed
+are dropped.
+
+Two stores are available:
+
+* ``'django'`` (the default) keeps pending changes in the Django cache named
+  by ``CACHE_ALIAS``. With a cache shared by all workers (e.g. Redis), they
+  survive worker restarts and any worker, or the ``flush_autosaves``
+  command, can flush or see them.
+* ``'local'`` keeps them in the worker process. They are flushed when the
+  process exits normally, so only a crash can lose up to one interval of
+  autosaves, but other workers cannot see them: a submission could be
+  read or completed without them. Only use it with a single worker process.
+
+A system check warns when the buffer is enabled without a shared store.
+
+Configure via the ``FORMATIC_AUTOSAVE_BUFFER`` setting. ``metrics()`` reports
+queue depth and flush latency, also served at ``/submissions/autosave-metrics/``.
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.form_builder.answers import patched_answers
+from apps.form_builder.models import FormSubmission
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUTOSAVE_SETTINGS = {
+    'ENABLED': False,
+    'BACKEND': 'django',  # 'django' or 'local' (single worker process only)
+    'CACHE_ALIAS': 'default',
+    'FLUSH_INTERVAL': 2.0,  # seconds; 0 disables the background flush
+    'MAX_PENDING': 500,  # flush once this many submissions are waiting
+    'KEY_PREFIX': 'formatic:autosave',
+    'LOCK_TIMEOUT': 10,
+}
+
+# Cache backends whose entries are not shared between processes
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def coalesce(entry, sets, removes):
+    """Fold a newer ``(sets, removes)`` patch into a pending entry."""
+    pending_sets, pending_removes = entry['sets'], entry['removes']
+    for key in sets:
+        if key in pending_removes:
+            pending_removes.remove(key)
+    pending_sets.update(sets)
+    for key in removes:
+        pending_sets.pop(key, None)
+        if key not in pending_removes:
+            pending_removes.append(key)
+    entry['seq'] += 1
+    return entry
+
+
+def _store_key(submission_id):
+    """Canonical string form of a submission id, or None if it is not a UUID."""
+    try:
+        return str(uuid.UUID(str(submission_id)))
+    except ValueError:
+        return None
+
+
+def new_entry():
+    return {'sets': {}, 'removes': [], 'queued_at': time.time(), 'seq': 0}
+
+
+class LocalAutosaveStore:
+    """Pending patches held in this process."""
+
+    def __init__(self, options):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def add(self, submission_id, sets, removes):
+        """Queue a patch; returns the number of submissions waiting."""
+        with self._lock:
+            coalesce(self._pending.setdefault(submission_id, new_entry()), sets, removes)
+            return len(self._pending)
+
+    def pending(self, submission_ids=None):
+        """Return copies of the pending entries, for all or the given submissions."""
+        with self._lock:
+            ids = list(self._pending) if submission_ids is None else submission_ids
+            return {
+                submission_id: {**entry, 'sets': dict(entry['sets']), 'removes': list(entry['removes'])}
+                for submission_id, entry in ((i, self._pending.get(i)) for i in ids) if entry is not None
+            }
+
+    def discard(self, written):
+        """Remove written entries, keeping any that were patched again since ``pending``."""
+        with self._lock:
+            for submission_id, entry in written.items():
+                current = self._pending.get(submission_id)
+                if current is not None and current['seq'] == entry['seq']:
+                    del self._pending[submission_id]
+
+    def has_pending(self, submission_id):
+        with self._lock:
+            return submission_id in self._pending
+
+    def oldest(self):
+        with self._lock:
+            return min((entry['queued_at'] for entry in self._pending.values()), default=None)
+
+    def __len__(self):
+        return len(self._pending)
+
+
+class SharedAutosaveStore:
+    """
+    Pending patches held in a Django cache, shared by all workers.
+
+    Entries never expire. Locks taken with ``cache.add`` (atomic on Redis
+    and Memcached) guard each submission's entry, and the index of pending
+    ids while it changes. Reads and flushes of a submission with nothing
+    pending take no lock.
+    """
+
+    def __init__(self, options):
+        self.cache = caches[options['CACHE_ALIAS']]
+        self.prefix = options['KEY_PREFIX']
+        self.lock_timeout = options['LOCK_TIMEOUT']
+
+    def _entry_key(self, submission_id):
+        return f'{self.prefix}:pending:{submission_id}'
+
+    @property
+    def _index_key(self):
+        return f'{self.prefix}:index'
+
+    @contextmanager
+    def _locked(self, name):
+        lock_key = f'{self.prefix}:lock:{name}'
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.cache.add(lock_key, token, self.lock_timeout):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'Timed out waiting for the autosave buffer lock {name!r}')
+            time.sleep(0.005)
+        try:
+            yield
+        finally:
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+    def _index(self):
+        return self.cache.get(self._index_key) or {}
+
+    def add(self, submission_id, sets, removes):
+        # Lock order everywhere: submission locks (sorted), then the index lock
+        with self._locked(submission_id):
+            entry = self.cache.get(self._entry_key(submission_id))
+            is_new = entry is None
+            entry = coalesce(entry or new_entry(), sets, removes)
+            self.cache.set(self._entry_key(submission_id), entry, None)
+            if not is_new:
+                return len(self._index())
+            with self._locked('index'):
+                index = self._index()
+                index.setdefault(submission_id, entry['queued_at'])
+                self.cache.set(self._index_key, index, None)
+                return len(index)
+
+    def pending(self, submission_ids=None):
+        index = self._index()
+        ids = list(index) if submission_ids is None else [i for i in submission_ids if i in index]
+        if not ids:
+            return {}
+        keys = {self._entry_key(submission_id): submission_id for submission_id in ids}
+        return {keys[key]: entry for key, entry in self.cache.get_many(list(keys)).items()}
+
+    def discard(self, written):
+        with ExitStack() as stack:
+            for submission_id in sorted(written):
+                stack.enter_context(self._locked(submission_id))
+            keys = {self._entry_key(submission_id): submission_id for submission_id in written}
+            current = self.cache.get_many(list(keys))
+            done = [
+                keys[key] for key, entry in current.items()
+                if entry['seq'] == written[keys[key]]['seq']
+            ]
+            if not done:
+                return
+            self.cache.delete_many([self._entry_key(submission_id) for submission_id in done])
+            with self._locked('index'):
+                index = self._index()
+                for submission_id in done:
+                    index.pop(submission_id, None)
+                self.cache.set(self._index_key, index, None)
+
+    def has_pending(self, submission_id):
+        return submission_id in self._index()
+
+    def oldest(self):
+        return min(self._index().values(), default=None)
+
+    def __len__(self):
+        return len(self._index())
+
+
+class AutosaveBuffer:
+    """Coalesces answer patches and writes them in batches."""
+
+    def __init__(self, options=None):
+        self.options = {**DEFAULT_AUTOSAVE_SETTINGS, **(options or {})}
+        self.enabled = bool(self.options['ENABLED'])
+        if self.options['BACKEND'] == 'django':
+            self.store = SharedAutosaveStore(self.options)
+        else:
+            self.store = LocalAutosaveStore(self.options)
+        self.stats = {
+            'flushes': 0,
+            'flushed_submissions': 0,
+            'last_flush_ms': None,
+            'max_flush_ms': None,
+            'last_write_delay_ms': None,
+            'max_write_delay_ms': None,
+        }
+        self._stats_lock = threading.Lock()
+        self._flusher = None
+        self._flusher_lock = threading.Lock()
+
+    def add(self, submission_id, sets, removes):
+        """Queue a flat answer patch for ``submission_id``; returns the queue depth."""
+        depth = self.store.add(_store_key(submission_id), sets, removes)
+        self._start_flusher()
+        if depth >= self.options['MAX_PENDING']:
+            self.flush()
+        return depth
+
+    def flush(self, submission_ids=None):
+        """
+        Write pending patches, for all or only the given submissions.
+
+        Returns the number of submissions written. Entries leave the store
+        only after their write committed, so a failed write or a crashed
+        worker leaves them for the next flush. Re-applying an entry that was
+        written but not yet discarded is harmless: patches only set and
+        remove keys.
+        """
+        if submission_ids is not None:
+            submission_ids = [
+                key for key in map(_store_key, submission_ids) if key is not None
+            ]
+        if not len(self.store):
+            return 0
+        pending = self.store.pending(submission_ids)
+        if not pending:
+            return 0
+
+        start = time.perf_counter()
+        written = self._write(pending)
+        self.store.discard(pending)
+        flushed_at = time.time()
+        self._record(
+            (time.perf_counter() - start) * 1000,
+            (flushed_at - min(entry['queued_at'] for entry in pending.values())) * 1000,
+            written
+        )
+        return written
+
+    def has_pending(self, submission_id):
+        """Whether patches for ``submission_id`` are waiting to be written."""
+        key = _store_key(submission_id)
+        return key is not None and self.store.has_pending(key)
+
+    def _write(self, pending):
+        now = timezone.now()
+        with transaction.atomic():
+            # Locking the batch keeps concurrent conditional writes from being overwritten
+            submissions = (
+                FormSubmission.objects
+                .select_for_update()
+                .only('id', 'answers', 'revision', 'is_complete')
+                .in_bulk(list(pending))
+            )
+            # Completed submissions were validated without these answers
+            completed = [pk for pk, submission in submissions.items() if submission.is_complete]
+            if completed:
+                logger.warning('Dropping buffered autosaves for completed submissions %s', completed)
+                for pk in completed:
+                    del submissions[pk]
+            for submission in submissions.values():
+                entry = pending[str(submission.pk)]
+                submission.answers = patched_answers(submission.answers, entry['sets'], entry['removes'])
+                submission.revision += 1
+                submission.modified_datetime = now
+            FormSubmission.objects.bulk_update(
+                list(submissions.values()), ['answers', 'revision', 'modified_datetime']
+            )
+        return len(submissions)
+
+    def _record(self, duration_ms, delay_ms, written):
+        with self._stats_lock:
+            stats = self.stats
+            stats['flushes'] += 1
+            stats['flushed_submissions'] += written
+            stats['last_flush_ms'] = round(duration_ms, 3)
+            stats['max_flush_ms'] = round(max(duration_ms, stats['max_flush_ms'] or 0), 3)
+            stats['last_write_delay_ms'] = round(delay_ms, 3)
+            stats['max_write_delay_ms'] = round(max(delay_ms, stats['max_write_delay_ms'] or 0), 3)
+
+    def metrics(self):
+        """Queue depth plus this process's flush counters and latencies."""
+        oldest = self.store.oldest()
+        with self._stats_lock:
+            return {
+                'enabled': self.enabled,
+                'backend': self.options['BACKEND'],
+                'queue_depth': len(self.store),
+                'oldest_pending_ms': None if oldest is None else round((time.time() - oldest) * 1000, 3),
+                **self.stats,
+            }
+
+    def _start_flusher(self):
+        interval = self.options['FLUSH_INTERVAL']
+        if not interval or self._flusher is not None:
+            return
+        with self._flusher_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically, args=(interval,),
+                    name='autosave-flusher', daemon=True
+                )
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def _flush_periodically(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Autosave flush failed; pending answers stay queued')
+            finally:
+                close_old_connections()
+
+
+_autosave_buffer = None
+
+
+def get_autosave_buffer():
+    """Return the process-wide autosave buffer."""
+    global _autosave_buffer
+    if _autosave_buffer is None:
+        _autosave_buffer = AutosaveBuffer(getattr(settings, 'FORMATIC_AUTOSAVE_BUFFER', None))
+    return _autosave_buffer
+
+
+def flush_autosaves(*submission_ids):
+    """Write buffered patches of ``submission_ids`` before they are read or updated; returns the count."""
+    buffer = get_autosave_buffer()
+    if not buffer.enabled:
+        return 0
+    return buffer.flush(submission_ids)
+
+
+def autosaves_pending(submission_id):
+    """Whether ``submission_id`` still has buffered patches, e.g. queued since its last flush."""
+    buffer = get_autosave_buffer()
+    return buffer.enabled and buffer.has_pending(submission_id)
+
+
+@checks.register()
+def check_autosave_store(app_configs, **kwargs):
+    """Warn when buffered autosaves are only visible to the process that queued them."""
+    options = {**DEFAULT_AUTOSAVE_SETTINGS, **(getattr(settings, 'FORMATIC_AUTOSAVE_BUFFER', None) or {})}
+    if not options['ENABLED']:
+        return []
+    if options['BACKEND'] != 'django':
+        reason = "BACKEND is 'local'"
+    else:
+        cache_backend = settings.CACHES.get(options['CACHE_ALIAS'], {}).get('BACKEND')
+        if cache_backend not in PROCESS_LOCAL_CACHES:
+            return []
+        reason = f"the {options['CACHE_ALIAS']!r} cache uses {cache_backend}"
+    return [checks.Warning(
+        f'The autosave buffer keeps pending answers per process because {reason}.',
+        hint=(
+            "With more than one worker process, submissions can be read or completed without "
+            "autosaves buffered by another worker. Use BACKEND 'django' with a shared cache "
+            "such as Redis, or disable FORMATIC_AUTOSAVE_BUFFER."
+        ),
+        id='form_builder_api.W001',
+    )]
+
+
+@receiver(setting_changed)
+def reset_autosave_buffer(*, setting, **kwargs):
+    global _autosave_buffer
+    if setting == 'FORMATIC_AUTOSAVE_BUFFER':
+        _autosave_buffer = None
@@ -0,0 +1,295 @@
+"""
+Batch writes of a form's page/question/group structure for the builder.
+
+``apply_batch(form, operations)`` applies a list of operations in one
+transaction. The form's existing structure is loaded once, the operations
+are planned in memory, and the result is written with bulk statements per
+model instead of one request (and several queries) per item.
+
+Operations::
+
+    {"op": "create", "type": "page", "ref": "intro", "data": {...}, "position": 1}
+    {"op": "create", "type": "group", "page": "intro", "data": {...}}
+    {"op": "create", "type": "question", "page": "intro", "data": {"type_slug": "short-text", ...}}
+    {"op": "create", "type": "question", "group": "<group id or ref>", "data": {...}}
+    {"op": "update", "type": "question", "id": "<id or ref>", "data": {...}}
+    {"op": "delete", "type": "page", "id": "<id or ref>"}
+    {"op": "move", "type": "group", "id": "<id or ref>", "position": 2}
+
+``ref`` names an item created earlier in the batch so later operations can
+refer to it. Positions are 1-based, as reported by the API; created items
+without a position are appended. ``data`` is validated by the same
+serializers as the single-item endpoints.
+"""
+import uuid
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from apps.form_builder.models import Page, Question, QuestionGroup, QuestionType
+from apps.form_builder.ordering import ORDER_GAP, is_position, write_orders
+from .serializers import (
+    CreatePageSerializer, UpdatePageSerializer, CreateQuestionSerializer, UpdateQuestionSerializer,
+    CreateQuestionGroupSerializer, UpdateQuestionGroupSerializer
+)
+
+
+MODELS = {'page': Page, 'group': QuestionGroup, 'question': Question}
+CREATE_SERIALIZERS = {
+    'page': CreatePageSerializer,
+    'group': CreateQuestionGroupSerializer,
+    'question': CreateQuestionSerializer,
+}
+UPDATE_SERIALIZERS = {
+    'page': UpdatePageSerializer,
+    'group': UpdateQuestionGroupSerializer,
+    'question': UpdateQuestionSerializer,
+}
+OPERATIONS = ('create', 'update', 'delete', 'move')
+
+
+class BatchError(ValueError):
+    """Raised when a batch operation cannot be applied; nothing is written."""
+
+    def __init__(self, message, index=None, details=None):
+        super().__init__(message)
+        self.index = index
+        self.details = details
+
+
+class _Node:
+    """An existing or pending item of the form tree."""
+
+    def __init__(self, kind, pk, parent, order, is_new=False, instance=None):
+        self.kind = kind
+        self.pk = pk
+        self.parent = parent
+        self.order = order
+        self.original_order = None if is_new else order
+        self.is_new = is_new
+        self.instance = instance
+        self.changed = set()
+
+
+class BatchPlan:
+    """In-memory model of a form tree that batch operations are applied to."""
+
+    def __init__(self, form, operations):
+        if not isinstance(operations, list):
+            raise BatchError('operations must be a list')
+        self.form = form
+        self.operations = operations
+        self.nodes = {}
+        self.sequences = defaultdict(list)
+        self.refs = {}
+        self.deleted = defaultdict(set)
+        self._load()
+
+    def _load(self):
+        """
+        Load orders and parents of the whole tree in three queries.
+
+        Rows are locked until the batch is written, so this has to run in a
+        transaction.
+        """
+        items = defaultdict(list)
+        pages = Page.objects.select_for_update().filter(form=self.form)
+        for pk, order in pages.values_list('pk', 'order'):
+            items[('form', self.form.pk)].append((order, 0, 'page', pk))
+        questions = Question.objects.select_for_update(of=('self',)).filter(
+            Q(page__form=self.form) | Q(question_group__page__form=self.form)
+        ).values_list('pk', 'page_id', 'question_group_id', 'order')
+        for pk, page_id, group_id, order in questions:
+            parent = ('group', group_id) if group_id else ('page', page_id)
+            items[parent].append((order, 0, 'question', pk))
+        groups = QuestionGroup.objects.select_for_update(of=('self',)).filter(page__form=self.form)
+        for pk, page_id, order in groups.values_list('pk', 'page_id', 'order'):
+            items[('page', page_id)].append((order, 1, 'group', pk))
+
+        for parent, entries in items.items():
+            entries.sort(key=lambda entry: entry[:2])
+            for order, _, kind, pk in entries:
+                self.nodes[pk] = _Node(kind, pk, parent, order)
+                self.sequences[parent].append(pk)
+
+        self.types = {
+            question_type.slug: question_type
+            for question_type in QuestionType.objects.filter(slug__in={
+                op['data']['type_slug'] for op in self.operations
+                if isinstance(op, dict) and isinstance(op.get('data'), dict) and op['data'].get('type_slug')
+            })
+        }
+
+        # Items updated by the batch are loaded in full, one query per model
+        to_load = defaultdict(set)
+        for op in self.operations:
+            if isinstance(op, dict) and op.get('op') == 'update':
+                node = self.nodes.get(self._parse_pk(op.get('id')))
+                if node is not None:
+                    to_load[node.kind].add(node.pk)
+        for kind, pks in to_load.items():
+            for pk, instance in MODELS[kind].objects.in_bulk(pks).items():
+                self.nodes[pk].instance = instance
+
+    def _parse_pk(self, value):
+        if isinstance(value, str) and value in self.refs:
+            return self.refs[value]
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            return None
+
+    def _resolve(self, value, kind):
+        node = self.nodes.get(self._parse_pk(value))
+        if node is None or node.kind != kind:
+            raise BatchError(f'Unknown {kind}: {value}')
+        return node
+
+    def _place(self, node, position):
+        """Insert ``node`` at ``position`` (or last), giving it a free rank key."""
+        if position is not None and not is_position(position):
+            raise BatchError(f'Invalid position: {position}')
+        sequence = self.sequences[node.parent]
+        if node.pk in sequence:
+            sequence.remove(node.pk)
+        index = len(sequence) if position is None else min(position, len(sequence) + 1) - 1
+
+        before = self.nodes[sequence[index - 1]].order if index > 0 else 0
+        after = self.nodes[sequence[index]].order if index < len(sequence) else before + 2 * ORDER_GAP
+        sequence.insert(index, node.pk)
+        if after - before > 1:
+            node.order = (before + after) // 2
+        else:
+            for rank, pk in enumerate(sequence, start=1):
+                self.nodes[pk].order = rank * ORDER_GAP
+
+    def _discard(self, pk):
+        node = self.nodes.pop(pk)
+        for child_pk in self.sequences.pop((node.kind, pk), []):
+            self._discard(child_pk)
+
+    def _validate(self, serializer):
+        if not serializer.is_valid():
+            raise BatchError('Invalid data', details=serializer.errors)
+        return dict(serializer.validated_data)
+
+    def create(self, kind, op):
+        data = self._validate(CREATE_SERIALIZERS[kind](data=op.get('data', {})))
+        if kind == 'page':
+            parent, links = ('form', self.form.pk), {'form_id': self.form.pk}
+        elif kind == 'group' or op.get('group') is None:
+            page = self._resolve(op.get('page'), 'page')
+            parent, links = ('page', page.pk), {'page_id': page.pk}
+        else:
+            group = self._resolve(op.get('group'), 'group')
+            parent, links = ('group', group.pk), {'question_group_id': group.pk}
+
+        if kind == 'question':
+            type_slug = data.pop('type_slug')
+            if type_slug not in self.types:
+                raise BatchError(f'Unknown question type: {type_slug}')
+            links['type'] = self.types[type_slug]
+
+        instance = MODELS[kind](pk=uuid.uuid4(), order=0, **links, **data)
+        if not instance.slug:
+            instance.slug = slugify(instance.name)
+
+        ref = op.get('ref')
+        if ref is not None:
+            if ref in self.refs:
+                raise BatchError(f'Duplicate ref: {ref}')
+            self.refs[ref] = instance.pk
+
+        node = _Node(kind, instance.pk, parent, None, is_new=True, instance=instance)
+        self.nodes[node.pk] = node
+        self._place(node, op.get('position'))
+
+    def update(self, kind, op):
+        node = self._resolve(op.get('id'), kind)
+        instance = node.instance
+        data = self._validate(UPDATE_SERIALIZERS[kind](instance, data=op.get('data', {}), partial=True))
+        for field, value in data.items():
+            setattr(instance, field, value)
+        if not instance.slug:
+            instance.slug = slugify(instance.name)
+            data['slug'] = instance.slug
+        node.changed.update(data)
+
+    def delete(self, kind, op):
+        node = self._resolve(op.get('id'), kind)
+        self.sequences[node.parent].remove(node.pk)
+        self._discard(node.pk)
+        if not node.is_new:
+            self.deleted[kind].add(node.pk)
+
+    def move(self, kind, op):
+        node = self._resolve(op.get('id'), kind)
+        if op.get('position') is None:
+            raise BatchError('position is required')
+        self._place(node, op['position'])
+
+    def plan(self):
+        """Apply every operation to the in-memory tree."""
+        for index, op in enumerate(self.operations):
+            try:
+                if not isinstance(op, dict) or op.get('op') not in OPERATIONS:
+                    raise BatchError(f'op must be one of: {", ".join(OPERATIONS)}')
+                if op.get('type') not in MODELS:
+                    raise BatchError(f'type must be one of: {", ".join(MODELS)}')
+                getattr(self, op['op'])(op['type'], op)
+            except BatchError as e:
+                e.index = index
+                raise
+
+    def write(self):
+        """Write the planned tree with bulk statements."""
+        now = timezone.now()
+        nodes = defaultdict(list)
+        for node in self.nodes.values():
+            nodes[node.kind].append(node)
+
+        for kind, pks in self.deleted.items():
+            MODELS[kind].objects.filter(pk__in=pks).delete()
+
+        for kind, model in MODELS.items():
+            moved = [node for node in nodes[kind] if not node.is_new and node.order != node.original_order]
+            write_orders(
+                model,
+                {node.pk: node.original_order for node in moved},
+                {node.pk: node.order for node in moved}
+            )
+
+            updated = [node for node in nodes[kind] if node.changed and not node.is_new]
+            if updated:
+                fields = set().union(*(node.changed for node in updated)) | {'modified_datetime'}
+                for node in updated:
+                    node.instance.modified_datetime = now
+                model.objects.bulk_update([node.instance for node in updated], sorted(fields))
+
+        # Parents are inserted before the questions and groups that point at them
+        for kind in ('page', 'group', 'question'):
+            created = [node for node in nodes[kind] if node.is_new]
+            for node in created:
+                node.instance.order = node.order
+            MODELS[kind].objects.bulk_create([node.instance for node in created])
+
+
+def apply_batch(form, operations):
+    """
+    Apply builder ``operations`` to ``form`` atomically.
+
+    Returns ``{ref: id}`` for items created with a ``ref``. Raises BatchError
+    and leaves the form untouched if any operation is invalid.
+    """
+    try:
+        with transaction.atomic():
+            # The tree is planned under row locks, so concurrent edits wait for the write
+            plan = BatchPlan(form, operations)
+            plan.plan()
+            plan.write()
+    except IntegrityError as e:
+        raise BatchError(f'Conflicting structure: {e}')
+    return {ref: str(pk) for ref, pk in plan.refs.items() if pk in plan.nodes}
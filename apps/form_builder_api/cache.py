@@ -0,0 +1,223 @@
+"""
+Cache for published form definitions served by ``FormViewSet.retrieve``.
+
+Published versions are immutable, so the encoded response bodies of a version
+can be reused until another version is published. For page-by-page loading
+a second entry per version holds an encoded manifest (the form's pages
+without their questions) and one encoded body per page, so the version's
+JSON is parsed once per entry rather than on every request. Entries are keyed by form
+slug and version id, and a per-slug pointer records which version is the
+current published one, so a cache hit never touches the database. Page
+entries are also reachable by version number, so clients that pinned the
+version of the manifest they loaded keep getting its pages after a newer
+version is published.
+
+Two layers are used:
+
+* a process-local LRU with a TTL, which is always enabled;
+* an optional Django cache (``BACKEND = 'django'``) shared between workers.
+  Invalidations clear the shared pointer immediately; other workers pick the
+  change up once their local pointer expires (``TIMEOUT`` seconds).
+
+Configure via the ``FORMATIC_PUBLISHED_FORM_CACHE`` setting.
+"""
+import threading
+import time
+from collections import OrderedDict
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from apps.form_builder.models import compress_body, encode_json_body
+
+
+DEFAULT_CACHE_SETTINGS = {
+    'BACKEND': 'local',  # 'local' or 'django'
+    'CACHE_ALIAS': 'default',
+    'MAX_ENTRIES': 512,
+    'TIMEOUT': 300,
+    'KEY_PREFIX': 'formatic:published-form',
+}
+
+# Page fields listed in the manifest: enough to navigate and evaluate conditions
+MANIFEST_PAGE_FIELDS = (
+    'id', 'name', 'slug', 'order', 'conditional_logic', 'disabled_condition',
+    'tag_text', 'tag_hover_text', 'tag_display_condition', 'tag_link',
+)
+
+
+class LocalLRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def encode_version(version):
+    """Build a cache entry holding the encoded bodies of a form version."""
+    return {
+        'version_id': str(version.id),
+        'version_number': version.version_number,
+        'etag': version.get_etag(),
+        'last_modified': version.published_datetime or version.created_datetime,
+        'bodies': version.get_encoded_bodies(),
+    }
+
+
+def encode_bodies(data):
+    """Encode data as JSON plus its compressed variants, keyed by content coding."""
+    body = encode_json_body(data)
+    return {'identity': body, **compress_body(body)}
+
+
+def encode_version_pages(version):
+    """Build a cache entry holding the manifest and per-page bodies of a form version."""
+    data = version.serialized_form_data
+    pages = sorted(data.get('pages', []), key=itemgetter('order'))
+    manifest = {key: value for key, value in data.items() if key != 'pages'}
+    manifest['version_number'] = version.version_number
+    manifest['pages'] = [
+        {field: page.get(field) for field in MANIFEST_PAGE_FIELDS if field in page}
+        for page in pages
+    ]
+    return {
+        'version_id': str(version.id),
+        'version_number': version.version_number,
+        'etag': version.get_etag(),
+        'last_modified': version.published_datetime or version.created_datetime,
+        'manifest': encode_bodies(manifest),
+        'pages': {page['slug']: encode_bodies(page) for page in pages},
+    }
+
+
+class PublishedFormCache:
+    """Two-level cache of encoded published form definitions."""
+
+    def __init__(self, options=None):
+        self.options = {**DEFAULT_CACHE_SETTINGS, **(options or {})}
+        self.timeout = self.options['TIMEOUT']
+        self.local = LocalLRUCache(self.options['MAX_ENTRIES'], self.timeout)
+        if self.options['BACKEND'] == 'django':
+            self.shared = caches[self.options['CACHE_ALIAS']]
+        else:
+            self.shared = None
+
+    def _pointer_key(self, slug, version_number=None):
+        suffix = 'current' if version_number is None else f'number:{version_number}'
+        return f"{self.options['KEY_PREFIX']}:{slug}:{suffix}"
+
+    def _entry_key(self, slug, version_id):
+        return f"{self.options['KEY_PREFIX']}:{slug}:{version_id}"
+
+    def _get(self, key):
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def _set(self, key, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value, self.timeout)
+
+    def get(self, slug):
+        """Return the cached entry for the current published version, if any."""
+        version_id = self._get(self._pointer_key(slug))
+        if version_id is None:
+            return None
+        return self._get(self._entry_key(slug, version_id))
+
+    def set(self, slug, version):
+        """Cache ``version`` as the current published version of ``slug``."""
+        entry = encode_version(version)
+        self._set(self._entry_key(slug, entry['version_id']), entry)
+        self._set(self._pointer_key(slug), entry['version_id'])
+        return entry
+
+    def get_pages(self, slug, version_number=None):
+        """Return the cached page entry for the current published version, or for ``version_number``, if any."""
+        version_id = self._get(self._pointer_key(slug, version_number))
+        if version_id is None:
+            return None
+        return self._get(f'{self._entry_key(slug, version_id)}:pages')
+
+    def set_pages(self, slug, version, current=True):
+        """Cache the pages of ``version``, as the current published version of ``slug`` unless ``current`` is False."""
+        entry = encode_version_pages(version)
+        self._set(f"{self._entry_key(slug, entry['version_id'])}:pages", entry)
+        self._set(self._pointer_key(slug, entry['version_number']), entry['version_id'])
+        if current:
+            self._set(self._pointer_key(slug), entry['version_id'])
+        return entry
+
+    def invalidate(self, slug, version_number=None):
+        """Forget which version is published for ``slug``, and which version has ``version_number``."""
+        keys = [self._pointer_key(slug)]
+        if version_number is not None:
+            keys.append(self._pointer_key(slug, version_number))
+        for key in keys:
+            self.local.delete(key)
+            if self.shared is not None:
+                self.shared.delete(key)
+
+    def clear(self):
+        """Drop every locally cached entry."""
+        self.local.clear()
+
+
+_published_form_cache = None
+
+
+def get_published_form_cache():
+    """Return the process-wide published form cache."""
+    global _published_form_cache
+    if _published_form_cache is None:
+        _published_form_cache = PublishedFormCache(
+            getattr(settings, 'FORMATIC_PUBLISHED_FORM_CACHE', None)
+        )
+    return _published_form_cache
+
+
+@receiver(setting_changed)
+def reset_published_form_cache(*, setting, **kwargs):
+    global _published_form_cache
+    if setting == 'FORMATIC_PUBLISHED_FORM_CACHE':
+        _published_form_cache = None
@@ -0,0 +1,379 @@
+"""
+Server-side evaluation of conditional logic.
+
+Mirrors ``useConditionalLogic.js``: a question's ``conditional_logic`` rules
+are tried in order and the first whose conditions hold (AND by default, or
+OR) decides visibility, required-ness and options; otherwise the
+``default_action`` applies. ``disabled_condition`` and
+``tag_display_condition`` are single conditions using ``field`` instead of
+``question_slug``. A page's ``conditional_logic`` decides its visibility the
+same way, and a question on a disabled page is disabled.
+
+Conditions follow JavaScript semantics so the server agrees with the client:
+``equals`` is strict equality, ``contains`` is a substring test on the
+answer's string form, and ``is_empty`` treats every falsy value (but not an
+empty list) as empty.
+
+A ``LogicPlan`` is compiled once per form version, with every rule indexed by
+the answer slugs it reads. ``LogicPlan.evaluate`` returns a ``LogicState``
+for an answers dict, and ``LogicState.update`` re-evaluates only the pages
+and questions whose conditions read a changed answer, as listed by the
+version's stored ``dependency_graph``. ``LogicPlan.next_page``
+evaluates page conditions alone, for server-side navigation.
+
+Configure via the ``FORMATIC_CONDITIONAL_LOGIC`` setting.
+"""
+import math
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from apps.form_builder.dependencies import build_dependency_graph
+from apps.form_builder.models import FormVersion
+from .cache import LocalLRUCache
+
+
+DEFAULT_LOGIC_SETTINGS = {
+    'MAX_ENTRIES': 256,
+    'TIMEOUT': 3600,
+}
+
+# Question type slugs the client never displays
+HIDDEN_TYPES = frozenset({'hidden'})
+
+# Stands in for a missing answer (JavaScript ``undefined``)
+MISSING = object()
+
+
+def get_logic_settings():
+    return {
+        **DEFAULT_LOGIC_SETTINGS,
+        **(getattr(settings, 'FORMATIC_CONDITIONAL_LOGIC', None) or {}),
+    }
+
+
+def is_truthy(value):
+    """JavaScript truthiness: lists and dicts are truthy even when empty."""
+    if value is MISSING or value is None:
+        return False
+    if isinstance(value, (list, dict)):
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return False
+    return bool(value)
+
+
+def strict_equals(a, b):
+    """JavaScript ``===`` between an answer and a JSON condition value."""
+    if a is MISSING or isinstance(a, (list, dict)) or isinstance(b, (list, dict)):
+        return False
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    return type(a) is type(b) and a == b
+
+
+def js_string(value):
+    """JavaScript ``String(value)`` for JSON values."""
+    if value is MISSING:
+        return 'undefined'
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    if isinstance(value, list):
+        return ','.join('' if item is None else js_string(item) for item in value)
+    if isinstance(value, dict):
+        return '[object Object]'
+    return str(value)
+
+
+OPERATORS = {
+    'equals': lambda answer, value: strict_equals(answer, value),
+    'not_equals': lambda answer, value: not strict_equals(answer, value),
+    'contains': lambda answer, value: is_truthy(answer) and js_string(value) in js_string(answer),
+    'not_contains': lambda answer, value: not is_truthy(answer) or js_string(value) not in js_string(answer),
+    'is_empty': lambda answer, value: not is_truthy(answer),
+    'is_not_empty': lambda answer, value: is_truthy(answer),
+}
+
+
+def never(answer, value):
+    return False  # Unknown operators never match, as in the client
+
+
+class Condition:
+    """One compiled ``{question_slug|field, operator, value}`` condition."""
+    __slots__ = ('slug', 'test', 'value')
+
+    def __init__(self, slug, operator, value=MISSING):
+        self.slug = slug
+        self.test = OPERATORS.get(operator, never)
+        self.value = value
+
+    @classmethod
+    def from_field(cls, condition):
+        """Compile a ``disabled_condition``/``tag_display_condition``; None when unset."""
+        if not condition:
+            return None
+        return cls(condition.get('field'), condition.get('operator'), condition.get('value', MISSING))
+
+    def __call__(self, answers):
+        return self.test(answers.get(self.slug, MISSING), self.value)
+
+
+class Rule:
+    """A compiled rule with the outcome of its actions precomputed."""
+    __slots__ = ('conditions', 'any', 'visible', 'required', 'options')
+
+    def __init__(self, rule, required):
+        self.conditions = tuple(
+            Condition(condition.get('question_slug'), condition.get('operator'), condition.get('value', MISSING))
+            for condition in rule.get('conditions') or []
+        )
+        self.any = rule.get('logical_operator') == 'OR'
+        self.visible = True
+        self.required = required
+        self.options = None
+        for action in rule.get('actions') or []:
+            kind = action.get('type')
+            if kind == 'show':
+                self.visible = True
+            elif kind == 'hide':
+                self.visible = False
+            elif kind == 'require':
+                self.required = True
+            elif kind == 'unrequire':
+                self.required = False
+            elif kind == 'set_options':
+                options = action.get('options')
+                self.options = (options.get('en') or options) if isinstance(options, dict) else options
+
+    def matches(self, answers):
+        if not self.conditions:
+            return True
+        if self.any:
+            return any(condition(answers) for condition in self.conditions)
+        return all(condition(answers) for condition in self.conditions)
+
+
+class LogicNode:
+    """Compiled conditions of one page or question."""
+    __slots__ = ('kind', 'slug', 'page', 'required', 'displayed', 'rules', 'default_hide', 'disabled', 'tag')
+
+    def __init__(self, kind, item, page=None):
+        self.kind = kind
+        self.slug = item.get('slug')
+        self.page = page
+        self.required = bool(item.get('required'))
+        config = item.get('config') or {}
+        self.displayed = not (
+            item.get('type') in HIDDEN_TYPES or config.get('ui_hidden') or config.get('excluded_from_display')
+        )
+        logic = item.get('conditional_logic') or {}
+        self.rules = tuple(Rule(rule, self.required) for rule in logic.get('rules') or [])
+        # As in the client, an empty rule list still applies the default action
+        self.default_hide = isinstance(logic.get('rules'), list) and logic.get('default_action') == 'hide'
+        self.disabled = Condition.from_field(item.get('disabled_condition'))
+        self.tag = Condition.from_field(item.get('tag_display_condition')) if kind == 'page' else None
+
+    def evaluate(self, answers):
+        """Return this node's own state, ignoring the page it is on."""
+        visible, required, options = True, self.required, None
+        for rule in self.rules:
+            if rule.matches(answers):
+                visible, required, options = rule.visible, rule.required, rule.options
+                break
+        else:
+            if self.default_hide:
+                visible, required = False, False
+        disabled = self.disabled is not None and self.disabled(answers)
+        if self.kind == 'page':
+            return {
+                'visible': visible,
+                'disabled': disabled,
+                'tag_visible': self.tag is None or self.tag(answers),
+            }
+        return {
+            'visible': visible and self.displayed,
+            'required': required,
+            'disabled': disabled,
+            'options': options,
+        }
+
+
+class LogicPlan:
+    """Conditional logic of one form version, indexed by the answers it reads."""
+
+    def __init__(self, serialized_form_data, dependency_graph=None):
+        self.pages = []
+        self.questions = []
+        # Page definitions by slug, in display order, for navigation
+        self.page_definitions = {}
+        for page in sorted(serialized_form_data.get('pages', []), key=lambda page: page.get('order', 0)):
+            node = LogicNode('page', page)
+            self.pages.append(node)
+            self.page_definitions[node.slug] = page
+            questions = list(page.get('questions', []))
+            for group in page.get('question_groups', []):
+                questions.extend(group.get('questions', []))
+            self.questions.extend(LogicNode('question', question, page=node.slug) for question in questions)
+
+        self.page_index = {node.slug: i for i, node in enumerate(self.pages)}
+        self.page_of = {node.slug: node.page for node in self.questions}
+        self.page_questions = {}
+        for node in self.questions:
+            self.page_questions.setdefault(node.page, []).append(node.slug)
+
+        # Versions store their graph when saved; it is only rebuilt for unsaved data
+        if dependency_graph is None:
+            dependency_graph = build_dependency_graph(serialized_form_data)
+        nodes = {}
+        for node in self.pages + self.questions:
+            nodes.setdefault((node.kind, node.slug), []).append(node)
+        dependents = {}
+        for kind, key in (('question', 'dependents'), ('page', 'page_dependents')):
+            for slug, targets in dependency_graph.get(key, {}).items():
+                for target in dict.fromkeys(targets):
+                    dependents.setdefault(slug, []).extend(nodes.get((kind, target), ()))
+        self.dependents = {slug: tuple(nodes) for slug, nodes in dependents.items() if nodes}
+
+    @property
+    def is_static(self):
+        """Whether no page or question state depends on answers."""
+        return not self.dependents
+
+    def evaluate(self, answers):
+        return LogicState(self, answers)
+
+    def next_page(self, answers, current=None):
+        """
+        Return the slug of the first shown, enabled page after ``current``
+        (from the start when None), or None when no page is left.
+
+        Raises KeyError for an unknown ``current`` slug.
+        """
+        start = 0 if current is None else self.page_index[current] + 1
+        for node in self.pages[start:]:
+            state = node.evaluate(answers)
+            if state['visible'] and not state['disabled']:
+                return node.slug
+        return None
+
+
+class LogicState:
+    """
+    Page and question states of a ``LogicPlan`` for one answers dict.
+
+    ``pages`` maps page slugs to ``visible``/``disabled``/``tag_visible``;
+    ``questions`` maps question slugs to ``visible``/``required``/
+    ``disabled``/``options``, where a question on a disabled page is
+    disabled.
+    """
+
+    def __init__(self, plan, answers):
+        self.plan = plan
+        self.pages = {node.slug: node.evaluate(answers) for node in plan.pages}
+        self.own = {node.slug: node.evaluate(answers) for node in plan.questions}
+        self.questions = {}
+        for node in plan.questions:
+            self.questions[node.slug] = self.effective(node.slug)
+
+    def effective(self, slug):
+        own = self.own[slug]
+        page = self.pages.get(self.plan.page_of.get(slug))
+        if page and page['disabled'] and not own['disabled']:
+            return {**own, 'disabled': True}
+        return own
+
+    def update(self, answers, changed):
+        """
+        Re-evaluate the pages and questions that read any ``changed`` slug.
+
+        Returns ``(pages, questions)``: the slugs whose state changed.
+        """
+        changed_pages, changed_questions = set(), set()
+        dependents = self.plan.dependents
+        for slug in set(changed):
+            for node in dependents.get(slug, ()):
+                state = node.evaluate(answers)
+                if node.kind == 'page':
+                    if state != self.pages[node.slug]:
+                        self.pages[node.slug] = state
+                        changed_pages.add(node.slug)
+                elif state != self.own[node.slug]:
+                    self.own[node.slug] = state
+                    changed_questions.add(node.slug)
+        # Disabling a page disables its questions
+        for page in changed_pages:
+            changed_questions.update(self.plan.page_questions.get(page, ()))
+        for slug in list(changed_questions):
+            state = self.effective(slug)
+            if state == self.questions[slug]:
+                changed_questions.discard(slug)
+            self.questions[slug] = state
+        return changed_pages, changed_questions
+
+    def is_active(self, slug):
+        """Whether a question is shown and editable on a shown, enabled page."""
+        question = self.questions.get(slug)
+        if question is None:
+            return True
+        page = self.pages.get(self.plan.page_of.get(slug))
+        return question['visible'] and not question['disabled'] and (page is None or page['visible'])
+
+    def is_required(self, slug):
+        """Whether a question must be answered to complete the submission."""
+        question = self.questions.get(slug)
+        return question is not None and question['required'] and self.is_active(slug)
+
+    def as_dict(self):
+        return {'pages': self.pages, 'questions': self.questions}
+
+
+_plan_cache = None
+
+
+def load_version_data(version_id):
+    """``(serialized_form_data, dependency_graph)`` of a form version, or None."""
+    return FormVersion.objects.filter(pk=version_id).values_list('serialized_form_data', 'dependency_graph').first()
+
+
+def get_logic_plan(version_id, version_data=None):
+    """
+    Return the cached logic plan of a form version, or None if it does not exist.
+
+    Callers that already loaded the version's ``(serialized_form_data,
+    dependency_graph)`` can pass them to build the plan on a miss without
+    querying again.
+    """
+    global _plan_cache
+    if _plan_cache is None:
+        options = get_logic_settings()
+        _plan_cache = LocalLRUCache(options['MAX_ENTRIES'], options['TIMEOUT'])
+
+    key = str(version_id)
+    plan = _plan_cache.get(key)
+    if plan is None:
+        if version_data is None:
+            version_data = load_version_data(version_id)
+        if version_data is None:
+            return None
+        plan = LogicPlan(*version_data)
+        _plan_cache.set(key, plan)
+    return plan
+
+
+@receiver(setting_changed)
+def reset_plan_cache(*, setting, **kwargs):
+    global _plan_cache
+    if setting == 'FORMATIC_CONDITIONAL_LOGIC':
+        _plan_cache = None
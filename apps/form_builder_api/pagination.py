@@ -0,0 +1,214 @@
+"""
+Keyset pagination for submission and version listings.
+
+Submission pages are cut on ``(created_datetime, id)`` and version pages on
+``version_number`` instead of with OFFSET, so a page deep into a form with
+100k+ submissions costs the same as the first one, and rows created while a
+client is paging never shift or repeat results. Cursors are opaque tokens
+carrying the direction and the key of the boundary row.
+
+Configure via the ``FORMATIC_SUBMISSION_PAGINATION`` and
+``FORMATIC_VERSION_PAGINATION`` settings.
+"""
+import base64
+import binascii
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+DEFAULT_PAGINATION_SETTINGS = {
+    'PAGE_SIZE': 100,
+    'MAX_PAGE_SIZE': 1000,
+}
+
+DEFAULT_VERSION_PAGINATION_SETTINGS = {
+    'PAGE_SIZE': 50,
+    'MAX_PAGE_SIZE': 500,
+}
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def get_pagination_settings():
+    return {
+        **DEFAULT_PAGINATION_SETTINGS,
+        **(getattr(settings, 'FORMATIC_SUBMISSION_PAGINATION', None) or {}),
+    }
+
+
+def get_version_pagination_settings():
+    return {
+        **DEFAULT_VERSION_PAGINATION_SETTINGS,
+        **(getattr(settings, 'FORMATIC_VERSION_PAGINATION', None) or {}),
+    }
+
+
+class KeysetPagination(BasePagination):
+    """Newest-first cursor pagination on ``(created_datetime, id)``."""
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+    settings_name = 'FORMATIC_SUBMISSION_PAGINATION'
+    ordering = ('-created_datetime', '-id')
+
+    def get_settings(self):
+        return get_pagination_settings()
+
+    def parse_key(self, parts):
+        """Parse the key parts of a cursor; raises ValueError when malformed."""
+        created, pk = parts
+        created = parse_datetime(created)
+        if created is None:
+            raise ValueError(created)
+        return created, uuid.UUID(pk)
+
+    def format_key(self, obj):
+        return [obj.created_datetime.isoformat(), str(obj.pk)]
+
+    def after(self, key):
+        """Rows following ``key`` in ``ordering``."""
+        created, pk = key
+        return Q(created_datetime__lt=created) | Q(created_datetime=created, id__lt=pk)
+
+    def before(self, key):
+        """Rows preceding ``key`` in ``ordering``."""
+        created, pk = key
+        return Q(created_datetime__gt=created) | Q(created_datetime=created, id__gt=pk)
+
+    def get_page_size(self, request):
+        config = self.get_settings()
+        page_size = config['PAGE_SIZE']
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested:
+            try:
+                page_size = max(int(requested), 1)
+            except ValueError:
+                pass
+        return min(page_size, config['MAX_PAGE_SIZE'])
+
+    def decode_cursor(self, request):
+        """Return ``(direction, key)`` or None for the first page."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            direction, *parts = base64.urlsafe_b64decode(token.encode()).decode().split('|')
+            key = self.parse_key(parts)
+        except (ValueError, UnicodeDecodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if direction not in (NEXT, PREVIOUS):
+            raise NotFound(self.invalid_cursor_message)
+        return direction, key
+
+    def encode_cursor(self, direction, obj):
+        token = '|'.join([direction, *self.format_key(obj)])
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            base64.urlsafe_b64encode(token.encode()).decode()
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        direction = NEXT
+        if cursor is not None:
+            direction, key = cursor
+            if direction == NEXT:
+                queryset = queryset.filter(self.after(key))
+            else:
+                queryset = queryset.filter(self.before(key)).reverse()
+
+        # One extra row tells whether another page follows
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if direction == PREVIOUS:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(NEXT, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(PREVIOUS, self.page[0])
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': (
+                    'Number of results to return per page '
+                    f'(capped at {self.settings_name}["MAX_PAGE_SIZE"]).'
+                ),
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class VersionPagination(KeysetPagination):
+    """Newest-first cursor pagination of one form's versions on ``version_number``."""
+    settings_name = 'FORMATIC_VERSION_PAGINATION'
+    ordering = ('-version_number',)
+
+    def get_settings(self):
+        return get_version_pagination_settings()
+
+    def parse_key(self, parts):
+        version_number, = parts
+        return int(version_number)
+
+    def format_key(self, obj):
+        return [str(obj.version_number)]
+
+    def after(self, key):
+        return Q(version_number__lt=key)
+
+    def before(self, key):
+        return Q(version_number__gt=key)
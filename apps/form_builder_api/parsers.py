@@ -0,0 +1,6 @@
+from rest_framework.parsers import JSONParser
+
+
+class MergePatchParser(JSONParser):
+    """Parses RFC 7396 JSON merge patch bodies (``application/merge-patch+json``)."""
+    media_type = 'application/merge-patch+json'
@@ -0,0 +1,230 @@
+"""
+Sparse fieldsets for read endpoints.
+
+``?fields=`` keeps only the listed fields and ``?exclude=`` drops them. Both
+take comma-separated names, and dotted names reach into nested objects::
+
+    ?fields=id,name,pages.slug,pages.questions.slug
+    ?exclude=answers,ip_address
+    ?exclude=pages.questions.config,pages.questions.validation
+
+Serializers with ``ProjectedSerializerMixin`` drop unrequested fields before
+serializing, so they are never computed. Method fields that build a nested
+serializer declare its class in ``projection_children`` and narrow it with
+``project_child()``. ``get_deferred_fields()`` reports
+the model columns a projected serializer no longer reads, so views can
+leave them out of the SQL with ``.defer()`` and skip prefetching relations
+that are not serialized at all. Unknown names are ignored.
+
+Fields a serializer needs to number its items (``projection_keep``) are
+serialized even when not requested and removed from the output at the end.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from drf_spectacular.utils import OpenApiParameter
+
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def parse_paths(value):
+    """
+    Parse ``a,b.c,b.d`` into ``{'a': None, 'b': {'c': None, 'd': None}}``.
+
+    None stands for the whole field; naming a field whole wins over naming
+    some of its nested fields.
+    """
+    tree = {}
+    for path in value.split(','):
+        parts = [part.strip() for part in path.split('.')]
+        if not all(parts):
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+class Projection:
+    """Which fields of a representation to keep, as trees of field names."""
+
+    def __init__(self, fields=None, exclude=None):
+        # None keeps every field
+        self.fields = fields
+        self.exclude = exclude or {}
+
+    @classmethod
+    def from_request(cls, request):
+        """Parse ``?fields=``/``?exclude=``; None when neither is given."""
+        fields = request.query_params.get(FIELDS_PARAM)
+        exclude = request.query_params.get(EXCLUDE_PARAM)
+        if not fields and not exclude:
+            return None
+        return cls(parse_paths(fields) if fields else None, parse_paths(exclude) if exclude else None)
+
+    def includes(self, name):
+        if self.fields is not None and name not in self.fields:
+            return False
+        return not (name in self.exclude and self.exclude[name] is None)
+
+    def child(self, name):
+        """Projection of a nested field, or None when it is kept whole."""
+        fields = self.fields.get(name) if self.fields is not None else None
+        exclude = self.exclude.get(name)
+        if fields is None and not exclude:
+            return None
+        return Projection(fields, exclude)
+
+    def apply(self, data):
+        """Prune a representation (a dict or a list of dicts) to this projection."""
+        if isinstance(data, list):
+            return [self.apply(item) for item in data]
+        if not isinstance(data, dict):
+            return data
+        result = {}
+        for name, value in data.items():
+            if self.includes(name):
+                child = self.child(name)
+                result[name] = child.apply(value) if child is not None else value
+        return result
+
+
+# Keeps nothing but the fields a serializer cannot do without
+NOTHING = Projection(fields={})
+
+
+class ProjectedSerializerMixin:
+    """Serializer that can be narrowed with ``projection=Projection(...)``, nested serializers included."""
+    # Fields serialized even when not requested, because items are numbered by them
+    projection_keep = ()
+    # Serializer classes built by method fields, by field name
+    projection_children = {}
+
+    def __init__(self, *args, projection=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.projection = None
+        # Only the serializer the view built prunes its output
+        self.projection_root = projection is not None
+        if projection is not None:
+            self.set_projection(projection)
+
+    def get_kept_fields(self, projection):
+        return self.projection_keep
+
+    def set_projection(self, projection):
+        self.projection = projection
+        kept = self.get_kept_fields(projection)
+        for name in list(self.fields):
+            if projection.includes(name):
+                child = projection.child(name)
+            elif name in kept:
+                child = NOTHING
+            else:
+                del self.fields[name]
+                continue
+            if child is None:
+                continue
+            field = self.fields[name]
+            target = getattr(field, 'child', field)
+            if isinstance(target, ProjectedSerializerMixin):
+                target.set_projection(child)
+
+    def get_child_projection(self, name):
+        """Projection for the serializer a method field builds, or None for all fields."""
+        if self.projection is None:
+            return None
+        if self.projection.includes(name):
+            return self.projection.child(name)
+        return NOTHING
+
+    def project_child(self, serializer, name):
+        """Narrow a serializer built by the method field ``name``; returns it."""
+        projection = self.get_child_projection(name)
+        if projection is not None:
+            getattr(serializer, 'child', serializer).set_projection(projection)
+        return serializer
+
+    def get_child_serializers(self):
+        """Yield the nested projected serializers still serialized."""
+        for name, field in self.fields.items():
+            target = getattr(field, 'child', field)
+            if isinstance(target, ProjectedSerializerMixin):
+                yield target
+            elif name in self.projection_children:
+                yield self.projection_children[name](projection=self.get_child_projection(name))
+
+    def get_deferred_fields(self):
+        """
+        Map every model this serializer reads to the columns it leaves unread.
+
+        Only columns behind declared fields that were projected away count;
+        relations and the primary key are never deferred. A model reached
+        through several nested serializers keeps a column any of them reads.
+        """
+        model = self.Meta.model
+        deferred = set()
+        for name, field in self.get_fields().items():
+            if name in self.fields:
+                continue
+            source = name if field.source in (None, '*') else field.source
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.is_relation and not model_field.primary_key:
+                deferred.add(model_field.attname)
+
+        result = {model: deferred}
+        for child in self.get_child_serializers():
+            for child_model, columns in child.get_deferred_fields().items():
+                result[child_model] = result[child_model] & columns if child_model in result else columns
+        return result
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.projection_root:
+            data = self.projection.apply(data)
+        return data
+
+
+class ProjectionViewMixin:
+    """ViewSet mixin passing ``?fields=``/``?exclude=`` to projected serializers."""
+    projection_actions = ('list', 'retrieve')
+
+    def get_projection(self):
+        if self.action not in self.projection_actions:
+            return None
+        return Projection.from_request(self.request)
+
+    def get_projected_serializer(self, serializer_class=None):
+        """An instance-less serializer carrying the request's projection, or None."""
+        projection = self.get_projection()
+        serializer_class = serializer_class or self.get_serializer_class()
+        if projection is None or not issubclass(serializer_class, ProjectedSerializerMixin):
+            return None
+        return serializer_class(projection=projection)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        projection = self.get_projection()
+        if projection is not None and issubclass(serializer_class, ProjectedSerializerMixin):
+            kwargs.setdefault('projection', projection)
+        return super().get_serializer(*args, **kwargs)
+
+
+def projection_parameters():
+    """OpenAPI parameters documenting ``?fields=`` and ``?exclude=``."""
+    return [
+        OpenApiParameter(
+            name=FIELDS_PARAM, type=str,
+            description="Comma-separated fields to return; dotted names select nested fields (e.g. pages.slug)"
+        ),
+        OpenApiParameter(
+            name=EXCLUDE_PARAM, type=str,
+            description="Comma-separated fields to leave out; dotted names reach nested fields"
+        ),
+    ]
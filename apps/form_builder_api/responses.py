@@ -0,0 +1,172 @@
+"""
+Response classes for serving pre-encoded JSON bodies.
+"""
+import json
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework.response import Response
+
+
+# Preferred content codings, best first
+CONTENT_ENCODINGS = ('br', 'gzip')
+
+# Form versions never change once created, so pinned URLs can be cached forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# The latest published version can change at any time and must be revalidated
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+
+
+def negotiate_content_encoding(request, bodies):
+    """
+    Pick the best content coding from ``bodies`` accepted by the client.
+
+    Returns None when the identity body should be sent.
+    """
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+
+    for coding in CONTENT_ENCODINGS:
+        if bodies.get(coding) is None:
+            continue
+        if accepted.get(coding, accepted.get('*', 0.0)) > 0:
+            return coding
+    return None
+
+
+class PreEncodedJSONResponse(Response):
+    """
+    Response whose JSON body has already been encoded (and compressed).
+
+    ``bodies`` maps content codings ('identity', 'gzip', 'br') to bytes. When
+    the negotiated renderer is JSON the bytes for ``content_encoding`` are sent
+    as-is, so no serialization or compression happens on the request path.
+    Other renderers (e.g. the browsable API) fall back to decoding the body and
+    rendering normally. ``data`` is decoded lazily for callers such as the test
+    client.
+    """
+
+    def __init__(self, bodies, content_encoding=None, status=None, headers=None):
+        self.bodies = bodies
+        self.content_encoding = content_encoding
+        super().__init__(data=None, status=status, headers=headers)
+
+    @property
+    def data(self):
+        if self._data is None and self.bodies is not None:
+            self._data = json.loads(self.bodies['identity'])
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        renderer = getattr(self, 'accepted_renderer', None)
+        if renderer is None or renderer.format != 'json':
+            return super().rendered_content
+
+        self['Content-Type'] = renderer.media_type
+        patch_vary_headers(self, ('Accept-Encoding',))
+        if self.content_encoding:
+            self['Content-Encoding'] = self.content_encoding
+            return self.bodies[self.content_encoding]
+        return self.bodies['identity']
+
+
+def _strip_encoding(etag):
+    """Reduce an ETag to the tag of its identity representation."""
+    tag = etag[2:] if etag.startswith('W/') else etag
+    for coding in CONTENT_ENCODINGS:
+        suffix = f'-{coding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def get_matching_etag(request, etag):
+    """
+    Return the If-None-Match tag that matches ``etag``, if any.
+
+    Tags are compared weakly and regardless of content coding, since every
+    representation of a version carries the same data.
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return None
+    for tag in parse_etags(header):
+        if tag == '*' or _strip_encoding(tag) == etag:
+            return etag if tag == '*' else tag
+    return None
+
+
+def is_not_modified(request, etag, last_modified):
+    """Evaluate If-None-Match (preferred) or If-Modified-Since for a GET."""
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        return get_matching_etag(request, etag) is not None
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    if if_modified_since is None or last_modified is None:
+        return False
+    return int(last_modified.timestamp()) <= if_modified_since
+
+
+def not_modified_response(request, etag, last_modified=None, cache_control=None):
+    """Build a 304 response echoing the validators the client holds."""
+    response = HttpResponseNotModified()
+    response['ETag'] = get_matching_etag(request, etag) or etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def encoded_json_response(request, bodies, etag=None, last_modified=None, cache_control=None, **kwargs):
+    """Build a PreEncodedJSONResponse using the client's preferred encoding."""
+    content_encoding = negotiate_content_encoding(request, bodies)
+    response = PreEncodedJSONResponse(bodies, content_encoding=content_encoding, **kwargs)
+    if etag is not None:
+        # Each content coding is a distinct representation with its own tag
+        response['ETag'] = etag if content_encoding is None else f'{etag[:-1]}-{content_encoding}"'
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    return response
+
+
+def revision_etag(revision):
+    """ETag of a submission at ``revision``."""
+    return f'"{revision}"'
+
+
+def if_match_revision(request):
+    """
+    Return the revision named by the If-Match header, or None when absent or ``*``.
+
+    Raises ValueError for a header that names anything else.
+    """
+    header = request.META.get('HTTP_IF_MATCH')
+    if not header or header.strip() == '*':
+        return None
+    tags = parse_etags(header)
+    if len(tags) != 1 or not tags[0].startswith('"'):
+        raise ValueError('If-Match must name a single submission revision')
+    return int(tags[0].strip('"'))
@@ -507,6 +507,40 @@ SUBMISSION_ANSWERS_SCHEMA = {
     }
 }
 
+# Schema for the conditional logic dependency graph of a form version
+DEPENDENCY_GRAPH_SCHEMA = {
+    "type": "object",
+    "description": "Which questions and pages read each answer, in evaluation order",
+    "properties": {
+        "dependents": {
+            "type": "object",
+            "description": "Answer slug to the question slugs whose conditions read it",
+            "additionalProperties": {"type": "array", "items": {"type": "string"}}
+        },
+        "page_dependents": {
+            "type": "object",
+            "description": "Answer slug to the page slugs whose conditions read it",
+            "additionalProperties": {"type": "array", "items": {"type": "string"}}
+        },
+        "order": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Answer slugs in topological order, dependencies first"
+        },
+        "cycles": {
+            "type": "array",
+            "items": {"type": "array", "items": {"type": "string"}},
+            "description": "Question slugs whose conditions depend on each other; blocks publishing"
+        }
+    },
+    "example": {
+        "dependents": {"employed": ["employer"]},
+        "page_dependents": {"employed": ["income"]},
+        "order": ["employed", "employer", "salary"],
+        "cycles": []
+    }
+}
+
 # Component schemas for OpenAPI specification
 COMPONENT_SCHEMAS = {
     'ConditionalLogic': CONDITIONAL_LOGIC_SCHEMA,
@@ -519,4 +553,5 @@ COMPONENT_SCHEMAS = {
     'SerializedPage': SERIALIZED_PAGE_SCHEMA,
     'SerializedFormData': SERIALIZED_FORM_DATA_SCHEMA,
     'SubmissionAnswers': SUBMISSION_ANSWERS_SCHEMA,
+    'DependencyGraph': DEPENDENCY_GRAPH_SCHEMA,
 }
\ No newline at end of file
@@ -1,13 +1,52 @@
+from django.db import models
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_serializer, extend_schema_field, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 from apps.form_builder.models import DynamicForm, FormVersion, FormSubmission, Page, Question, QuestionType, QuestionGroup, QuestionGroupTemplate
+from apps.form_builder.ordering import assign_positions, get_position, get_positions
+from .projection import ProjectedSerializerMixin
 from .schemas import (
     QUESTION_CONFIG_SCHEMA, VALIDATION_CONFIG_SCHEMA, CONDITIONAL_LOGIC_SCHEMA,
     PAGE_CONFIG_SCHEMA, SERIALIZED_FORM_DATA_SCHEMA, SUBMISSION_ANSWERS_SCHEMA
 )
 
 
+class PositionListSerializer(serializers.ListSerializer):
+    """
+    List serializer that reports ``order`` as 1..n positions.
+
+    Stored orders are sparse rank keys. Top-level lists look positions up per
+    sequence; nested lists are numbered by their parent serializer, which
+    knows every item in the sequence.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        instances = list(iterable)
+        items = [self.child.to_representation(instance) for instance in instances]
+        if self.parent is None:
+            positions = get_positions(instances)
+            for instance, item in zip(instances, items):
+                item['order'] = positions[instance.pk]
+        return items
+
+
+def assign_projected_positions(*sequences):
+    """``assign_positions`` for items a projection may have left without ``order``."""
+    if all('order' in item for sequence in sequences for item in sequence):
+        assign_positions(*sequences)
+
+
+class PositionSerializerMixin:
+    """Report ``order`` as a 1-based position when serializing a single object."""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.parent is None:
+            data['order'] = get_position(instance)
+        return data
+
+
 @extend_schema_serializer(
     examples=[
         OpenApiExample(
@@ -85,9 +124,10 @@ class QuestionTypeSerializer(serializers.ModelSerializer):
         )
     ]
 )
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(ProjectedSerializerMixin, PositionSerializerMixin, serializers.ModelSerializer):
     """Serializer for individual questions with full configuration."""
     type = QuestionTypeSerializer(read_only=True)
+    projection_keep = ('order',)
     
     @extend_schema_field(QUESTION_CONFIG_SCHEMA)
     def get_config(self, obj):
@@ -107,12 +147,14 @@ class QuestionSerializer(serializers.ModelSerializer):
             'id', 'name', 'slug', 'text', 'subtext', 'required', 
             'config', 'validation', 'conditional_logic', 'order', 'type'
         ]
+        list_serializer_class = PositionListSerializer
 
 
-class FormQuestionSerializer(serializers.ModelSerializer):
+class FormQuestionSerializer(ProjectedSerializerMixin, serializers.ModelSerializer):
     """Lightweight serializer for questions in form contexts - references type by slug only."""
     type = serializers.CharField(source='type.slug', read_only=True)
     is_disabled = serializers.SerializerMethodField()
+    projection_keep = ('order',)
     
     @extend_schema_field(QUESTION_CONFIG_SCHEMA)
     def get_config(self, obj):
@@ -145,27 +187,51 @@ class FormQuestionSerializer(serializers.ModelSerializer):
         ]
 
 
-class QuestionGroupSerializer(serializers.ModelSerializer):
+class QuestionGroupSerializer(ProjectedSerializerMixin, PositionSerializerMixin, serializers.ModelSerializer):
     """Serializer for question groups with their nested questions."""
     questions = FormQuestionSerializer(many=True, read_only=True)
+    projection_keep = ('order',)
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        assign_projected_positions(data.get('questions', []))
+        return data
     
     class Meta:
         model = QuestionGroup
         fields = [
             'id', 'name', 'slug', 'display_type', 'config', 'order', 'questions'
         ]
+        list_serializer_class = PositionListSerializer
+
+
+class PageItemsProjectionMixin(ProjectedSerializerMixin):
+    """Keeps a page's questions and groups together, as they are numbered as one sequence."""
+    projection_keep = ('order',)
 
+    def get_kept_fields(self, projection):
+        if projection.includes('questions') or projection.includes('question_groups'):
+            return ('order', 'questions', 'question_groups')
+        return self.projection_keep
 
-class FormPageSerializer(serializers.ModelSerializer):
+
+class FormPageSerializer(PageItemsProjectionMixin, PositionSerializerMixin, serializers.ModelSerializer):
     """Lightweight serializer for pages in form contexts - uses minimal question data."""
     questions = serializers.SerializerMethodField()
     question_groups = QuestionGroupSerializer(many=True, read_only=True)
     is_disabled = serializers.SerializerMethodField()
+    projection_children = {'questions': FormQuestionSerializer}
     
     def get_questions(self, obj):
-        # Only get questions directly on page (not in groups)
-        questions = obj.questions.filter(question_group__isnull=True).order_by('order')
-        return FormQuestionSerializer(questions, many=True).data
+        # Only get questions directly on page (not in groups); filtering in Python
+        # keeps a prefetched ``questions`` cache usable
+        questions = [q for q in obj.questions.all() if q.question_group_id is None]
+        return self.project_child(FormQuestionSerializer(questions, many=True), 'questions').data
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        assign_projected_positions(data.get('questions', []), data.get('question_groups', []))
+        return data
     
     @extend_schema_field(CONDITIONAL_LOGIC_SCHEMA)
     def get_conditional_logic(self, obj):
@@ -196,6 +262,7 @@ class FormPageSerializer(serializers.ModelSerializer):
             'tag_text', 'tag_hover_text', 'tag_display_condition', 'tag_link',
             'config', 'questions', 'question_groups', 'is_disabled'
         ]
+        list_serializer_class = PositionListSerializer
 
 
 @extend_schema_serializer(
@@ -228,15 +295,24 @@ class FormPageSerializer(serializers.ModelSerializer):
         )
     ]
 )
-class PageSerializer(serializers.ModelSerializer):
+class PageSerializer(PageItemsProjectionMixin, PositionSerializerMixin, serializers.ModelSerializer):
     """Serializer for form pages with their questions."""
     questions = serializers.SerializerMethodField()
     question_groups = QuestionGroupSerializer(many=True, read_only=True)
+    projection_children = {'questions': QuestionSerializer}
     
     def get_questions(self, obj):
-        # Only get questions directly on page (not in groups)
-        questions = obj.questions.filter(question_group__isnull=True).order_by('order')
-        return QuestionSerializer(questions, many=True).data
+        # Only get questions directly on page (not in groups); filtering in Python
+        # keeps a prefetched ``questions`` cache usable
+        questions = [q for q in obj.questions.all() if q.question_group_id is None]
+        # A plain list keeps rank keys; they are numbered together with the groups
+        serializer = serializers.ListSerializer(questions, child=QuestionSerializer())
+        return self.project_child(serializer, 'questions').data
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        assign_projected_positions(data.get('questions', []), data.get('question_groups', []))
+        return data
     
     @extend_schema_field(CONDITIONAL_LOGIC_SCHEMA)
     def get_conditional_logic(self, obj):
@@ -257,6 +333,7 @@ class PageSerializer(serializers.ModelSerializer):
             'tag_text', 'tag_hover_text', 'tag_display_condition', 'tag_link',
             'config', 'questions', 'question_groups'
         ]
+        list_serializer_class = PositionListSerializer
 
 
 @extend_schema_serializer(
@@ -290,19 +367,29 @@ class PageSerializer(serializers.ModelSerializer):
         )
     ]
 )
-class DynamicFormSerializer(serializers.ModelSerializer):
+class DynamicFormSerializer(ProjectedSerializerMixin, serializers.ModelSerializer):
     """Serializer for dynamic forms with lightweight page and question structure."""
     pages = FormPageSerializer(many=True, read_only=True)
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        assign_projected_positions(data.get('pages', []))
+        return data
+
     class Meta:
         model = DynamicForm
         fields = ['id', 'name', 'slug', 'is_active', 'pages']
 
 
-class FullDynamicFormSerializer(serializers.ModelSerializer):
+class FullDynamicFormSerializer(ProjectedSerializerMixin, serializers.ModelSerializer):
     """Serializer for dynamic forms with complete page and question structure (including full type data)."""
     pages = PageSerializer(many=True, read_only=True)
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        assign_projected_positions(data.get('pages', []))
+        return data
+
     class Meta:
         model = DynamicForm
         fields = ['id', 'name', 'slug', 'is_active', 'pages']
@@ -346,7 +433,7 @@ class FullDynamicFormSerializer(serializers.ModelSerializer):
         )
     ]
 )
-class FormVersionSerializer(serializers.ModelSerializer):
+class FormVersionSerializer(ProjectedSerializerMixin, serializers.ModelSerializer):
     """Serializer for form versions with complete serialized data."""
     form_name = serializers.CharField(source='form.name', read_only=True)
     form_slug = serializers.CharField(source='form.slug', read_only=True)
@@ -359,11 +446,22 @@ class FormVersionSerializer(serializers.ModelSerializer):
         model = FormVersion
         fields = [
             'id', 'form_name', 'form_slug', 'version_number', 
-            'serialized_form_data', 'is_published', 'notes', 
+            'serialized_form_data', 'is_published', 'published_datetime', 'notes', 
             'created_datetime', 'created_by'
         ]
 
 
+class FormVersionSummarySerializer(ProjectedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for version listings - sizes and counts instead of the serialized data."""
+
+    class Meta:
+        model = FormVersion
+        fields = [
+            'id', 'version_number', 'is_published', 'published_datetime', 'notes',
+            'created_datetime', 'created_by', 'body_size', 'page_count', 'question_count'
+        ]
+
+
 class CreateVersionSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True)
     created_by = serializers.CharField(required=False, allow_blank=True)
@@ -419,7 +517,7 @@ class CreateVersionSerializer(serializers.Serializer):
         )
     ]
 )
-class FormSubmissionSerializer(serializers.ModelSerializer):
+class FormSubmissionSerializer(ProjectedSerializerMixin, serializers.ModelSerializer):
     """Serializer for form submissions with user responses."""
     form_name = serializers.CharField(source='form_version.form.name', read_only=True)
     form_version_number = serializers.IntegerField(source='form_version.version_number', read_only=True)
@@ -433,8 +531,9 @@ class FormSubmissionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'form_name', 'form_version_number', 'answers',
             'user_session_id', 'user_email', 'ip_address', 'is_complete',
-            'started_datetime', 'completed_datetime', 'created_datetime', 'modified_datetime'
+            'started_datetime', 'completed_datetime', 'created_datetime', 'modified_datetime', 'revision'
         ]
+        read_only_fields = ['revision']
 
 
 class CreateSubmissionSerializer(serializers.Serializer):
@@ -447,6 +546,18 @@ class CreateSubmissionSerializer(serializers.Serializer):
 class UpdateSubmissionSerializer(serializers.Serializer):
     answers = serializers.JSONField(required=False)
     is_complete = serializers.BooleanField(default=False, required=False)
+    revision = serializers.IntegerField(
+        required=False, min_value=1,
+        help_text="Revision the client last saw; the update fails with 409 if the submission has changed since (same as If-Match)"
+    )
+
+
+class AnswerOperationsSerializer(serializers.Serializer):
+    operations = serializers.JSONField(help_text="List of set/unset operations")
+    revision = serializers.IntegerField(
+        required=False, allow_null=True, min_value=1,
+        help_text="Revision the client last saw; the patch fails with 409 if the submission has changed since (same as If-Match)"
+    )
 
 
 # Form Builder Serializers
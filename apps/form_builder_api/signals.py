@@ -0,0 +1,38 @@
+"""
+Signal handlers that keep the published form cache consistent.
+
+Any change to a form or one of its versions (creating or publishing a version
+through the API, edits in the admin, deletions) drops the cached pointer for
+the affected slug so the next read goes back to the database.
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.form_builder.models import DynamicForm, FormVersion
+from .cache import get_published_form_cache
+
+
+@receiver(pre_save, sender=DynamicForm)
+def invalidate_renamed_form(sender, instance, **kwargs):
+    """Invalidate the previous slug when a form is renamed."""
+    if instance._state.adding:
+        return
+    old_slug = sender.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+    if old_slug and old_slug != instance.slug:
+        get_published_form_cache().invalidate(old_slug)
+
+
+@receiver(post_save, sender=DynamicForm)
+@receiver(post_delete, sender=DynamicForm)
+def invalidate_form(sender, instance, **kwargs):
+    get_published_form_cache().invalidate(instance.slug)
+
+
+@receiver(post_save, sender=FormVersion)
+@receiver(post_delete, sender=FormVersion)
+def invalidate_form_version(sender, instance, **kwargs):
+    try:
+        slug = instance.form.slug
+    except DynamicForm.DoesNotExist:
+        return
+    get_published_form_cache().invalidate(slug, instance.version_number)
@@ -0,0 +1,238 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.form_builder.factories import FormSubmissionFactory, PublishedFormVersionFactory
+from apps.form_builder.models import FormSubmission
+from . import autosave
+from .autosave import AutosaveBuffer, check_autosave_store, get_autosave_buffer, reset_autosave_buffer
+
+
+BUFFER_SETTINGS = {'ENABLED': True, 'FLUSH_INTERVAL': 0, 'MAX_PENDING': 3}
+
+
+@override_settings(FORMATIC_AUTOSAVE_BUFFER=BUFFER_SETTINGS)
+class AutosaveBufferTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        # Start each test with a fresh buffer, as a new worker would
+        reset_autosave_buffer(setting='FORMATIC_AUTOSAVE_BUFFER')
+        caches['default'].clear()
+        self.version = PublishedFormVersionFactory(serialized_form_data={'pages': []})
+        self.submission = FormSubmissionFactory(
+            form_version=self.version, answers={'name': 'Jane', 'phone': '555'}, is_complete=False
+        )
+        self.url = reverse('submission-answers', kwargs={'pk': self.submission.id})
+
+    def patch(self, operations, url=None, **headers):
+        return self.client.patch(url or self.url, {'operations': operations}, format='json', **headers)
+
+    def test_patches_are_coalesced_until_flush(self):
+        """Test buffered patches are not written until flushed, then in one batch"""
+        # Version lookups and compiling the validator once; nothing is written
+        with self.assertNumQueries(3):
+            self.assertEqual(self.patch([{'op': 'set', 'slug': 'name', 'value': 'John'}]).status_code, status.HTTP_202_ACCEPTED)
+            self.patch([{'op': 'unset', 'slug': 'phone'}, {'op': 'set', 'slug': 'email', 'value': 'j@example.com'}])
+
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answers, {'name': 'Jane', 'phone': '555'})
+        self.assertEqual(get_autosave_buffer().metrics()['queue_depth'], 1)
+
+        self.assertEqual(get_autosave_buffer().flush(), 1)
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answers, {'name': 'John', 'email': 'j@example.com'})
+        self.assertEqual(self.submission.revision, 2)
+
+        metrics = get_autosave_buffer().metrics()
+        self.assertEqual(metrics['queue_depth'], 0)
+        self.assertEqual(metrics['flushes'], 1)
+        self.assertIsNotNone(metrics['last_flush_ms'])
+
+    def test_size_threshold_flushes(self):
+        """Test reaching MAX_PENDING submissions writes the batch"""
+        others = [FormSubmissionFactory(form_version=self.version, answers={}, is_complete=False) for _ in range(2)]
+        for submission in [self.submission, *others]:
+            url = reverse('submission-answers', kwargs={'pk': submission.id})
+            self.patch([{'op': 'set', 'slug': 'rating', 'value': 5}], url=url)
+
+        self.assertEqual(get_autosave_buffer().metrics()['queue_depth'], 0)
+        for submission in [self.submission, *others]:
+            submission.refresh_from_db()
+            self.assertEqual(submission.answers['rating'], 5)
+
+    def test_reads_and_completion_flush_first(self):
+        """Test retrieve and complete see buffered answers"""
+        self.patch([{'op': 'set', 'slug': 'name', 'value': 'John'}])
+
+        response = self.client.get(reverse('submission-detail', kwargs={'pk': self.submission.id}))
+        self.assertEqual(response.data['answers']['name'], 'John')
+
+        self.patch([{'op': 'set', 'slug': 'rating', 'value': 9}])
+        response = self.client.post(reverse('submission-complete', kwargs={'pk': self.submission.id}))
+        self.assertTrue(response.data['is_complete'])
+        self.assertEqual(response.data['answers']['rating'], 9)
+        self.assertEqual(get_autosave_buffer().metrics()['queue_depth'], 0)
+
+    def test_completion_waits_for_patches_queued_after_the_flush(self):
+        """Test complete does not close a submission while a patch for it is still pending"""
+        flush = autosave.flush_autosaves
+        calls = []
+
+        def late_patch(*submission_ids):
+            # A patch from another worker lands just after complete's first flush
+            calls.append(submission_ids)
+            if len(calls) == 1:
+                get_autosave_buffer().add(self.submission.id, {'rating': 4}, [])
+                return 0
+            return flush(*submission_ids)
+
+        with mock.patch('apps.form_builder_api.views.flush_autosaves', late_patch):
+            response = self.client.post(reverse('submission-complete', kwargs={'pk': self.submission.id}))
+
+        self.assertTrue(response.data['is_complete'])
+        self.assertEqual(response.data['answers']['rating'], 4)
+        self.assertEqual(len(calls), 2)
+
+    def test_completed_submissions_are_not_buffered(self):
+        """Test patches to completed submissions are written, and stale buffered ones dropped"""
+        self.patch([{'op': 'set', 'slug': 'name', 'value': 'John'}])
+        FormSubmission.objects.filter(pk=self.submission.pk).update(is_complete=True)
+
+        # The patch queued before completion is flushed first, but not written
+        with self.assertLogs('apps.form_builder_api.autosave', 'WARNING'):
+            response = self.patch([{'op': 'set', 'slug': 'rating', 'value': 3}])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answers, {'name': 'Jane', 'phone': '555', 'rating': 3})
+        self.assertEqual(get_autosave_buffer().metrics()['queue_depth'], 0)
+
+        self.patch([{'op': 'set', 'slug': 'name', 'value': 'John'}])
+        self.assertEqual(get_autosave_buffer().metrics()['queue_depth'], 0)
+
+    def test_conditional_patch_bypasses_buffer(self):
+        """Test a patch with If-Match flushes and writes synchronously"""
+        self.patch([{'op': 'set', 'slug': 'name', 'value': 'John'}])
+
+        response = self.patch([{'op': 'set', 'slug': 'rating', 'value': 3}], HTTP_IF_MATCH='"2"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['revision'], 3)
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answers, {'name': 'John', 'phone': '555', 'rating': 3})
+
+    def test_unknown_submission(self):
+        """Test patches for missing submissions are rejected, not buffered"""
+        url = reverse('submission-answers', kwargs={'pk': '00000000-0000-0000-0000-000000000000'})
+        self.assertEqual(self.patch([], url=url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(get_autosave_buffer().metrics()['queue_depth'], 0)
+
+    def test_metrics_endpoint(self):
+        """Test the metrics endpoint reports the queue depth to staff only"""
+        self.patch([{'op': 'set', 'slug': 'name', 'value': 'John'}])
+        url = reverse('submission-autosave-metrics')
+        self.assertIn(self.client.get(url).status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+
+        self.client.force_authenticate(get_user_model().objects.create_user('member'))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(get_user_model().objects.create_user('staff', is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.data['queue_depth'], 1)
+        self.assertTrue(response.data['enabled'])
+
+    def test_failed_flush_keeps_patches(self):
+        """Test patches stay queued until their write commits"""
+        self.patch([{'op': 'set', 'slug': 'name', 'value': 'John'}])
+        buffer = get_autosave_buffer()
+
+        with mock.patch.object(buffer, '_write', side_effect=RuntimeError('database went away')):
+            with self.assertRaises(RuntimeError):
+                buffer.flush()
+        self.assertEqual(buffer.metrics()['queue_depth'], 1)
+
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(FormSubmission.objects.get(pk=self.submission.pk).answers['name'], 'John')
+        self.assertEqual(buffer.metrics()['queue_depth'], 0)
+
+    def test_patches_queued_during_a_flush_are_kept(self):
+        """Test a patch arriving while its submission is being written is flushed next time"""
+        self.patch([{'op': 'set', 'slug': 'name', 'value': 'John'}])
+        buffer = get_autosave_buffer()
+        write = buffer._write
+
+        def write_then_patch(pending):
+            written = write(pending)
+            buffer.add(self.submission.id, {'rating': 2}, [])
+            return written
+
+        with mock.patch.object(buffer, '_write', write_then_patch):
+            buffer.flush()
+        self.assertEqual(buffer.metrics()['queue_depth'], 1)
+
+        buffer.flush()
+        self.assertEqual(
+            FormSubmission.objects.get(pk=self.submission.pk).answers,
+            {'name': 'John', 'phone': '555', 'rating': 2}
+        )
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        FORMATIC_AUTOSAVE_BUFFER={**BUFFER_SETTINGS, 'BACKEND': 'django'}
+    )
+    def test_shared_backend_survives_restart(self):
+        """Test patches buffered in the shared cache are flushed by a fresh buffer"""
+        self.patch([{'op': 'set', 'slug': 'name', 'value': 'John'}])
+
+        # Simulate a restarted worker
+        restarted = AutosaveBuffer({**BUFFER_SETTINGS, 'BACKEND': 'django'})
+        self.assertEqual(restarted.metrics()['queue_depth'], 1)
+        self.assertEqual(restarted.flush(), 1)
+        self.assertEqual(FormSubmission.objects.get(pk=self.submission.pk).answers['name'], 'John')
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        FORMATIC_AUTOSAVE_BUFFER={**BUFFER_SETTINGS, 'BACKEND': 'django', 'LOCK_TIMEOUT': 0.05}
+    )
+    def test_shared_backend_locks_per_submission(self):
+        """Test a submission locked by another worker does not block the others"""
+        other = FormSubmissionFactory(form_version=self.version, answers={}, is_complete=False)
+        buffer = get_autosave_buffer()
+        buffer.add(other.id, {'name': 'Ann'}, [])
+
+        # Another worker holds the lock of self.submission
+        caches['default'].set(f'formatic:autosave:lock:{self.submission.id}', 'other-worker', None)
+        self.assertEqual(buffer.flush([other.id]), 1)
+        response = self.client.get(reverse('submission-detail', kwargs={'pk': self.submission.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertRaises(TimeoutError):
+            buffer.add(self.submission.id, {'name': 'John'}, [])
+
+    def test_buffered_patches_of_completed_submissions_are_dropped(self):
+        """Test a flush does not write patches to submissions completed meanwhile"""
+        self.patch([{'op': 'set', 'slug': 'name', 'value': 'John'}])
+        FormSubmission.objects.filter(pk=self.submission.pk).update(is_complete=True)
+
+        with self.assertLogs('apps.form_builder_api.autosave', 'WARNING'):
+            self.assertEqual(get_autosave_buffer().flush(), 0)
+        self.assertEqual(FormSubmission.objects.get(pk=self.submission.pk).answers['name'], 'Jane')
+
+    def test_process_local_store_check(self):
+        """Test the system check warns unless pending autosaves are shared by all workers"""
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        cases = [
+            ({**BUFFER_SETTINGS, 'BACKEND': 'local'}, redis, 1),
+            (BUFFER_SETTINGS, locmem, 1),
+            (BUFFER_SETTINGS, redis, 0),
+            ({**BUFFER_SETTINGS, 'ENABLED': False, 'BACKEND': 'local'}, locmem, 0),
+        ]
+        for options, caches_setting, expected in cases:
+            with self.subTest(options=options, caches=caches_setting), \
+                    self.settings(FORMATIC_AUTOSAVE_BUFFER=options, CACHES=caches_setting):
+                warnings = check_autosave_store(None)
+                self.assertEqual([w.id for w in warnings], ['form_builder_api.W001'] * expected)
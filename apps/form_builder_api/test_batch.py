@@ -0,0 +1,152 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.form_builder.models import DynamicForm, Page, Question, QuestionGroup, QuestionType
+from apps.form_builder.ordering import ORDER_GAP
+from .batch import BatchPlan, apply_batch
+
+
+class BatchStructureTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.text_type = QuestionType.objects.create(name="Short Text", slug="short-text")
+        self.form = DynamicForm.objects.create(name="Batch Form", slug="batch-form")
+        self.page = Page.objects.create(form=self.form, name="Existing", slug="existing", order=ORDER_GAP)
+        self.url = reverse('builder-form-batch', kwargs={'slug': self.form.slug})
+
+    def post(self, operations):
+        return self.client.post(self.url, {'operations': operations}, format='json')
+
+    def question(self, slug, **extra):
+        return {
+            'op': 'create',
+            'type': 'question',
+            'data': {'type_slug': 'short-text', 'name': slug.title(), 'slug': slug, 'text': f'{slug}?'},
+            **extra
+        }
+
+    def test_create_tree_with_refs(self):
+        """Test pages, groups and questions can be created and linked by ref"""
+        response = self.post([
+            {'op': 'create', 'type': 'page', 'ref': 'contact', 'data': {'name': 'Contact'}},
+            self.question('email', page='contact'),
+            {'op': 'create', 'type': 'group', 'ref': 'address', 'page': 'contact',
+             'data': {'name': 'Address', 'display_type': 'address'}},
+            self.question('street', group='address'),
+            self.question('city', group='address'),
+            self.question('phone', page='contact', position=1),
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pages = response.data['pages']
+        self.assertEqual([p['name'] for p in pages], ['Existing', 'Contact'])
+        self.assertEqual(pages[1]['slug'], 'contact')
+        self.assertEqual([(q['slug'], q['order']) for q in pages[1]['questions']], [('phone', 1), ('email', 2)])
+        group = pages[1]['question_groups'][0]
+        self.assertEqual(group['order'], 3)
+        self.assertEqual([q['slug'] for q in group['questions']], ['street', 'city'])
+        self.assertEqual(response.data['refs']['address'], group['id'])
+
+    def test_query_count_independent_of_batch_size(self):
+        """Test the number of queries does not grow with the number of operations"""
+        def operations(count, prefix):
+            return [{'op': 'create', 'type': 'page', 'ref': prefix, 'data': {'name': prefix}}] + [
+                self.question(f'{prefix}-{n}', page=prefix) for n in range(count)
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.post(operations(2, 'small')).status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.post(operations(20, 'large')).status_code, status.HTTP_200_OK)
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Question.objects.filter(page__form=self.form).count(), 22)
+
+    def test_update_delete_and_move(self):
+        """Test existing items can be edited, removed and repositioned together"""
+        first = Question.objects.create(page=self.page, type=self.text_type, name="First", slug="first", text="?", order=ORDER_GAP)
+        second = Question.objects.create(page=self.page, type=self.text_type, name="Second", slug="second", text="?", order=2 * ORDER_GAP)
+        doomed = Page.objects.create(form=self.form, name="Doomed", slug="doomed", order=2 * ORDER_GAP)
+        QuestionGroup.objects.create(page=doomed, name="Group", slug="group", order=ORDER_GAP)
+
+        response = self.post([
+            {'op': 'update', 'type': 'question', 'id': str(first.id), 'data': {'text': 'Updated?', 'required': True}},
+            {'op': 'move', 'type': 'question', 'id': str(second.id), 'position': 1},
+            {'op': 'update', 'type': 'page', 'id': str(self.page.id), 'data': {'name': 'Renamed'}},
+            {'op': 'delete', 'type': 'page', 'id': str(doomed.id)},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        self.assertEqual(first.text, 'Updated?')
+        self.assertTrue(first.required)
+        self.assertEqual(response.data['pages'][0]['name'], 'Renamed')
+        self.assertEqual([q['slug'] for q in response.data['pages'][0]['questions']], ['second', 'first'])
+        self.assertFalse(Page.objects.filter(pk=doomed.pk).exists())
+        self.assertFalse(QuestionGroup.objects.filter(page_id=doomed.pk).exists())
+
+    def test_invalid_operation_writes_nothing(self):
+        """Test a failing operation rejects the whole batch and reports its index"""
+        response = self.post([
+            {'op': 'create', 'type': 'page', 'data': {'name': 'New'}},
+            self.question('bad', page='missing-page'),
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['operation'], 1)
+        self.assertEqual(self.form.pages.count(), 1)
+
+    def test_invalid_data_reports_serializer_errors(self):
+        """Test data is validated like the single-item endpoints"""
+        response = self.post([
+            {'op': 'create', 'type': 'question', 'page': str(self.page.id), 'data': {'name': 'No type'}},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('type_slug', response.data['details'])
+
+    def test_unknown_question_type(self):
+        """Test questions need an existing question type"""
+        operation = self.question('odd', page=str(self.page.id))
+        operation['data']['type_slug'] = 'no-such-type'
+
+        response = self.post([operation])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('no-such-type', response.data['error'])
+
+    def test_conflicting_slug_rolls_back(self):
+        """Test database conflicts are reported and nothing is kept"""
+        response = self.post([
+            self.question('fresh', page=str(self.page.id)),
+            {'op': 'create', 'type': 'page', 'data': {'name': 'Existing', 'slug': 'existing'}},
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Question.objects.filter(slug='fresh').exists())
+
+
+class BatchTransactionTests(TransactionTestCase):
+
+    def test_tree_is_planned_inside_the_transaction(self):
+        """Test the tree is loaded (and locked) in the transaction that writes the batch"""
+        form = DynamicForm.objects.create(name="Locked Form", slug="locked-form")
+        load = BatchPlan._load
+        in_transaction = []
+
+        def recording_load(plan):
+            in_transaction.append(connection.in_atomic_block)
+            return load(plan)
+
+        with mock.patch.object(BatchPlan, '_load', recording_load):
+            apply_batch(form, [{'op': 'create', 'type': 'page', 'data': {'name': 'First'}}])
+
+        self.assertEqual(in_transaction, [True])
+        self.assertEqual(form.pages.count(), 1)
@@ -0,0 +1,343 @@
+import gzip
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.form_builder.models import DynamicForm, FormVersion, Page, Question, QuestionType
+from .cache import LocalLRUCache, get_published_form_cache
+
+
+class LocalLRUCacheTests(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted when full"""
+        cache = LocalLRUCache(max_entries=2, timeout=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entries_expire(self):
+        """Test entries are dropped once their TTL has passed"""
+        cache = LocalLRUCache(max_entries=2, timeout=-1)
+        cache.set('a', 1)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+
+class PublishedFormCacheTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        get_published_form_cache().clear()
+
+        self.text_type = QuestionType.objects.create(name="Short Text", slug="short-text")
+        self.form = DynamicForm.objects.create(name="Cached Form", slug="cached-form")
+        self.page = Page.objects.create(form=self.form, name="Page 1", slug="page-1", order=1)
+        Question.objects.create(
+            page=self.page,
+            type=self.text_type,
+            name="Name",
+            slug="name",
+            text="What is your name?",
+            order=1
+        )
+        self.url = reverse('form-detail', kwargs={'slug': self.form.slug})
+
+    def publish(self, notes=''):
+        url = reverse('form-create-version', kwargs={'slug': self.form.slug})
+        response = self.client.post(url, {'notes': notes, 'is_published': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def test_cache_hit_does_not_query_database(self):
+        """Test a second read of a published form is served from the cache"""
+        self.publish()
+        first = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], 'application/json')
+        self.assertEqual(second.data['name'], 'Cached Form')
+
+    def test_manifest_and_pages_from_cache(self):
+        """Test the manifest lists pages without questions and pages are served from the cache"""
+        Page.objects.create(form=self.form, name="Page 2", slug="page-2", order=2, tag_text="New")
+        self.publish()
+        manifest_url = reverse('form-manifest', kwargs={'slug': self.form.slug})
+        page_url = reverse('form-page', kwargs={'slug': self.form.slug, 'page_slug': 'page-1'})
+
+        manifest = self.client.get(manifest_url)
+        self.assertEqual(manifest.status_code, status.HTTP_200_OK)
+        self.assertEqual(manifest.data['version_number'], 1)
+        self.assertEqual([page['slug'] for page in manifest.data['pages']], ['page-1', 'page-2'])
+        self.assertEqual(manifest.data['pages'][1]['tag_text'], 'New')
+        self.assertNotIn('questions', manifest.data['pages'][0])
+
+        with self.assertNumQueries(0):
+            page = self.client.get(page_url)
+        self.assertEqual(page.status_code, status.HTTP_200_OK)
+        self.assertEqual(page.data['questions'][0]['slug'], 'name')
+        self.assertEqual(page['ETag'], manifest['ETag'])
+
+        missing = reverse('form-page', kwargs={'slug': self.form.slug, 'page_slug': 'nope'})
+        self.assertEqual(self.client.get(missing).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_pages_follow_new_publications(self):
+        """Test publishing a new version replaces the cached pages"""
+        self.publish()
+        page_url = reverse('form-page', kwargs={'slug': self.form.slug, 'page_slug': 'page-1'})
+        self.client.get(page_url)
+
+        self.page.name = "Renamed Page"
+        self.page.save()
+        self.publish()
+
+        self.assertEqual(self.client.get(page_url).data['name'], 'Renamed Page')
+
+    def test_pages_pinned_to_a_version(self):
+        """Test ?version= keeps serving the pages of the manifest's version after a new publication"""
+        self.publish()
+        manifest_url = reverse('form-manifest', kwargs={'slug': self.form.slug})
+        page_url = reverse('form-page', kwargs={'slug': self.form.slug, 'page_slug': 'page-1'})
+        first = self.client.get(manifest_url)
+
+        self.page.name = "Renamed Page"
+        self.page.save()
+        self.publish()
+
+        pinned = self.client.get(page_url, {'version': first.data['version_number']})
+        self.assertEqual(pinned.status_code, status.HTTP_200_OK)
+        self.assertEqual(pinned.data['name'], 'Page 1')
+        self.assertEqual(pinned['ETag'], first['ETag'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(page_url, {'version': 1}).data['name'], 'Page 1')
+        self.assertEqual(self.client.get(manifest_url, {'version': 1}).data['version_number'], 1)
+
+        latest = self.client.get(page_url)
+        self.assertEqual(latest.data['name'], 'Renamed Page')
+        self.assertNotEqual(latest['ETag'], first['ETag'])
+
+        self.assertEqual(self.client.get(page_url, {'version': 9}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(manifest_url, {'version': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_version_invalidates_cache(self):
+        """Test publishing a new version replaces the cached definition"""
+        self.publish()
+        self.client.get(self.url)
+
+        self.page.name = "Renamed Page"
+        self.page.save()
+        self.publish()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['pages'][0]['name'], 'Renamed Page')
+
+    def test_publish_endpoint_invalidates_cache(self):
+        """Test publishing an existing version through the API is picked up"""
+        self.publish()
+        self.client.get(self.url)
+
+        self.page.name = "Second Draft"
+        self.page.save()
+        version = self.form.create_version(notes='Draft')
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['pages'][0]['name'], 'Page 1')
+
+        publish_url = reverse('form-version-publish', kwargs={
+            'form_slug': self.form.slug,
+            'pk': version.version_number
+        })
+        self.client.post(publish_url)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['pages'][0]['name'], 'Second Draft')
+
+    def test_deactivated_form_is_not_served_from_cache(self):
+        """Test deactivating a form drops its cached definition"""
+        self.publish()
+        self.client.get(self.url)
+
+        self.form.is_active = False
+        self.form.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_renamed_form_slug_is_invalidated(self):
+        """Test the old slug stops resolving once a form's slug changes"""
+        self.publish()
+        self.client.get(self.url)
+
+        self.form.slug = 'renamed-form'
+        self.form.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+        FORMATIC_PUBLISHED_FORM_CACHE={'BACKEND': 'django'}
+    )
+    def test_shared_backend_populates_local_cache(self):
+        """Test entries stored in the shared backend are reused by a fresh process cache"""
+        self.publish()
+        first = self.client.get(self.url)
+
+        # Simulate another worker with an empty local cache
+        get_published_form_cache().clear()
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+
+
+class EncodedResponseTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        get_published_form_cache().clear()
+
+        self.form = DynamicForm.objects.create(name="Encoded Form", slug="encoded-form")
+        Page.objects.create(form=self.form, name="Page 1", slug="page-1", order=1)
+        self.version = self.form.create_version(notes='v1')
+        self.version.is_published = True
+        self.version.save(update_fields=['is_published'])
+
+    def test_gzip_body_served_when_accepted(self):
+        """Test the stored gzip body is sent to clients accepting gzip"""
+        url = reverse('form-detail', kwargs={'slug': self.form.slug})
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), bytes(self.version.encoded_body))
+
+    def test_identity_body_without_accept_encoding(self):
+        """Test clients that do not accept compression get plain JSON"""
+        url = reverse('form-version-detail', kwargs={
+            'form_slug': self.form.slug,
+            'pk': self.version.version_number
+        })
+        response = self.client.get(url)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(response.content)['name'], 'Encoded Form')
+
+    def test_rejected_encoding_is_not_used(self):
+        """Test q=0 disables a content coding"""
+        url = reverse('form-version-detail', kwargs={
+            'form_slug': self.form.slug,
+            'pk': self.version.version_number
+        })
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_version_without_stored_bodies_is_encoded_on_the_fly(self):
+        """Test versions saved before bodies were stored still render"""
+        FormVersion.objects.filter(pk=self.version.pk).update(
+            encoded_body=None, encoded_body_gzip=None, encoded_body_br=None
+        )
+        url = reverse('form-version-detail', kwargs={
+            'form_slug': self.form.slug,
+            'pk': self.version.version_number
+        })
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(json.loads(gzip.decompress(response.content))['name'], 'Encoded Form')
+
+
+class ConditionalRequestTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        get_published_form_cache().clear()
+
+        self.form = DynamicForm.objects.create(name="Conditional Form", slug="conditional-form")
+        Page.objects.create(form=self.form, name="Page 1", slug="page-1", order=1)
+        self.version = self.form.create_version(notes='v1')
+        self.version.publish()
+        self.latest_url = reverse('form-detail', kwargs={'slug': self.form.slug})
+        self.pinned_url = reverse('form-version-detail', kwargs={
+            'form_slug': self.form.slug,
+            'pk': self.version.version_number
+        })
+
+    def test_latest_sets_validators(self):
+        """Test the latest definition carries an ETag and must be revalidated"""
+        response = self.client.get(self.latest_url)
+
+        self.assertEqual(response['ETag'], self.version.get_etag())
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+
+    def test_latest_if_none_match_returns_304(self):
+        """Test a matching If-None-Match short-circuits with 304"""
+        etag = self.client.get(self.latest_url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.latest_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_latest_etag_changes_on_publish(self):
+        """Test publishing a new version invalidates the client's ETag"""
+        etag = self.client.get(self.latest_url)['ETag']
+        self.form.create_version(notes='v2').publish()
+
+        response = self.client.get(self.latest_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_compressed_representation_has_own_etag(self):
+        """Test gzip responses get a distinct tag that still revalidates"""
+        response = self.client.get(self.pinned_url, HTTP_ACCEPT_ENCODING='gzip')
+        etag = response['ETag']
+        self.assertEqual(etag, self.version.get_etag('gzip'))
+
+        response = self.client.get(self.pinned_url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_pinned_version_is_immutable(self):
+        """Test pinned version URLs are cacheable for a year"""
+        response = self.client.get(self.pinned_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['ETag'], self.version.get_etag())
+
+    def test_pinned_version_304_skips_body(self):
+        """Test a conditional pinned request is answered from a single metadata query"""
+        etag = self.version.get_etag()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.pinned_url, HTTP_IF_NONE_MATCH=f'"other", {etag}')
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_pinned_version_if_modified_since(self):
+        """Test If-Modified-Since is honoured when no ETag is sent"""
+        last_modified = self.client.get(self.pinned_url)['Last-Modified']
+
+        response = self.client.get(self.pinned_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(self.pinned_url, HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 1970 00:00:00 GMT')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
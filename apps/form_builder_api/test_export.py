@@ -0,0 +1,208 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from unittest import skipIf
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.form_builder import export_parquet
+from apps.form_builder.export import question_slugs
+from apps.form_builder.export_parquet import column_kinds, iter_column_batches, question_kinds
+from apps.form_builder.factories import FormSubmissionFactory, PublishedFormVersionFactory
+from apps.form_builder.models import QuestionType
+
+
+FORM_DATA = {
+    'pages': [
+        {
+            'order': 2, 'slug': 'second',
+            'questions': [{'slug': 'comments', 'order': 1}],
+            'question_groups': []
+        },
+        {
+            'order': 1, 'slug': 'first',
+            'questions': [{'slug': 'email', 'order': 2}, {'slug': 'name', 'order': 1}],
+            'question_groups': [{
+                'order': 3,
+                'questions': [{'slug': 'address_city', 'order': 2}, {'slug': 'address_street', 'order': 1}]
+            }]
+        }
+    ]
+}
+
+
+class SubmissionExportTests(TestCase):
+    """Submissions are streamed with one column per question of the version"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.version = PublishedFormVersionFactory(
+            form__slug='export-form', version_number=1, serialized_form_data=FORM_DATA
+        )
+        self.first = FormSubmissionFactory(form_version=self.version, answers={
+            'name': 'Ada', 'address_city': 'London', 'tags': ['a', 'b'], 'comments': 'Hello, "world"'
+        })
+        self.second = FormSubmissionFactory(form_version=self.version, answers={'email': 'b@example.com'})
+        self.url = reverse('form-version-export', kwargs={'form_slug': 'export-form', 'pk': 1})
+
+    def test_question_slugs_follow_display_order(self):
+        """Test answer columns are ordered by page, position and group"""
+        self.assertEqual(
+            question_slugs(FORM_DATA),
+            ['name', 'email', 'address_street', 'address_city', 'comments']
+        )
+
+    def test_csv_export(self):
+        """Test the CSV export streams a header and one row per submission"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('export-form-v1-submissions.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['submission_id'] for row in rows], [str(self.first.id), str(self.second.id)])
+        self.assertEqual(rows[0]['address_city'], 'London')
+        self.assertEqual(rows[0]['comments'], 'Hello, "world"')
+        self.assertEqual(rows[0]['email'], '')
+        self.assertNotIn('tags', rows[0])
+
+    def test_ndjson_export(self):
+        """Test NDJSON keeps native JSON values"""
+        response = self.client.get(self.url, {'export_format': 'ndjson'})
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(records[1]['email'], 'b@example.com')
+        self.assertIsNone(records[1]['name'])
+        self.assertEqual(records[0]['form_version'], 1)
+
+    def test_address_questions_export_their_fields(self):
+        """Test address answers, stored per field, get one column per field"""
+        QuestionType.objects.create(name='Address', slug='address', config={'input_type': 'address'})
+        version = PublishedFormVersionFactory(form__slug='address-form', version_number=1, serialized_form_data={
+            'pages': [{'order': 1, 'slug': 'p', 'questions': [
+                {'slug': 'name', 'order': 1}, {'slug': 'home', 'type': 'address', 'order': 2}
+            ]}]
+        })
+        FormSubmissionFactory(form_version=version, answers={'name': 'Ada', 'home__city': 'London', 'home__country': 'UK'})
+        url = reverse('form-version-export', kwargs={'form_slug': 'address-form', 'pk': 1})
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(self.client.get(url).streaming_content).decode())))
+        self.assertEqual(list(rows[0])[-6:], [
+            'name', 'home__street', 'home__city', 'home__state', 'home__postal_code', 'home__country'
+        ])
+        self.assertEqual((rows[0]['home__city'], rows[0]['home__street']), ('London', ''))
+
+        response = self.client.get(url, {'export_format': 'ndjson'})
+        record = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(record['home__country'], 'UK')
+        self.assertNotIn('home', record)
+
+    def test_unknown_format(self):
+        """Test unsupported formats are rejected"""
+        response = self.client.get(self.url, {'export_format': 'xlsx'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_management_command(self):
+        """Test the command writes the same export to stdout"""
+        out = io.StringIO()
+        call_command('export_submissions', 'export-form', '--format', 'ndjson', '--chunk-size', '1', stdout=out)
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([record['submission_id'] for record in records], [str(self.first.id), str(self.second.id)])
+
+
+class ParquetExportTests(TestCase):
+    """Submissions are converted to typed columns in bounded batches"""
+
+    def setUp(self):
+        question = lambda slug, type_slug, order: {'slug': slug, 'type': type_slug, 'order': order}
+        self.v1 = PublishedFormVersionFactory(form__slug='typed-form', version_number=1, serialized_form_data={
+            'pages': [{'order': 1, 'questions': [
+                question('age', 'number', 1), question('agree', 'yes-no', 2), question('notes', 'number', 3)
+            ], 'question_groups': []}]
+        })
+        self.v2 = PublishedFormVersionFactory(form=self.v1.form, version_number=2, serialized_form_data={
+            'pages': [{'order': 1, 'questions': [
+                question('age', 'number', 1), question('agree', 'yes-no', 2), question('notes', 'short-text', 3)
+            ], 'question_groups': [{'order': 4, 'questions': [question('colour', 'dropdown', 1)]}]}]
+        })
+        for version, answers in [
+            (self.v1, {'age': '42', 'agree': 'yes', 'notes': 7}),
+            (self.v2, {'age': 'old', 'agree': 'no', 'colour': 'red', 'notes': ['x']}),
+            (self.v2, {'agree': True}),
+        ]:
+            FormSubmissionFactory(form_version=version, answers=answers)
+
+    def test_question_kinds(self):
+        """Test column kinds follow question types and fall back to strings on conflict"""
+        self.assertEqual(
+            question_kinds([self.v1, self.v2]),
+            {'age': 'number', 'agree': 'boolean', 'notes': 'string', 'colour': 'category'}
+        )
+
+    def test_batches_are_bounded_and_typed(self):
+        """Test rows are converted per column and split into row groups"""
+        batches = list(iter_column_batches([self.v1, self.v2], row_group_size=2, chunk_size=1))
+
+        self.assertEqual([len(batch['submission_id']) for batch in batches], [2, 1])
+        self.assertEqual(batches[0]['answer_age'], [42.0, None])
+        self.assertEqual(batches[0]['answer_agree'], [True, False])
+        self.assertEqual(batches[0]['answer_notes'], ['7', '["x"]'])
+        self.assertEqual(batches[0]['form_version'], [1, 2])
+        self.assertEqual(batches[1]['answer_colour'], [None])
+
+    def test_address_questions_export_their_fields(self):
+        """Test address questions get one string column per stored field"""
+        QuestionType.objects.create(name='Address', slug='address', config={'input_type': 'address'})
+        version = PublishedFormVersionFactory(form__slug='address-form', serialized_form_data={'pages': [
+            {'order': 1, 'questions': [{'slug': 'home', 'type': 'address', 'order': 1}], 'question_groups': []}
+        ]})
+        FormSubmissionFactory(form_version=version, answers={'home__street': '1 Main St', 'home__city': 'Springfield'})
+
+        fields = ['street', 'city', 'state', 'postal_code', 'country']
+        self.assertEqual(question_kinds([version]), {f'home__{field}': 'string' for field in fields})
+        [batch] = iter_column_batches([version])
+        self.assertEqual(batch['answer_home__street'], ['1 Main St'])
+        self.assertEqual(batch['answer_home__city'], ['Springfield'])
+        self.assertEqual(batch['answer_home__country'], [None])
+
+    def test_question_slugs_do_not_shadow_submission_columns(self):
+        """Test a question named like a submission column keeps both columns"""
+        version = PublishedFormVersionFactory(form__slug='clash-form', serialized_form_data={'pages': [
+            {'order': 1, 'questions': [{'slug': 'is_complete', 'type': 'short-text', 'order': 1}], 'question_groups': []}
+        ]})
+        FormSubmissionFactory(form_version=version, is_complete=False, answers={'is_complete': 'nearly'})
+
+        self.assertEqual(column_kinds([version])['is_complete'], 'boolean')
+        [batch] = iter_column_batches([version])
+        self.assertEqual(batch['is_complete'], [False])
+        self.assertEqual(batch['answer_is_complete'], ['nearly'])
+
+    @skipIf(export_parquet.pyarrow is not None, "pyarrow is installed")
+    def test_command_requires_pyarrow(self):
+        """Test a clear error is raised when pyarrow is unavailable"""
+        with self.assertRaisesMessage(CommandError, 'pyarrow is required'):
+            call_command('export_submissions_parquet', 'typed-form', 'out.parquet')
+
+    @skipIf(export_parquet.pyarrow is None, "pyarrow is not installed")
+    def test_parquet_round_trip(self):
+        """Test the Parquet file has one typed column per question"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'out.parquet')
+            call_command('export_submissions_parquet', 'typed-form', path, '--row-group-size', '2', stdout=io.StringIO())
+            parquet_file = export_parquet.pyarrow.parquet.ParquetFile(path)
+            table = parquet_file.read()
+
+        self.assertEqual(parquet_file.num_row_groups, 2)
+        self.assertEqual(str(table.schema.field('answer_age').type), 'double')
+        self.assertEqual(str(table.schema.field('answer_agree').type), 'bool')
+        self.assertEqual(table.column('answer_agree').to_pylist(), [True, False, True])
@@ -5,6 +5,7 @@ from rest_framework import status
 import json
 
 from apps.form_builder.models import DynamicForm, Page, Question, QuestionType
+from apps.form_builder.ordering import ORDER_GAP
 
 
 class FormBuilderAPITests(TestCase):
@@ -182,11 +183,11 @@ class FormBuilderAPITests(TestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
-        # Check that orders were updated
+        # Check that orders were updated, as rank keys spaced ORDER_GAP apart
         self.page.refresh_from_db()
         page2.refresh_from_db()
-        self.assertEqual(self.page.order, 2)
-        self.assertEqual(page2.order, 1)
+        self.assertEqual(self.page.order, 2 * ORDER_GAP)
+        self.assertEqual(page2.order, ORDER_GAP)
 
     def test_create_question(self):
         """Test creating a new question"""
@@ -300,11 +301,11 @@ class FormBuilderAPITests(TestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
-        # Check that orders were updated
+        # Check that orders were updated, as rank keys spaced ORDER_GAP apart
         question1.refresh_from_db()
         question2.refresh_from_db()
-        self.assertEqual(question1.order, 2)
-        self.assertEqual(question2.order, 1)
+        self.assertEqual(question1.order, 2 * ORDER_GAP)
+        self.assertEqual(question2.order, ORDER_GAP)
 
     def test_create_question_invalid_type(self):
         """Test creating question with invalid type fails"""
@@ -0,0 +1,221 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.form_builder.factories import FormSubmissionFactory, PublishedFormVersionFactory
+from apps.form_builder.models import FormSubmission
+from .logic import LogicPlan, get_logic_plan
+
+
+def condition(slug, operator, value=None):
+    return {'question_slug': slug, 'operator': operator, 'value': value}
+
+
+def rule(conditions, *actions, logical_operator='AND'):
+    return {
+        'conditions': conditions,
+        'logical_operator': logical_operator,
+        'actions': [action if isinstance(action, dict) else {'type': action} for action in actions]
+    }
+
+
+FORM_DATA = {
+    'pages': [
+        {
+            'slug': 'about',
+            'order': 1,
+            'questions': [
+                {'slug': 'employed', 'type': 'yes-no', 'order': 1},
+                {
+                    'slug': 'employer', 'type': 'short-text', 'order': 2,
+                    'conditional_logic': {
+                        'rules': [rule([condition('employed', 'equals', 'yes')], 'show', 'require')],
+                        'default_action': 'hide'
+                    }
+                },
+                {
+                    'slug': 'plan', 'type': 'dropdown', 'order': 3, 'required': True,
+                    'conditional_logic': {'rules': [
+                        rule(
+                            [condition('employer', 'contains', 'Corp'), condition('employed', 'equals', 'no')],
+                            'unrequire', {'type': 'set_options', 'options': {'en': [{'value': 'team'}]}},
+                            logical_operator='OR'
+                        )
+                    ]}
+                },
+                {'slug': 'secret', 'type': 'hidden', 'order': 4},
+            ],
+            'question_groups': [{'order': 5, 'questions': [
+                {
+                    'slug': 'note', 'type': 'short-text', 'order': 1,
+                    'disabled_condition': {'field': 'employer', 'operator': 'is_empty'}
+                }
+            ]}]
+        },
+        {
+            'slug': 'income',
+            'order': 2,
+            'disabled_condition': {'field': 'employed', 'operator': 'not_equals', 'value': 'yes'},
+            'tag_display_condition': {'field': 'salary', 'operator': 'is_not_empty', 'value': ''},
+            'questions': [{'slug': 'salary', 'type': 'number', 'order': 1, 'required': True}]
+        }
+    ]
+}
+
+
+class LogicPlanTests(TestCase):
+
+    def setUp(self):
+        self.plan = LogicPlan(FORM_DATA)
+
+    def test_initial_state(self):
+        """Test state with no answers follows default actions and conditions"""
+        state = self.plan.evaluate({})
+
+        self.assertFalse(state.questions['employer']['visible'])
+        self.assertTrue(state.questions['plan']['required'])
+        self.assertIsNone(state.questions['plan']['options'])
+        self.assertFalse(state.questions['secret']['visible'])
+        self.assertTrue(state.questions['note']['disabled'])
+        self.assertEqual(state.pages['income'], {'visible': True, 'disabled': True, 'tag_visible': False})
+        # Questions on a disabled page are disabled and not required
+        self.assertTrue(state.questions['salary']['disabled'])
+        self.assertFalse(state.is_required('salary'))
+
+    def test_matching_rules(self):
+        """Test the first matching rule decides visibility, required-ness and options"""
+        state = self.plan.evaluate({'employed': 'yes', 'employer': 'Acme Corp', 'salary': 10})
+
+        self.assertTrue(state.is_required('employer'))
+        self.assertFalse(state.questions['plan']['required'])
+        self.assertEqual(state.questions['plan']['options'], [{'value': 'team'}])
+        self.assertFalse(state.questions['note']['disabled'])
+        self.assertEqual(state.pages['income'], {'visible': True, 'disabled': False, 'tag_visible': True})
+        self.assertTrue(state.is_required('salary'))
+
+    def test_operators_follow_client_semantics(self):
+        """Test equals is strict and is_empty treats falsy values as empty"""
+        plan = LogicPlan({'pages': [{'slug': 'p', 'order': 1, 'questions': [
+            {'slug': 'a', 'order': 1, 'conditional_logic': {'rules': [rule([condition('x', 'equals', 1)], 'hide')]}},
+            {'slug': 'b', 'order': 2, 'conditional_logic': {'rules': [rule([condition('x', 'is_empty')], 'hide')]}},
+            {'slug': 'c', 'order': 3, 'conditional_logic': {'rules': [rule([condition('x', 'contains', 'b')], 'hide')]}},
+        ]}]})
+
+        def hidden(value):
+            questions = plan.evaluate({'x': value}).questions
+            return {slug for slug, question in questions.items() if not question['visible']}
+
+        self.assertEqual(hidden(1), {'a'})
+        self.assertEqual(hidden(1.0), {'a'})
+        self.assertEqual(hidden('1'), set())
+        self.assertEqual(hidden(True), set())
+        self.assertEqual(hidden(0), {'b'})
+        self.assertEqual(hidden(''), {'b'})
+        self.assertEqual(hidden([]), set())
+        self.assertEqual(hidden(['a', 'b']), {'c'})
+
+    def test_update_reevaluates_dependents_only(self):
+        """Test a changed answer re-evaluates only the nodes that read it"""
+        answers = {}
+        state = self.plan.evaluate(answers)
+
+        answers['employed'] = 'yes'
+        pages, questions = state.update(answers, ['employed'])
+        self.assertEqual(pages, {'income'})
+        self.assertEqual(questions, {'employer', 'salary'})
+        self.assertEqual(state.as_dict(), self.plan.evaluate(answers).as_dict())
+
+        answers['salary'] = 5
+        pages, questions = state.update(answers, ['salary'])
+        self.assertEqual(pages, {'income'})
+        self.assertEqual(questions, set())
+        self.assertTrue(state.pages['income']['tag_visible'])
+
+        self.assertEqual(state.update(answers, ['unrelated']), (set(), set()))
+        self.assertEqual(
+            [node.slug for node in self.plan.dependents['employer']], ['plan', 'note']
+        )
+
+    def test_plan_is_cached_per_version(self):
+        """Test the plan is compiled once per version"""
+        version = PublishedFormVersionFactory(serialized_form_data=FORM_DATA)
+
+        plan = get_logic_plan(version.id)
+        with self.assertNumQueries(0):
+            self.assertIs(get_logic_plan(version.id), plan)
+
+
+    def test_plan_uses_the_stored_dependency_graph(self):
+        """Test a version's plan indexes its rules by the graph stored on the version"""
+        version = PublishedFormVersionFactory(serialized_form_data=FORM_DATA)
+
+        with mock.patch('apps.form_builder_api.logic.build_dependency_graph') as build:
+            plan = get_logic_plan(version.id)
+        build.assert_not_called()
+        self.assertEqual(
+            {slug: [node.slug for node in nodes] for slug, nodes in plan.dependents.items()},
+            {slug: [node.slug for node in nodes] for slug, nodes in self.plan.dependents.items()}
+        )
+
+
+class NextPageTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        data = {'pages': FORM_DATA['pages'] + [
+            {
+                'slug': 'extras', 'order': 3, 'questions': [],
+                'conditional_logic': {'rules': [rule([condition('plan', 'equals', 'team')], 'hide')]}
+            }
+        ]}
+        self.version = PublishedFormVersionFactory(serialized_form_data=data)
+        self.submission = FormSubmissionFactory(form_version=self.version, answers={}, is_complete=False)
+        self.url = reverse('submission-next-page', kwargs={'pk': self.submission.id})
+
+    def test_first_page(self):
+        """Test without a current page the first page is returned"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['page']['slug'], 'about')
+        self.assertEqual(response.data['position'], 1)
+        self.assertEqual(response.data['page_count'], 3)
+        self.assertFalse(response.data['is_last'])
+
+    def test_skips_disabled_and_hidden_pages(self):
+        """Test pages are evaluated against the stored answers"""
+        response = self.client.get(self.url, {'page': 'about'})
+        self.assertEqual(response.data['page']['slug'], 'extras')
+        self.assertTrue(response.data['is_last'])
+
+        self.submission.answers = {'employed': 'yes', 'plan': 'team'}
+        self.submission.save()
+        response = self.client.get(self.url, {'page': 'about'})
+        self.assertEqual(response.data['page']['slug'], 'income')
+        self.assertEqual(response.data['page']['questions'][0]['slug'], 'salary')
+        self.assertTrue(response.data['is_last'])
+
+        response = self.client.get(self.url, {'page': 'income'})
+        self.assertIsNone(response.data['page'])
+
+    def test_unknown_page(self):
+        """Test an unknown current page is rejected"""
+        response = self.client.get(self.url, {'page': 'nope'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_submission(self):
+        """Test missing and malformed submission ids are not found"""
+        for pk in ('00000000-0000-0000-0000-000000000000', 'not-a-uuid'):
+            response = self.client.get(reverse('submission-next-page', kwargs={'pk': pk}))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_answers_that_are_not_an_object(self):
+        """Test stored answers that are not a JSON object count as no answers"""
+        FormSubmission.objects.filter(pk=self.submission.pk).update(answers=['yes'])
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['page']['slug'], 'about')
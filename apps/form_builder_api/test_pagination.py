@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.form_builder.factories import FormSubmissionFactory, PublishedFormVersionFactory
+
+
+class SubmissionPaginationTests(TestCase):
+    """Submission lists are cut with keyset cursors on (created_datetime, id)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.version = PublishedFormVersionFactory(form__slug='paged-form')
+        now = timezone.now()
+        # Pairs share a timestamp so the id tie-breaker is exercised
+        self.submissions = [
+            FormSubmissionFactory(form_version=self.version, created_datetime=now - timedelta(minutes=i // 2))
+            for i in range(7)
+        ]
+        self.expected = [
+            str(s.id) for s in sorted(self.submissions, key=lambda s: (s.created_datetime, s.id), reverse=True)
+        ]
+        self.url = reverse('submission-list')
+
+    def test_walks_every_submission_once(self):
+        """Test following next links visits each submission exactly once, newest first"""
+        seen = []
+        response = self.client.get(self.url, {'form_slug': 'paged-form', 'page_size': 3})
+        self.assertIsNone(response.data['previous'])
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_link(self):
+        """Test previous links return the preceding page in the same order"""
+        first = self.client.get(self.url, {'page_size': 3})
+        second = self.client.get(first.data['next'])
+
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual([item['id'] for item in back.data['results']], self.expected[:3])
+        self.assertIsNone(back.data['previous'])
+
+    def test_rows_created_mid_walk_do_not_shift_pages(self):
+        """Test newer submissions do not push already-seen rows onto the next page"""
+        first = self.client.get(self.url, {'page_size': 3})
+        FormSubmissionFactory(form_version=self.version)
+
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual([item['id'] for item in second.data['results']], self.expected[3:6])
+
+    @override_settings(FORMATIC_SUBMISSION_PAGINATION={'PAGE_SIZE': 2, 'MAX_PAGE_SIZE': 4})
+    def test_page_size_is_capped(self):
+        """Test the default and maximum page sizes come from settings"""
+        self.assertEqual(len(self.client.get(self.url).data['results']), 2)
+        self.assertEqual(len(self.client.get(self.url, {'page_size': 100}).data['results']), 4)
+
+    def test_query_count_independent_of_page_size(self):
+        """Test form names are joined in rather than loaded per row"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'page_size': 7})
+
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertEqual(response.data['results'][0]['form_name'], self.version.form.name)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
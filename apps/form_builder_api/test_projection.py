@@ -0,0 +1,123 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.form_builder.factories import FormSubmissionFactory
+from .projection import Projection, parse_paths
+from .test_query_counts import build_form_tree
+
+
+def selected(queries, table, column):
+    """Whether any captured query reads ``table.column``"""
+    return any(f'"{table}"."{column}"' in query['sql'] for query in queries)
+
+
+class ProjectionTests(TestCase):
+
+    def test_parse_paths(self):
+        """Test dotted names nest and a whole field wins over its nested fields"""
+        self.assertEqual(
+            parse_paths('id, pages.slug,pages.questions.slug,,pages.questions'),
+            {'id': None, 'pages': {'slug': None, 'questions': None}}
+        )
+
+    def test_apply(self):
+        """Test fields and exclude prune nested dicts and lists"""
+        data = {'id': 1, 'pages': [{'slug': 'a', 'config': {}, 'questions': [{'slug': 'q', 'config': {}}]}]}
+
+        projection = Projection(fields=parse_paths('pages.slug,pages.questions'))
+        self.assertEqual(projection.apply(data), {'pages': [{'slug': 'a', 'questions': [{'slug': 'q', 'config': {}}]}]})
+
+        projection = Projection(exclude=parse_paths('id,pages.questions.config'))
+        self.assertEqual(projection.apply(data), {'pages': [{'slug': 'a', 'config': {}, 'questions': [{'slug': 'q'}]}]})
+
+
+class ProjectedEndpointTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.form = build_form_tree("Projected Form", page_count=2, questions_per_page=3)
+
+    def test_form_list_without_pages_skips_the_tree(self):
+        """Test listing only form fields issues a single query"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('form-list'), {'fields': 'id,name'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {'id', 'name'})
+
+    def test_nested_fields_keep_positions(self):
+        """Test nested fields are narrowed and still numbered 1..n"""
+        url = reverse('builder-form-detail', kwargs={'slug': self.form.slug})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'name,pages.slug,pages.questions.slug,pages.questions.order'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'name', 'pages'})
+        page = response.data['pages'][0]
+        self.assertEqual(set(page), {'slug', 'questions'})
+        self.assertEqual([q['order'] for q in page['questions']], [1, 2, 3])
+        self.assertEqual(set(page['questions'][0]), {'slug', 'order'})
+        self.assertFalse(selected(queries, 'form_builder_question', 'config'))
+        self.assertFalse(selected(queries, 'form_builder_page', 'conditional_logic'))
+
+    def test_exclude_nested_fields(self):
+        """Test excluded nested columns are not returned, and not fetched unless read elsewhere"""
+        url = reverse('form-draft', kwargs={'slug': self.form.slug})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'exclude': (
+                'pages.questions.config,pages.questions.validation,pages.question_groups.questions.validation'
+            )})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        page = response.data['pages'][0]
+        self.assertNotIn('config', page['questions'][0])
+        self.assertIn('text', page['questions'][0])
+        grouped = page['question_groups'][0]['questions'][0]
+        self.assertNotIn('validation', grouped)
+        self.assertIn('config', grouped)
+        self.assertEqual(page['question_groups'][0]['order'], 4)
+        self.assertFalse(selected(queries, 'form_builder_question', 'validation'))
+        # Grouped questions still show their config
+        self.assertTrue(selected(queries, 'form_builder_question', 'config'))
+
+    def test_version_list_defers_form_data(self):
+        """Test version listings only fetch the definition when it is requested"""
+        self.form.create_version()
+        url = reverse('form-versions', kwargs={'form_slug': self.form.slug})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'id,version_number,form_name'})
+
+        self.assertEqual(response.data, [{
+            'id': response.data[0]['id'], 'form_name': self.form.name, 'version_number': 1
+        }])
+        self.assertFalse(selected(queries, 'form_builder_formversion', 'serialized_form_data'))
+
+        response = self.client.get(reverse('form-versions', kwargs={'slug': self.form.slug}), {'exclude': 'notes'})
+        self.assertIn('serialized_form_data', response.data[0])
+        self.assertNotIn('notes', response.data[0])
+
+    def test_submission_fields(self):
+        """Test submission listings and details honour fields"""
+        submission = FormSubmissionFactory(answers={'a': 1})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('submission-list'), {'fields': 'id,is_complete'})
+
+        self.assertEqual(response.data['results'], [{'id': str(submission.id), 'is_complete': submission.is_complete}])
+        self.assertFalse(selected(queries, 'form_builder_formsubmission', 'answers'))
+        self.assertFalse(selected(queries, 'form_builder_formversion', 'serialized_form_data'))
+
+        response = self.client.get(
+            reverse('submission-detail', kwargs={'pk': submission.id}), {'exclude': 'ip_address,user_email'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['answers'], {'a': 1})
+        self.assertNotIn('ip_address', response.data)
+        self.assertEqual(response['ETag'], f'"{submission.revision}"')
@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -153,6 +155,53 @@ class FormPublishingTests(TestCase):
         version.refresh_from_db()
         self.assertTrue(version.is_published)
 
+    def test_circular_logic_blocks_publishing(self):
+        """Test versions whose conditions depend on each other cannot be published"""
+        other = Question.objects.create(
+            page=self.page, type=self.text_type, name="Other", slug="other", text="Other?", order=2,
+            conditional_logic={'rules': [{
+                'conditions': [{'question_slug': 'test-question', 'operator': 'is_empty'}],
+                'actions': [{'type': 'hide'}]
+            }]}
+        )
+        self.question.disabled_condition = {'field': other.slug, 'operator': 'is_empty'}
+        self.question.save()
+
+        url = reverse('form-create-version', kwargs={'slug': self.form.slug})
+        response = self.client.post(url, {'is_published': True}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'], [{'type': 'cycle', 'questions': ['test-question', 'other']}])
+        self.assertFalse(FormVersion.objects.filter(form=self.form).exists())
+
+        version = self.form.create_version()
+        url = reverse('form-version-publish', kwargs={'form_slug': self.form.slug, 'pk': version.version_number})
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_400_BAD_REQUEST)
+        version.refresh_from_db()
+        self.assertFalse(version.is_published)
+
+    def test_get_version_dependencies(self):
+        """Test the dependency graph computed at version creation is returned"""
+        Question.objects.create(
+            page=self.page, type=self.text_type, name="Other", slug="other", text="Other?", order=2,
+            disabled_condition={'field': 'test-question', 'operator': 'is_empty'}
+        )
+        version = self.form.create_version()
+        url = reverse('form-version-dependencies', kwargs={
+            'form_slug': self.form.slug,
+            'pk': version.version_number
+        })
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'dependents': {'test-question': ['other']},
+            'page_dependents': {},
+            'order': ['test-question', 'other'],
+            'cycles': []
+        })
+
     def test_get_published_form_structure(self):
         """Test retrieving published form structure for rendering"""
         # Create and publish a version
@@ -200,6 +249,35 @@ class FormPublishingTests(TestCase):
         self.assertTrue(response.data[0]['is_published'])
         self.assertFalse(response.data[1]['is_published'])
 
+    def test_list_version_summaries(self):
+        """Test summary listings page through versions without loading their data"""
+        for number in range(3):
+            self.form.create_version(notes=f'Version {number + 1}')
+        url = reverse('form-versions', kwargs={'form_slug': self.form.slug})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'summary': 'true', 'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([v['version_number'] for v in response.data['results']], [3, 2])
+        self.assertEqual(response.data['results'][0]['page_count'], 1)
+        self.assertEqual(response.data['results'][0]['question_count'], 1)
+        self.assertGreater(response.data['results'][0]['body_size'], 0)
+        self.assertNotIn('serialized_form_data', response.data['results'][0])
+        self.assertFalse(any('serialized_form_data' in query['sql'] for query in queries))
+        self.assertIsNone(response.data['previous'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([v['version_number'] for v in response.data['results']], [1])
+        self.assertIsNone(response.data['next'])
+
+        # The form's versions action supports the same mode, and projections
+        response = self.client.get(
+            reverse('form-versions', kwargs={'slug': self.form.slug}),
+            {'summary': '1', 'fields': 'version_number,question_count'}
+        )
+        self.assertEqual(response.data['results'][0], {'version_number': 3, 'question_count': 1})
+
     def test_get_specific_version(self):
         """Test retrieving a specific version by version number"""
         version = self.form.create_version(notes='Specific version test')
@@ -0,0 +1,458 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.form_builder.models import DynamicForm, Page, Question, QuestionGroup, QuestionGroupTemplate, QuestionType
+from apps.form_builder.ordering import ORDER_GAP
+
+
+def build_form_tree(name, page_count, questions_per_page):
+    """Create a form with direct and grouped questions on every page"""
+    form = DynamicForm.objects.create(name=name)
+    question_type, _ = QuestionType.objects.get_or_create(slug='short-text', defaults={'name': 'Short Text'})
+    for p in range(1, page_count + 1):
+        page = Page.objects.create(form=form, name=f"Page {p}", order=p)
+        group = QuestionGroup.objects.create(page=page, name=f"Group {p}", order=questions_per_page + 1)
+        for q in range(1, questions_per_page + 1):
+            Question.objects.create(
+                page=page, type=question_type, name=f"Question {q}",
+                slug=f"p{p}-q{q}", text="Text", order=q
+            )
+            Question.objects.create(
+                question_group=group, type=question_type, name=f"Grouped {q}",
+                slug=f"p{p}-g{q}", text="Text", order=q
+            )
+    return form
+
+
+class DraftQueryCountTests(TestCase):
+    """Draft and builder reads must not scale queries with form size"""
+
+    # form + pages + page questions + groups + grouped questions
+    TREE_QUERIES = 5
+
+    def setUp(self):
+        self.client = APIClient()
+        self.small_form = build_form_tree("Small Form", page_count=1, questions_per_page=1)
+        self.large_form = build_form_tree("Large Form", page_count=5, questions_per_page=4)
+
+    def assertConstantQueries(self, url_name, expected):
+        for form in (self.small_form, self.large_form):
+            url = reverse(url_name, kwargs={'slug': form.slug})
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_draft_query_count(self):
+        """Test FormViewSet.draft loads the tree in a fixed number of queries"""
+        response = self.assertConstantQueries('form-draft', self.TREE_QUERIES)
+
+        self.assertEqual(len(response.data['pages']), 5)
+        self.assertEqual(len(response.data['pages'][0]['questions']), 4)
+        self.assertEqual(len(response.data['pages'][0]['question_groups'][0]['questions']), 4)
+
+    def test_builder_retrieve_query_count(self):
+        """Test FormBuilderFormViewSet.retrieve loads the tree in a fixed number of queries"""
+        response = self.assertConstantQueries('builder-form-detail', self.TREE_QUERIES)
+
+        first_question = response.data['pages'][0]['questions'][0]
+        self.assertEqual(first_question['type']['slug'], 'short-text')
+        self.assertEqual([q['order'] for q in response.data['pages'][0]['questions']], [1, 2, 3, 4])
+
+    def test_form_list_query_count(self):
+        """Test listing forms does not issue queries per form"""
+        with self.assertNumQueries(self.TREE_QUERIES):
+            response = self.client.get(reverse('form-list'))
+
+        self.assertEqual(len(response.data), 2)
+
+    def test_builder_page_list_query_count(self):
+        """Test the builder page list prefetches questions and groups"""
+        url = reverse('builder-pages', kwargs={'form_slug': self.large_form.slug})
+
+        # pages + page questions + groups + grouped questions + page positions
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.data), 5)
+
+
+class ReorderTests(TestCase):
+    """Reorder endpoints validate the whole sibling set and write in bulk"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.small_form = build_form_tree("Small Form", page_count=2, questions_per_page=2)
+        self.large_form = build_form_tree("Large Form", page_count=2, questions_per_page=20)
+
+    def reverse_question_orders(self, page):
+        questions = list(page.questions.order_by('order'))
+        return [
+            {'id': str(question.id), 'order': len(questions) - index}
+            for index, question in enumerate(questions)
+        ]
+
+    def post_question_reorder(self, page, question_orders):
+        url = reverse('builder-questions-reorder', kwargs={
+            'form_slug': page.form.slug,
+            'page_pk': page.id
+        })
+        return self.client.post(url, {'question_orders': question_orders}, format='json')
+
+    def test_reorder_query_count_independent_of_size(self):
+        """Test reordering 2 or 20 questions issues the same number of queries"""
+        small_page = self.small_form.pages.get(order=1)
+        large_page = self.large_form.pages.get(order=1)
+        small_orders = self.reverse_question_orders(small_page)
+        large_orders = self.reverse_question_orders(large_page)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            response = self.post_question_reorder(small_page, small_orders)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(len(small_queries)):
+            response = self.post_question_reorder(large_page, large_orders)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        slugs = list(large_page.questions.order_by('order').values_list('slug', flat=True))
+        self.assertEqual(slugs, [f"p1-q{q}" for q in range(20, 0, -1)])
+
+    def test_partial_reorder_rejected(self):
+        """Test a reorder that leaves out a sibling is rejected without changes"""
+        page = self.small_form.pages.get(order=1)
+        question_orders = self.reverse_question_orders(page)[:1]
+
+        response = self.post_question_reorder(page, question_orders)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Missing ids', response.data['error'])
+        self.assertEqual(list(page.questions.order_by('order').values_list('slug', flat=True)), ['p1-q1', 'p1-q2'])
+
+    def test_duplicate_orders_rejected(self):
+        """Test two siblings cannot be given the same order"""
+        page = self.small_form.pages.get(order=1)
+        question_orders = [{'id': str(q.id), 'order': 1} for q in page.questions.all()]
+
+        response = self.post_question_reorder(page, question_orders)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_foreign_id_rejected(self):
+        """Test ids from another page are not accepted"""
+        page = self.small_form.pages.get(order=1)
+        other = self.small_form.pages.get(order=2).questions.first()
+        question_orders = self.reverse_question_orders(page) + [{'id': str(other.id), 'order': 3}]
+
+        response = self.post_question_reorder(page, question_orders)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Unknown ids', response.data['error'])
+
+    def test_reorder_pages(self):
+        """Test pages are swapped through the bulk path"""
+        first, second = self.small_form.pages.order_by('order')
+        url = reverse('builder-pages-reorder', kwargs={'form_slug': self.small_form.slug})
+
+        response = self.client.post(url, {'page_orders': [
+            {'id': str(first.id), 'order': 2},
+            {'id': str(second.id), 'order': 1}
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(self.small_form.pages.order_by('order')), [second, first])
+
+    def test_reorder_grouped_questions(self):
+        """Test questions inside a group are reordered"""
+        page = self.small_form.pages.get(order=1)
+        group = page.question_groups.get()
+        first, second = group.questions.order_by('order')
+        url = reverse('builder-grouped-questions-reorder', kwargs={
+            'form_slug': self.small_form.slug,
+            'page_pk': page.id,
+            'group_pk': group.id
+        })
+
+        response = self.client.post(url, {'question_orders': [
+            {'id': str(first.id), 'order': 2},
+            {'id': str(second.id), 'order': 1}
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(group.questions.order_by('order')), [second, first])
+
+    def test_reorder_groups_keeps_interleaved_orders(self):
+        """Test reordering groups leaves them in the places they hold among the questions"""
+        page = self.small_form.pages.get(order=1)
+        group = page.question_groups.get()
+        url = reverse('builder-question-groups-reorder', kwargs={
+            'form_slug': self.small_form.slug,
+            'page_pk': page.id
+        })
+
+        response = self.client.post(url, {'group_orders': [
+            {'id': str(group.id), 'order': 5}
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        page_data = self.client.get(reverse('builder-page-detail', kwargs={
+            'form_slug': self.small_form.slug,
+            'pk': page.id
+        })).data
+        self.assertEqual([q['order'] for q in page_data['questions']], [1, 2])
+        self.assertEqual(page_data['question_groups'][0]['order'], 3)
+
+    def test_reorder_questions_around_a_group(self):
+        """Test positions sent for a page's questions keep groups between them in place"""
+        page = self.small_form.pages.get(order=1)
+        question_type = QuestionType.objects.get(slug='short-text')
+        Question.objects.filter(page=page).delete()
+        first = Question.objects.create(page=page, type=question_type, name="A", slug="a", text="?", order=1)
+        group = page.question_groups.get()
+        group.order = 2
+        group.save()
+        last = Question.objects.create(page=page, type=question_type, name="B", slug="b", text="?", order=3)
+
+        response = self.post_question_reorder(page, [
+            {'id': str(last.id), 'order': 1},
+            {'id': str(first.id), 'order': 2}
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        page_data = self.client.get(reverse('builder-page-detail', kwargs={
+            'form_slug': self.small_form.slug,
+            'pk': page.id
+        })).data
+        self.assertEqual([(q['slug'], q['order']) for q in page_data['questions']], [('b', 1), ('a', 3)])
+        self.assertEqual(page_data['question_groups'][0]['order'], 2)
+        group.refresh_from_db()
+        first.refresh_from_db()
+        self.assertEqual((group.order, first.order), (2 * ORDER_GAP, 3 * ORDER_GAP))
+
+
+class MoveTests(TestCase):
+    """Moving one item rewrites only that item and the API keeps dense positions"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.form = DynamicForm.objects.create(name="Move Form")
+        self.pages = [
+            Page.objects.create(form=self.form, name=f"Page {p}", order=p * ORDER_GAP)
+            for p in range(1, 4)
+        ]
+
+    def move_page(self, page, position):
+        url = reverse('builder-page-move', kwargs={'form_slug': self.form.slug, 'pk': page.id})
+        return self.client.post(url, {'position': position}, format='json')
+
+    def test_move_writes_single_row(self):
+        """Test moving a page into a gap issues one UPDATE"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move_page(self.pages[2], 1)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['order'], 1)
+        updates = [q for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(self.form.pages.order_by('order').values_list('name', flat=True)),
+            ['Page 3', 'Page 1', 'Page 2']
+        )
+
+    def test_move_respreads_when_keys_are_adjacent(self):
+        """Test a move between adjacent keys spreads the sequence out first"""
+        Page.objects.filter(form=self.form).delete()
+        pages = [Page.objects.create(form=self.form, name=f"Dense {p}", order=p) for p in range(1, 4)]
+
+        response = self.move_page(pages[2], 2)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        orders = list(self.form.pages.order_by('order').values_list('name', 'order'))
+        self.assertEqual([name for name, _ in orders], ['Dense 1', 'Dense 3', 'Dense 2'])
+        self.assertEqual([order for _, order in orders], [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP])
+
+    def test_positions_are_dense(self):
+        """Test builder responses and versions report 1..n instead of rank keys"""
+        self.move_page(self.pages[0], 3)
+
+        response = self.client.get(reverse('builder-form-detail', kwargs={'slug': self.form.slug}))
+        self.assertEqual(
+            [(p['name'], p['order']) for p in response.data['pages']],
+            [('Page 2', 1), ('Page 3', 2), ('Page 1', 3)]
+        )
+
+        response = self.client.get(reverse('builder-pages', kwargs={'form_slug': self.form.slug}))
+        self.assertEqual([p['order'] for p in response.data], [1, 2, 3])
+
+        snapshot = self.form.create_version().serialized_form_data
+        self.assertEqual([p['order'] for p in snapshot['pages']], [1, 2, 3])
+
+    def test_question_moves_between_groups(self):
+        """Test page questions and groups share one position sequence"""
+        page = self.pages[0]
+        question_type = QuestionType.objects.create(name="Short Text", slug="short-text")
+        first = Question.objects.create(page=page, type=question_type, name="First", slug="first", text="?", order=ORDER_GAP)
+        QuestionGroup.objects.create(page=page, name="Group", slug="group", order=2 * ORDER_GAP)
+        last = Question.objects.create(page=page, type=question_type, name="Last", slug="last", text="?", order=3 * ORDER_GAP)
+
+        url = reverse('builder-question-move', kwargs={
+            'form_slug': self.form.slug,
+            'page_pk': page.id,
+            'pk': last.id
+        })
+        response = self.client.post(url, {'position': 2}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['order'], 2)
+        page_data = self.client.get(reverse('builder-page-detail', kwargs={
+            'form_slug': self.form.slug,
+            'pk': page.id
+        })).data
+        self.assertEqual([q['order'] for q in page_data['questions']], [1, 2])
+        self.assertEqual(page_data['question_groups'][0]['order'], 3)
+        self.assertLess(first.order, Question.objects.get(pk=last.pk).order)
+
+    def test_invalid_position_rejected(self):
+        """Test positions must be positive integers"""
+        response = self.move_page(self.pages[0], 0)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DuplicateTests(TestCase):
+    """Duplicating a form copies the whole tree with bulk inserts"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def duplicate(self, form):
+        return self.client.post(reverse('builder-form-duplicate', kwargs={'slug': form.slug}))
+
+    def test_duplicate_query_count_independent_of_size(self):
+        """Test copying 1 or 5 pages issues the same number of queries"""
+        small_form = build_form_tree("Small Form", page_count=1, questions_per_page=1)
+        # Kept under SQLite's bind-parameter limit, which splits bulk inserts
+        large_form = build_form_tree("Large Form", page_count=5, questions_per_page=3)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            response = self.duplicate(small_form)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(len(small_queries)):
+            response = self.duplicate(large_form)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['pages']), 5)
+
+    def test_duplicate_copies_groups_templates_and_translations(self):
+        """Test groups, template links, grouped questions and translations are copied"""
+        form = build_form_tree("Original", page_count=1, questions_per_page=2)
+        page = form.pages.get()
+        page.name_fr = "Page française"
+        page.save()
+        template = QuestionGroupTemplate.objects.create(name="Address", slug="address")
+        group = page.question_groups.get()
+        group.template = template
+        group.save()
+        grouped = group.questions.order_by('order').first()
+        grouped.text_fr = "Texte"
+        grouped.save()
+
+        response = self.duplicate(form)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        copy = DynamicForm.objects.get(slug='original-copy')
+        copied_page = copy.pages.get()
+        self.assertNotEqual(copied_page.pk, page.pk)
+        self.assertEqual(copied_page.name_fr, "Page française")
+        copied_group = copied_page.question_groups.get()
+        self.assertNotEqual(copied_group.pk, group.pk)
+        self.assertEqual(copied_group.template, template)
+        self.assertEqual(
+            list(copied_group.questions.order_by('order').values_list('slug', 'text_fr')),
+            [('p1-g1-copy', "Texte"), ('p1-g2-copy', None)]
+        )
+        self.assertEqual(copied_page.questions.count(), 2)
+        self.assertEqual(len(response.data['pages'][0]['question_groups'][0]['questions']), 2)
+        # The original is untouched
+        self.assertEqual(group.questions.count(), 2)
+
+
+class TemplateInstantiationTests(TestCase):
+    """Groups are created from templates with bulk inserts"""
+
+    def setUp(self):
+        self.client = APIClient()
+        QuestionType.objects.create(name="Short Text", slug="short-text")
+        QuestionType.objects.create(name="Dropdown", slug="dropdown")
+        self.form = build_form_tree("Template Form", page_count=3, questions_per_page=1)
+        self.pages = list(self.form.pages.order_by('order'))
+
+    def make_template(self, size):
+        return QuestionGroupTemplate.objects.create(
+            name=f"Template {size}",
+            slug=f"template-{size}",
+            question_template=[
+                {
+                    'type_slug': 'dropdown' if i % 2 else 'short-text',
+                    'name': f"Field {i}",
+                    'slug_suffix': f"field_{i}",
+                    'text': f"Field {i}"
+                }
+                for i in range(size)
+            ]
+        )
+
+    def test_create_group_query_count_independent_of_template_size(self):
+        """Test a 2 or 10 question template costs the same number of queries"""
+        small = self.make_template(2)
+        large = self.make_template(10)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            small.create_group_from_template(self.pages[0])
+        with self.assertNumQueries(len(small_queries)):
+            group = large.create_group_from_template(self.pages[0])
+
+        self.assertEqual(group.questions.count(), 10)
+        self.assertEqual(group.questions.order_by('order').first().slug, f"{group.slug}_field_0")
+
+    def test_create_groups_on_many_pages(self):
+        """Test one template is appended to every page in a fixed number of queries"""
+        template = self.make_template(3)
+
+        # 2 order lookups + types + savepoint + 2 inserts + release
+        with self.assertNumQueries(7):
+            groups = template.create_groups_from_template(self.pages)
+
+        for page, group in zip(self.pages, groups):
+            self.assertEqual(group.page, page)
+            self.assertEqual(group.template, template)
+            self.assertEqual(group.questions.count(), 3)
+            self.assertEqual(group.order, page.question_groups.exclude(pk=group.pk).get().order + ORDER_GAP)
+
+    def test_unknown_question_type_creates_nothing(self):
+        """Test templates referring to missing types fail before writing"""
+        template = self.make_template(2)
+        template.question_template.append({'type_slug': 'missing', 'name': 'X', 'slug_suffix': 'x', 'text': 'X'})
+        template.save()
+
+        with self.assertRaises(QuestionType.DoesNotExist):
+            template.create_groups_from_template(self.pages)
+        self.assertFalse(QuestionGroup.objects.filter(template=template).exists())
+
+    def test_apply_endpoint(self):
+        """Test the template apply endpoint stamps groups onto the listed pages"""
+        template = self.make_template(2)
+        url = reverse('questiongrouptemplate-apply', kwargs={'slug': template.slug})
+
+        response = self.client.post(url, {'page_ids': [str(page.id) for page in self.pages[:2]]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['groups']), 2)
+        self.assertEqual(QuestionGroup.objects.filter(template=template).count(), 2)
+
+        response = self.client.post(url, {'page_ids': [str(self.form.id)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Unknown pages', response.data['error'])
@@ -0,0 +1,203 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+import json
+
+from apps.form_builder.factories import FormSubmissionFactory, PublishedFormVersionFactory
+from apps.form_builder.models import FormSubmission, QuestionType
+from .logic import get_logic_plan
+from .validation import AnswerValidator, get_answer_validator
+
+
+def question(slug, type='short-text', **fields):
+    return {'slug': slug, 'type': type, 'order': fields.pop('order', 1), **fields}
+
+
+FORM_DATA = {
+    'pages': [
+        {
+            'order': 1,
+            'questions': [
+                question('name', required=True, validation={'min_length': 2, 'max_length': 5}),
+                question('code', order=2, validation={'pattern': '^[A-Z]{3}$', 'custom_error_message': 'Three capitals'}),
+                question('email', order=3, validation={'email': True}),
+                question('age', type='number', order=4, validation={'min_value': 18, 'max_value': 99}),
+                question('colour', type='dropdown', order=5, config={'options': {'en': [{'value': 'red'}, {'value': 'blue'}]}}),
+                question('agree', type='yes-no', order=6, required=True),
+                question('home', type='address', order=7, required=True),
+                question(
+                    'reason', order=8, required=True,
+                    conditional_logic={'rules': [{'conditions': [], 'actions': [{'type': 'hide'}]}]}
+                ),
+            ],
+            'question_groups': [
+                {'order': 9, 'questions': [question('tags', type='dropdown', config={'multiple': True, 'options': ['a', 'b']})]}
+            ]
+        },
+        {
+            'order': 2,
+            'disabled_condition': {'field': 'agree', 'operator': 'equals', 'value': 'no'},
+            'questions': [question('notes', required=True)]
+        }
+    ]
+}
+
+TYPE_CONFIGS = {'address': {'input_type': 'address'}}
+
+
+class AnswerValidatorTests(TestCase):
+
+    def setUp(self):
+        self.validator = AnswerValidator(FORM_DATA, TYPE_CONFIGS)
+
+    def test_valid_answers(self):
+        """Test answers within every rule pass"""
+        answers = {
+            'name': 'Jane', 'code': 'ABC', 'email': 'jane@example.com', 'age': '42',
+            'colour': 'red', 'agree': 'yes', 'tags': ['a', 'b'], 'unknown': object()
+        }
+        self.assertEqual(self.validator.validate(answers), {})
+
+    def test_invalid_answers(self):
+        """Test each rule reports its slug"""
+        errors = self.validator.validate({
+            'name': 'J', 'code': 'abc', 'email': 'nope', 'age': 12,
+            'colour': 'green', 'agree': True, 'tags': ['a', 'c']
+        })
+        self.assertEqual(set(errors), {'name', 'code', 'email', 'age', 'colour', 'agree', 'tags'})
+        self.assertEqual(errors['code'], ['Three capitals'])
+        self.assertEqual(self.validator.validate({'age': 'many'}), {'age': ['Enter a number.']})
+
+    def test_empty_answers_are_not_checked(self):
+        """Test empty values only matter for required questions"""
+        self.assertEqual(self.validator.validate({'name': '', 'age': None, 'colour': ''}), {})
+
+    def test_required_on_completion(self):
+        """Test completion requires visible required questions and all address fields"""
+        errors = self.validator.validate({'name': '  ', 'home__street': 'Main'}, complete=True)
+
+        self.assertIn('name', errors)
+        self.assertIn('agree', errors)
+        self.assertIn('home__city', errors)
+        self.assertNotIn('home__street', errors)
+        self.assertIn('notes', errors)
+        # Hidden by its conditional logic
+        self.assertNotIn('reason', errors)
+
+    def test_disabled_page_is_ignored_on_completion(self):
+        """Test questions on a disabled page are neither required nor checked"""
+        errors = self.validator.validate({'agree': 'no', 'notes': ''}, complete=True)
+        self.assertNotIn('notes', errors)
+
+        errors = self.validator.validate({'agree': 'yes'}, complete=True)
+        self.assertEqual(errors['notes'], ['This field is required.'])
+
+    def test_hidden_answers_are_ignored_on_completion(self):
+        """Test invalid answers to hidden questions do not block completion"""
+        validator = AnswerValidator({'pages': [{'order': 1, 'questions': [
+            question('plan', type='dropdown', config={'options': ['basic', 'pro']}),
+            question('seats', type='number', order=2, validation={'max_value': 10}, conditional_logic={
+                'rules': [{
+                    'conditions': [{'question_slug': 'plan', 'operator': 'equals', 'value': 'pro'}],
+                    'actions': [{'type': 'show'}, {'type': 'require'}]
+                }],
+                'default_action': 'hide'
+            }),
+        ]}]})
+
+        self.assertEqual(validator.validate({'plan': 'basic', 'seats': 50}, complete=True), {})
+        self.assertEqual(set(validator.validate({'plan': 'pro', 'seats': 50}, complete=True)), {'seats'})
+        self.assertEqual(validator.validate({'plan': 'pro'}, complete=True), {'seats': ['This field is required.']})
+
+
+class SubmissionValidationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        QuestionType.objects.create(name='Address', slug='address', config={'input_type': 'address'})
+        self.version = PublishedFormVersionFactory(serialized_form_data=FORM_DATA)
+        self.submission = FormSubmissionFactory(form_version=self.version, answers={}, is_complete=False)
+        self.url = reverse('submission-detail', kwargs={'pk': self.submission.id})
+
+    def test_update_rejects_invalid_answers(self):
+        """Test invalid answers are reported and not saved"""
+        response = self.client.patch(self.url, {'answers': {'age': 5, 'name': 'Jane'}}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data['answers']), ['age'])
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answers, {})
+
+    def test_answer_patch_rejects_invalid_answers(self):
+        """Test the answers patch endpoint validates the values it sets"""
+        url = reverse('submission-answers', kwargs={'pk': self.submission.id})
+        response = self.client.patch(url, {'operations': [{'op': 'set', 'slug': 'colour', 'value': 'green'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('colour', response.data['answers'])
+
+    def test_answers_must_be_an_object(self):
+        """Test answers that are not a JSON object are a 400, not a server error"""
+        response = self.client.patch(self.url, {'answers': ['Jane']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['answers'], {'non_field_errors': ['Answers must be a JSON object.']})
+
+    def test_answer_patch_keeps_completed_submissions_complete(self):
+        """Test patches to completed submissions are validated as final answers"""
+        answers = {'name': 'Jane', 'agree': 'yes', 'notes': 'Fine'}
+        answers.update({f'home__{field}': 'x' for field in ('street', 'city', 'state', 'postal_code', 'country')})
+        FormSubmission.objects.filter(pk=self.submission.pk).update(answers=answers, is_complete=True)
+        url = reverse('submission-answers', kwargs={'pk': self.submission.id})
+
+        response = self.client.patch(url, {'operations': [{'op': 'unset', 'slug': 'name'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['answers'], {'name': ['This field is required.']})
+
+        response = self.client.patch(url, {'operations': [{'op': 'set', 'slug': 'name', 'value': 'Jo'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answers['name'], 'Jo')
+
+    def test_merge_patch_validates_merged_objects(self):
+        """Test nested merge patches are validated against the merged answer"""
+        url = reverse('submission-answers', kwargs={'pk': self.submission.id})
+        response = self.client.generic(
+            'PATCH', url, json.dumps({'colour': {'value': 'red'}}), content_type='application/merge-patch+json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('colour', response.data['answers'])
+        self.submission.refresh_from_db()
+        self.assertEqual(self.submission.answers, {})
+
+    def test_complete_requires_answers(self):
+        """Test completion is refused until required questions are answered"""
+        url = reverse('submission-complete', kwargs={'pk': self.submission.id})
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('home__country', response.data['answers'])
+
+        answers = {'name': 'Jane', 'agree': 'no'}
+        answers.update({f'home__{field}': 'x' for field in ('street', 'city', 'state', 'postal_code', 'country')})
+        self.client.patch(self.url, {'answers': answers}, format='json')
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_complete'])
+
+    def test_validator_is_cached_per_version(self):
+        """Test 10k answers validate without queries once the version is compiled"""
+        data = {'pages': [{'order': 1, 'questions': [
+            question(f'q{i}', type='number', order=i, validation={'max_value': 100}) for i in range(10000)
+        ]}]}
+        version = PublishedFormVersionFactory(serialized_form_data=data)
+        answers = {f'q{i}': i for i in range(10000)}
+
+        errors = get_answer_validator(version.id).validate(answers)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_answer_validator(version.id).validate(answers), errors)
+        self.assertEqual(len(errors), 10000 - 101)
+
+    def test_validator_shares_the_logic_plan(self):
+        """Test a compiled validator uses the plan cached for the version, built from one load"""
+        with self.assertNumQueries(2):
+            validator = get_answer_validator(self.version.id)
+        self.assertIs(validator.logic, get_logic_plan(self.version.id))
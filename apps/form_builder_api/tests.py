@@ -224,9 +224,11 @@ class FormSubmissionViewSetTests(APITestCase):
     def setUp(self):
         self.client = APIClient()
         self.form = DynamicFormFactory(slug='test-form')
+        # No required questions, so completing is not blocked by answer validation
         self.published_version = PublishedFormVersionFactory(
             form=self.form,
-            version_number=1
+            version_number=1,
+            serialized_form_data={'pages': []}
         )
     
     def test_create_submission_success(self):
@@ -423,6 +425,170 @@ class FormSubmissionViewSetTests(APITestCase):
         # Verify completion datetime wasn't changed
         submission.refresh_from_db()
         self.assertEqual(submission.completed_datetime, original_completion_time)
+    
+    def test_active_submission(self):
+        """Test resuming returns the newest in-progress submission with its pinned version"""
+        from datetime import timedelta
+        from django.utils import timezone
+        now = timezone.now()
+        old_version = FormVersionFactory(form=self.form, version_number=2, is_published=False)
+        FormSubmissionFactory(form_version=self.published_version, user_session_id='sess', is_complete=False, created_datetime=now - timedelta(days=2))
+        active = FormSubmissionFactory(form_version=old_version, user_session_id='sess', is_complete=False, created_datetime=now - timedelta(days=1))
+        FormSubmissionFactory(form_version=self.published_version, user_session_id='sess', is_complete=True, created_datetime=now)
+        FormSubmissionFactory(form_version=self.published_version, user_session_id='other', is_complete=False, created_datetime=now)
+        
+        url = reverse('submission-active')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'form_slug': 'test-form', 'user_session_id': 'sess'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], str(active.id))
+        self.assertEqual(response.data['form_version']['version_number'], 2)
+        self.assertEqual(response.data['form_version']['serialized_form_data'], old_version.serialized_form_data)
+    
+    def test_active_submission_missing(self):
+        """Test resuming without an in-progress submission or parameters"""
+        url = reverse('submission-active')
+        
+        response = self.client.get(url, {'form_slug': 'test-form', 'user_session_id': 'nobody'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        response = self.client.get(url, {'form_slug': 'test-form'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_submission_stats(self):
+        """Test submission counts are aggregated per form"""
+        FormSubmissionFactory.create_batch(2, form_version=self.published_version, is_complete=True)
+        FormSubmissionFactory(form_version=self.published_version, is_complete=False)
+        FormSubmissionFactory(is_complete=False)
+        
+        url = reverse('submission-stats')
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'form_slug': 'test-form'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'total': 3, 'completed': 2, 'in_progress': 1})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_patch_answers_merge_patch(self):
+        """Test an RFC 7396 merge patch only touches the keys it names"""
+        submission = FormSubmissionFactory(
+            form_version=self.published_version,
+            answers={'name': 'Jane', 'phone': '555', 'address': {'city': 'Oslo', 'zip': '0150'}}
+        )
+
+        url = reverse('submission-answers', kwargs={'pk': submission.id})
+        response = self.client.generic(
+            'PATCH', url,
+            json.dumps({'name': 'John', 'phone': None, 'address': {'zip': None, 'street': 'Main'}}),
+            content_type='application/merge-patch+json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'id', 'revision', 'modified_datetime'})
+        self.assertEqual(response.data['revision'], 2)
+        submission.refresh_from_db()
+        self.assertEqual(submission.answers, {'name': 'John', 'address': {'city': 'Oslo', 'street': 'Main'}})
+
+    def test_patch_answers_operations(self):
+        """Test set/unset operations, where set can store an explicit null"""
+        submission = FormSubmissionFactory(
+            form_version=self.published_version, answers={'name': 'Jane', 'phone': '555'}
+        )
+
+        url = reverse('submission-answers', kwargs={'pk': submission.id})
+        response = self.client.patch(url, {'operations': [
+            {'op': 'set', 'slug': 'email', 'value': 'jane@example.com'},
+            {'op': 'set', 'slug': 'rating', 'value': None},
+            {'op': 'unset', 'slug': 'phone'}
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        submission.refresh_from_db()
+        self.assertEqual(submission.answers, {'name': 'Jane', 'email': 'jane@example.com', 'rating': None})
+
+    def test_update_with_if_match(self):
+        """Test updates against a stale revision fail with the current state"""
+        submission = FormSubmissionFactory(form_version=self.published_version, answers={'name': 'Jane'})
+        url = reverse('submission-detail', kwargs={'pk': submission.id})
+
+        response = self.client.get(url)
+        self.assertEqual(response['ETag'], '"1"')
+
+        response = self.client.patch(url, {'answers': {'name': 'John'}}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['revision'], 2)
+        self.assertEqual(response['ETag'], '"2"')
+
+        # A second tab still holding revision 1 must not overwrite the first
+        response = self.client.patch(url, {'answers': {'name': 'Jim'}}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['submission']['answers'], {'name': 'John'})
+        self.assertEqual(response.data['submission']['revision'], 2)
+
+        response = self.client.patch(url, {'answers': {'name': 'Jim'}, 'revision': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.patch(url, {'answers': {'name': 'Jim'}}, format='json', HTTP_IF_MATCH='W/"2"')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        submission.refresh_from_db()
+        self.assertEqual(submission.answers, {'name': 'John'})
+        self.assertEqual(submission.revision, 2)
+
+    def test_save_if_unchanged(self):
+        """Test a stale copy's conditional write is refused"""
+        submission = FormSubmissionFactory(form_version=self.published_version, answers={'name': 'Jane'})
+        stale = FormSubmission.objects.get(pk=submission.pk)
+
+        submission.answers = {'name': 'John'}
+        self.assertTrue(submission.save_if_unchanged(['answers']))
+        stale.answers = {'name': 'Jim'}
+        self.assertFalse(stale.save_if_unchanged(['answers']))
+
+        submission.refresh_from_db()
+        self.assertEqual(submission.answers, {'name': 'John'})
+        self.assertEqual(submission.revision, 2)
+
+    def test_patch_answers_with_if_match(self):
+        """Test answer patches honour an expected revision"""
+        submission = FormSubmissionFactory(form_version=self.published_version, answers={'name': 'Jane'}, revision=3)
+        url = reverse('submission-answers', kwargs={'pk': submission.id})
+        operations = [{'op': 'set', 'slug': 'name', 'value': 'John'}]
+
+        response = self.client.patch(url, {'operations': operations}, format='json', HTTP_IF_MATCH='"2"')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['submission']['answers'], {'name': 'Jane'})
+
+        response = self.client.patch(url, {'operations': operations, 'revision': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"4"')
+
+    def test_patch_answers_invalid(self):
+        """Test malformed patches and unknown submissions are rejected"""
+        submission = FormSubmissionFactory(form_version=self.published_version, answers={'name': 'Jane'})
+        url = reverse('submission-answers', kwargs={'pk': submission.id})
+
+        response = self.client.patch(url, {'operations': [{'op': 'move', 'slug': 'name'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(url, {'answers': {'name': 'John'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.generic('PATCH', url, '["name"]', content_type='application/merge-patch+json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(url, {'operations': [], 'revision': 'latest'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('revision', response.data)
+
+        submission.refresh_from_db()
+        self.assertEqual(submission.answers, {'name': 'Jane'})
+
+        for pk in ('00000000-0000-0000-0000-000000000000', 'not-a-uuid'):
+            url = reverse('submission-answers', kwargs={'pk': pk})
+            response = self.client.patch(url, {'operations': []}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
 class APIIntegrationTests(APITestCase):
@@ -439,9 +605,10 @@ class APIIntegrationTests(APITestCase):
         page1 = PageFactory(form=form, name='Personal Info', order=1)
         page2 = PageFactory(form=form, name='Preferences', order=2)
         
-        name_q = QuestionFactory(page=page1, type=question_type, name='Full Name', order=1)
-        email_q = QuestionFactory(page=page1, type=question_type, name='Email', order=2)
-        prefs_q = QuestionFactory(page=page2, type=question_type, name='Preferences', order=1)
+        # Optional questions, so completion is not blocked by required-answer validation
+        name_q = QuestionFactory(page=page1, type=question_type, name='Full Name', order=1, required=False)
+        email_q = QuestionFactory(page=page1, type=question_type, name='Email', order=2, required=False)
+        prefs_q = QuestionFactory(page=page2, type=question_type, name='Preferences', order=1, required=False)
         
         # Create and publish version
         create_version_url = reverse('form-create-version', kwargs={'slug': 'survey-form'})
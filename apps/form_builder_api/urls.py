@@ -32,6 +32,12 @@ urlpatterns = [
     path('forms/<str:form_slug>/versions/<int:pk>/publish/', FormVersionViewSet.as_view({
         'post': 'publish'
     }), name='form-version-publish'),
+    path('forms/<str:form_slug>/versions/<int:pk>/export/', FormVersionViewSet.as_view({
+        'get': 'export'
+    }), name='form-version-export'),
+    path('forms/<str:form_slug>/versions/<int:pk>/dependencies/', FormVersionViewSet.as_view({
+        'get': 'dependencies'
+    }), name='form-version-dependencies'),
     
     # Form builder - Pages
     path('builder/forms/<str:form_slug>/pages/', FormBuilderPageViewSet.as_view({
@@ -47,6 +53,9 @@ urlpatterns = [
     path('builder/forms/<str:form_slug>/pages/reorder/', FormBuilderPageViewSet.as_view({
         'post': 'reorder'
     }), name='builder-pages-reorder'),
+    path('builder/forms/<str:form_slug>/pages/<uuid:pk>/move/', FormBuilderPageViewSet.as_view({
+        'post': 'move'
+    }), name='builder-page-move'),
     
     # Form builder - Questions
     path('builder/forms/<str:form_slug>/pages/<uuid:page_pk>/questions/', FormBuilderQuestionViewSet.as_view({
@@ -62,6 +71,9 @@ urlpatterns = [
     path('builder/forms/<str:form_slug>/pages/<uuid:page_pk>/questions/reorder/', FormBuilderQuestionViewSet.as_view({
         'post': 'reorder'
     }), name='builder-questions-reorder'),
+    path('builder/forms/<str:form_slug>/pages/<uuid:page_pk>/questions/<uuid:pk>/move/', FormBuilderQuestionViewSet.as_view({
+        'post': 'move'
+    }), name='builder-question-move'),
     
     # Form builder - Question Groups
     path('builder/forms/<str:form_slug>/pages/<uuid:page_pk>/groups/', FormBuilderQuestionGroupViewSet.as_view({
@@ -77,6 +89,9 @@ urlpatterns = [
     path('builder/forms/<str:form_slug>/pages/<uuid:page_pk>/groups/reorder/', FormBuilderQuestionGroupViewSet.as_view({
         'post': 'reorder'
     }), name='builder-question-groups-reorder'),
+    path('builder/forms/<str:form_slug>/pages/<uuid:page_pk>/groups/<uuid:pk>/move/', FormBuilderQuestionGroupViewSet.as_view({
+        'post': 'move'
+    }), name='builder-question-group-move'),
     path('builder/forms/<str:form_slug>/pages/<uuid:page_pk>/groups/<uuid:pk>/questions/', FormBuilderQuestionGroupViewSet.as_view({
         'post': 'add_question'
     }), name='builder-question-group-add-question'),
@@ -94,4 +109,7 @@ urlpatterns = [
     path('builder/forms/<str:form_slug>/pages/<uuid:page_pk>/groups/<uuid:group_pk>/questions/reorder/', GroupedQuestionViewSet.as_view({
         'post': 'reorder'
     }), name='builder-grouped-questions-reorder'),
+    path('builder/forms/<str:form_slug>/pages/<uuid:page_pk>/groups/<uuid:group_pk>/questions/<uuid:pk>/move/', GroupedQuestionViewSet.as_view({
+        'post': 'move'
+    }), name='builder-grouped-question-move'),
 ]
\ No newline at end of file
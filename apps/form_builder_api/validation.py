@@ -0,0 +1,299 @@
+"""
+Server-side validation of submission answers.
+
+A form version's ``serialized_form_data`` is compiled once into a table of
+per-slug validators (patterns precompiled, option lists as frozensets,
+numeric bounds parsed) and cached by version id, so validating ``answers``
+is a single pass over the answers plus the required slugs, with no queries
+on a cache hit. Rules follow ``VALIDATION_CONFIG_SCHEMA`` and the option
+lists the Vue client offers: question options, else the question type's
+default options, else yes/no for yes-no questions, plus any options a
+conditional ``set_options`` action can switch to.
+
+Answer keys that are not question slugs (e.g. the ``<slug>__<field>`` flat
+fields of address questions) are not type-checked. On completion, the
+version's conditional logic (see ``logic.py``) is evaluated against the
+answers: questions that are hidden, disabled or on a hidden page are
+ignored, and every question that is then required (every field of an
+address question) must be answered, as the client checks before
+submitting.
+
+Configure via the ``FORMATIC_ANSWER_VALIDATION`` setting.
+"""
+import math
+import re
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.signals import setting_changed
+from django.core.validators import EmailValidator, URLValidator
+from django.dispatch import receiver
+from rest_framework.settings import api_settings
+
+from apps.form_builder.tree import ADDRESS_FIELDS, answer_keys, iter_questions
+from apps.form_builder.models import question_type_configs
+from .cache import LocalLRUCache
+from .logic import LogicPlan, get_logic_plan, load_version_data
+
+
+DEFAULT_VALIDATION_SETTINGS = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 256,
+    # Versions never change, but question type default options can
+    'TIMEOUT': 3600,
+}
+
+REQUIRED_MESSAGE = 'This field is required.'
+NOT_AN_OBJECT_MESSAGE = 'Answers must be a JSON object.'
+
+# Question type slugs whose answers must be numbers
+NUMBER_TYPES = frozenset({'number'})
+
+validate_email = EmailValidator()
+validate_url = URLValidator()
+
+
+def get_validation_settings():
+    return {
+        **DEFAULT_VALIDATION_SETTINGS,
+        **(getattr(settings, 'FORMATIC_ANSWER_VALIDATION', None) or {}),
+    }
+
+
+def is_empty(value):
+    return value is None or value == '' or value == [] or value == {}
+
+
+def as_number(value):
+    """Return ``value`` as a finite float, or None if it is not a number."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            return None
+    if not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return float(value)
+
+
+def option_values(options):
+    """Values of a (possibly per-language) option list."""
+    if isinstance(options, dict):
+        values = set()
+        for language_options in options.values():
+            values |= option_values(language_options)
+        return values
+    if not isinstance(options, list):
+        return set()
+    values = set()
+    for option in options:
+        value = option.get('value') if isinstance(option, dict) else option
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            values.add(str(value))
+    return values
+
+
+class QuestionValidator:
+    """Compiled rules for one question slug."""
+    __slots__ = (
+        'slug', 'numeric', 'min_length', 'max_length', 'min_value', 'max_value',
+        'pattern', 'email', 'url', 'options', 'multiple', 'message'
+    )
+
+    def __init__(self, question, type_config):
+        config = question.get('config') or {}
+        rules = question.get('validation') or {}
+        self.slug = question['slug']
+        self.numeric = question.get('type') in NUMBER_TYPES
+        self.min_length = rules.get('min_length') or None
+        self.max_length = rules.get('max_length') or None
+        self.min_value = as_number(rules.get('min_value'))
+        self.max_value = as_number(rules.get('max_value'))
+        self.email = bool(rules.get('email'))
+        self.url = bool(rules.get('url'))
+        self.message = rules.get('custom_error_message') or None
+        self.multiple = bool(config.get('multiple', type_config.get('multiple', False)))
+
+        self.pattern = None
+        if isinstance(rules.get('pattern'), str) and rules['pattern']:
+            try:
+                self.pattern = re.compile(rules['pattern'])
+            except re.error:
+                pass  # The client cannot apply a broken pattern either
+
+        options = config.get('options') or type_config.get('options')
+        if options:
+            values = option_values(options)
+        elif question.get('type') == 'yes-no':
+            values = {'yes', 'no'}
+        else:
+            values = None
+        if values is not None:
+            # Conditional logic may switch to other option lists
+            for rule in (question.get('conditional_logic') or {}).get('rules') or []:
+                for action in rule.get('actions') or []:
+                    if action.get('type') == 'set_options':
+                        values |= option_values(action.get('options'))
+            self.options = frozenset(values)
+        else:
+            self.options = None
+
+    def check(self, value):
+        """Return the error messages for ``value`` (empty when valid)."""
+        if is_empty(value):
+            return []
+        errors = []
+        if self.options is not None:
+            items = value if self.multiple and isinstance(value, list) else [value]
+            if any(isinstance(item, (dict, list, bool)) or str(item) not in self.options for item in items):
+                errors.append('Select a valid choice.')
+        elif self.numeric or self.min_value is not None or self.max_value is not None:
+            number = as_number(value)
+            if number is None:
+                errors.append('Enter a number.')
+            else:
+                if self.min_value is not None and number < self.min_value:
+                    errors.append(f'Ensure this value is greater than or equal to {format_number(self.min_value)}.')
+                if self.max_value is not None and number > self.max_value:
+                    errors.append(f'Ensure this value is less than or equal to {format_number(self.max_value)}.')
+        if isinstance(value, str):
+            if self.min_length and len(value) < self.min_length:
+                errors.append(f'Ensure this value has at least {self.min_length} characters.')
+            if self.max_length and len(value) > self.max_length:
+                errors.append(f'Ensure this value has at most {self.max_length} characters.')
+            if self.pattern is not None and not self.pattern.search(value):
+                errors.append('Enter a valid value.')
+            if self.email and not passes(validate_email, value):
+                errors.append('Enter a valid email address.')
+            if self.url and not passes(validate_url, value):
+                errors.append('Enter a valid URL.')
+        elif self.email or self.url or self.pattern is not None:
+            errors.append('Enter a valid value.')
+        if errors and self.message:
+            return [self.message]
+        return errors
+
+
+def format_number(value):
+    return int(value) if value.is_integer() else value
+
+
+def passes(validator, value):
+    try:
+        validator(value)
+    except ValidationError:
+        return False
+    return True
+
+
+class AnswerValidator:
+    """Per-slug validator table and logic plan for one form version."""
+
+    def __init__(self, serialized_form_data, type_configs=None, logic=None):
+        type_configs = type_configs or {}
+        self.validators = {}
+        self.required = {}
+        for question in iter_questions(serialized_form_data):
+            type_config = type_configs.get(question.get('type')) or {}
+            validator = QuestionValidator(question, type_config)
+            self.validators[validator.slug] = validator
+            if may_be_required(question):
+                self.required[validator.slug] = required_keys(validator.slug, type_config)
+        # Versions served by the API share the plan cached by get_logic_plan
+        self.logic = logic if logic is not None else LogicPlan(serialized_form_data)
+        # Without conditions the page and question states never change
+        self.static_state = self.logic.evaluate({}) if self.logic.is_static else None
+
+    def validate(self, answers, complete=False):
+        """
+        Return ``{slug: [messages]}`` for invalid answers.
+
+        With ``complete`` the answers are final: hidden and disabled
+        questions are ignored and the required ones must be answered.
+        Anything but an object is reported under ``non_field_errors``.
+        """
+        if not isinstance(answers, dict):
+            return {api_settings.NON_FIELD_ERRORS_KEY: [NOT_AN_OBJECT_MESSAGE]}
+        errors = {}
+        validators = self.validators
+        for slug, value in answers.items():
+            validator = validators.get(slug)
+            if validator is None:
+                continue
+            messages = validator.check(value)
+            if messages:
+                errors[slug] = messages
+        if complete:
+            state = self.static_state or self.logic.evaluate(answers)
+            for slug in [slug for slug in errors if not state.is_active(slug)]:
+                del errors[slug]
+            for slug, keys in self.required.items():
+                if not state.is_required(slug):
+                    continue
+                for key in keys:
+                    value = answers.get(key)
+                    if is_empty(value) or (isinstance(value, str) and not value.strip()):
+                        errors.setdefault(key, []).insert(0, REQUIRED_MESSAGE)
+        return errors
+
+
+def required_keys(slug, type_config):
+    """Answer keys a required question must fill; address questions are stored as flat fields."""
+    return answer_keys(slug, type_config)
+
+
+def may_be_required(question):
+    """Whether a question is required or a conditional rule can require it."""
+    if question.get('required'):
+        return True
+    rules = (question.get('conditional_logic') or {}).get('rules') or []
+    return any(action.get('type') == 'require' for rule in rules for action in rule.get('actions') or [])
+
+
+def compile_version(serialized_form_data, logic=None):
+    """Build the validator for a version, loading the type defaults it refers to."""
+    return AnswerValidator(serialized_form_data, question_type_configs(serialized_form_data), logic=logic)
+
+
+_validator_cache = None
+
+
+def get_answer_validator(version_id):
+    """
+    Return the cached validator of a form version, compiling it on a miss.
+
+    Returns None when validation is disabled or the version does not exist.
+    """
+    global _validator_cache
+    options = get_validation_settings()
+    if not options['ENABLED']:
+        return None
+    if _validator_cache is None:
+        _validator_cache = LocalLRUCache(options['MAX_ENTRIES'], options['TIMEOUT'])
+
+    key = str(version_id)
+    validator = _validator_cache.get(key)
+    if validator is None:
+        version_data = load_version_data(version_id)
+        if version_data is None:
+            return None
+        validator = compile_version(version_data[0], logic=get_logic_plan(version_id, version_data))
+        _validator_cache.set(key, validator)
+    return validator
+
+
+def validate_answers(version_id, answers, complete=False):
+    """Validate ``answers`` against a form version; returns ``{slug: [messages]}``."""
+    validator = get_answer_validator(version_id)
+    if validator is None:
+        return {}
+    return validator.validate(answers, complete=complete)
+
+
+@receiver(setting_changed)
+def reset_validator_cache(*, setting, **kwargs):
+    global _validator_cache
+    if setting == 'FORMATIC_ANSWER_VALIDATION':
+        _validator_cache = None
@@ -1,25 +1,55 @@
+import uuid
+
+from django.db import transaction
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.middleware.csrf import get_token
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils.decorators import method_decorator
 from rest_framework import status
 from rest_framework.decorators import api_view, action
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 
-from apps.form_builder.models import DynamicForm, FormVersion, FormSubmission, QuestionType, Page, Question, QuestionGroup
+from apps.form_builder.models import (
+    DynamicForm, FormVersion, FormSubmission, QuestionType, Page, Question, QuestionGroup, PublishError,
+    form_page_sequences, form_tree_prefetches, page_item_sequences, page_tree_prefetches
+)
+from apps.form_builder.answers import (
+    MAX_ATTEMPTS, AnswerPatchError, RevisionConflict, apply_answer_patch, parse_operations, patched_answers,
+    split_merge_patch
+)
+from apps.form_builder.export import CONTENT_TYPES, EXPORT_FORMATS, export_filename, iter_export
+from apps.form_builder.ordering import ORDER_GAP, ReorderError, apply_orders, move_to_position, next_order
 from .serializers import (
-    DynamicFormSerializer, FormVersionSerializer, CreateVersionSerializer,
-    FormSubmissionSerializer, CreateSubmissionSerializer, UpdateSubmissionSerializer,
+    DynamicFormSerializer, FormVersionSerializer, FormVersionSummarySerializer, CreateVersionSerializer,
+    FormSubmissionSerializer, CreateSubmissionSerializer, UpdateSubmissionSerializer, AnswerOperationsSerializer,
     QuestionTypeSerializer, PageSerializer, QuestionSerializer, FullDynamicFormSerializer,
     CreatePageSerializer, UpdatePageSerializer, CreateQuestionSerializer, UpdateQuestionSerializer,
     CreateFormSerializer, QuestionGroupSerializer, CreateQuestionGroupSerializer, UpdateQuestionGroupSerializer
 )
-from .schemas import SERIALIZED_FORM_DATA_SCHEMA, SUBMISSION_ANSWERS_SCHEMA
+from .schemas import (
+    DEPENDENCY_GRAPH_SCHEMA, SERIALIZED_FORM_DATA_SCHEMA, SERIALIZED_PAGE_SCHEMA, SUBMISSION_ANSWERS_SCHEMA
+)
+from .autosave import autosaves_pending, flush_autosaves, get_autosave_buffer
+from .batch import BatchError, apply_batch
+from .pagination import KeysetPagination, VersionPagination
+from .projection import ProjectionViewMixin, projection_parameters
+from .validation import validate_answers
+from .logic import get_logic_plan
+from .parsers import MergePatchParser
+from .cache import get_published_form_cache
+from .responses import (
+    IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL,
+    encoded_json_response, if_match_revision, is_not_modified, not_modified_response, revision_etag
+)
 
 
 @extend_schema_view(
@@ -47,10 +77,81 @@ class QuestionTypeViewSet(ModelViewSet):
     http_method_names = ['get']  # Read-only for now
 
 
+def is_uuid(value):
+    """Whether a URL id can be looked up as a UUID primary key"""
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+def publish_error_response(error):
+    """400 listing why a form version cannot be published"""
+    return Response({'error': str(error), 'errors': error.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def form_tree_queryset(queryset, projected=None):
+    """Load the form tree a form serializer walks, narrowed to a projected serializer's fields"""
+    if projected is None:
+        return queryset.prefetch_related(*form_tree_prefetches())
+    deferred = projected.get_deferred_fields()
+    return queryset.defer(*deferred[DynamicForm]).prefetch_related(*form_tree_prefetches(deferred))
+
+
+def version_list_queryset(queryset, projected=None):
+    """Leave out the version columns FormVersionSerializer, or a projection of it, does not read"""
+    deferred = projected.get_deferred_fields()[FormVersion] if projected is not None else ()
+    return queryset.select_related('form').defer(*FormVersion.DERIVED_FIELDS, *deferred)
+
+
+VERSION_SUMMARY_PARAMETERS = [
+    OpenApiParameter(
+        name='summary', type=bool,
+        description=(
+            'Return paginated summaries (sizes and page/question counts) instead of the '
+            'serialized form data'
+        )
+    ),
+    OpenApiParameter(name='cursor', type=str, description='Pagination cursor (summary mode)'),
+    OpenApiParameter(
+        name='page_size', type=int,
+        description='Versions per page in summary mode (capped at FORMATIC_VERSION_PAGINATION["MAX_PAGE_SIZE"])'
+    ),
+]
+
+
+PUBLISHED_VERSION_PARAMETERS = [
+    OpenApiParameter(
+        name='version', type=int,
+        description="Published version number to serve instead of the latest (see the manifest's version_number)"
+    ),
+]
+
+
+def is_summary_request(request):
+    """Whether a version listing asks for summaries (?summary=true)"""
+    return request.query_params.get('summary', '').lower() in ('true', '1', 'yes')
+
+
+def version_summary_response(view, queryset):
+    """Paginated version summaries, loading none of the definition or derived columns"""
+    projection = view.get_projection()
+    serializer_class = FormVersionSummarySerializer
+    deferred = serializer_class(projection=projection).get_deferred_fields()[FormVersion] if projection else ()
+    queryset = queryset.only(*serializer_class.Meta.fields).defer(*deferred)
+
+    paginator = VersionPagination()
+    page = paginator.paginate_queryset(queryset, view.request, view=view)
+    serializer = serializer_class(page, many=True, projection=projection)
+    return paginator.get_paginated_response(serializer.data)
+
+
 @extend_schema_view(
     list=extend_schema(
         summary="List active forms",
         description="Returns a list of all active dynamic forms with their current structure",
+        parameters=projection_parameters(),
         responses={
             200: DynamicFormSerializer(many=True)
         }
@@ -68,11 +169,19 @@ class QuestionTypeViewSet(ModelViewSet):
         description="Deactivates a form (sets is_active=False)"
     )
 )
-class FormViewSet(ModelViewSet):
+class FormViewSet(ProjectionViewMixin, ModelViewSet):
     """ViewSet for managing dynamic forms and their structures."""
     queryset = DynamicForm.objects.filter(is_active=True)
     serializer_class = DynamicFormSerializer
     lookup_field = 'slug'
+    projection_actions = ('list', 'draft', 'versions')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'draft'):
+            # Listed forms and drafts nest their pages and questions; prefetch them per level
+            queryset = form_tree_queryset(queryset, self.get_projected_serializer())
+        return queryset
 
     @extend_schema(
         summary="Get published form structure",
@@ -125,20 +234,140 @@ class FormViewSet(ModelViewSet):
     )
     def retrieve(self, request, slug=None):
         """Get latest published version of a form"""
-        form = get_object_or_404(DynamicForm, slug=slug, is_active=True)
-        latest_version = form.get_latest_published_version()
+        cache = get_published_form_cache()
+        entry = cache.get(slug)
         
-        if not latest_version:
-            return Response(
-                {'error': 'No published version available'}, 
-                status=status.HTTP_404_NOT_FOUND
+        if entry is None:
+            latest_version = FormVersion.objects.filter(
+                form__slug=slug,
+                form__is_active=True,
+                is_published=True
+            ).defer('serialized_form_data').first()
+            
+            if not latest_version:
+                get_object_or_404(DynamicForm, slug=slug, is_active=True)
+                return Response(
+                    {'error': 'No published version available'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            
+            entry = cache.set(slug, latest_version)
+        
+        if is_not_modified(request, entry['etag'], entry['last_modified']):
+            return not_modified_response(
+                request, entry['etag'], entry['last_modified'], REVALIDATE_CACHE_CONTROL
             )
         
-        return Response(latest_version.serialized_form_data)
+        return encoded_json_response(
+            request,
+            entry['bodies'],
+            etag=entry['etag'],
+            last_modified=entry['last_modified'],
+            cache_control=REVALIDATE_CACHE_CONTROL
+        )
+
+    def get_published_pages(self, slug, version_number=None):
+        """Get the cached page entry of the latest published version, or of ``version_number``, or None"""
+        cache = get_published_form_cache()
+        entry = cache.get_pages(slug, version_number)
+        if entry is None:
+            versions = FormVersion.objects.filter(
+                form__slug=slug,
+                form__is_active=True,
+                is_published=True
+            ).defer('encoded_body', 'encoded_body_gzip', 'encoded_body_br', 'dependency_graph')
+            if version_number is not None:
+                versions = versions.filter(version_number=version_number)
+            version = versions.first()
+            if not version:
+                return None
+            entry = cache.set_pages(slug, version, current=version_number is None)
+        return entry
+
+    def published_pages_or_error(self, request, slug):
+        """Get the page entry a manifest or page request asks for, or an error response"""
+        version_number = request.query_params.get('version')
+        if version_number is not None:
+            try:
+                version_number = int(version_number)
+            except ValueError:
+                return None, Response({'error': 'version must be a version number'}, status=status.HTTP_400_BAD_REQUEST)
+        entry = self.get_published_pages(slug, version_number)
+        if entry is None:
+            get_object_or_404(DynamicForm, slug=slug, is_active=True)
+            error = 'No published version available' if version_number is None else 'Published version not found'
+            return None, Response({'error': error}, status=status.HTTP_404_NOT_FOUND)
+        return entry, None
+
+    def published_body_response(self, request, entry, bodies):
+        """Serve one encoded body of a published page entry, honouring its validators"""
+        if is_not_modified(request, entry['etag'], entry['last_modified']):
+            return not_modified_response(
+                request, entry['etag'], entry['last_modified'], REVALIDATE_CACHE_CONTROL
+            )
+        return encoded_json_response(
+            request,
+            bodies,
+            etag=entry['etag'],
+            last_modified=entry['last_modified'],
+            cache_control=REVALIDATE_CACHE_CONTROL
+        )
+
+    @extend_schema(
+        summary="Get published form manifest",
+        description=(
+            "Returns the latest published version without questions: form fields, the version "
+            "number and, per page, its id, name, slug, order, conditions and tag fields. Load "
+            "page contents with the page endpoint; both share the version's ETag. Pass the "
+            "manifest's `version_number` as `version` to keep loading the same version."
+        ),
+        parameters=PUBLISHED_VERSION_PARAMETERS,
+        responses={
+            200: OpenApiTypes.OBJECT,
+            400: OpenApiResponse(description="Invalid version number"),
+            404: OpenApiResponse(description="Form not found or no (such) published version available")
+        }
+    )
+    @action(detail=True, methods=['get'])
+    def manifest(self, request, slug=None):
+        """Get the page manifest of the latest or the requested published version"""
+        entry, error = self.published_pages_or_error(request, slug)
+        if error is not None:
+            return error
+        return self.published_body_response(request, entry, entry['manifest'])
+
+    @extend_schema(
+        summary="Get a page of the published form",
+        description=(
+            "Returns one page of the latest published version, with its questions and question "
+            "groups. Pass `version` to get the page of the version whose manifest was loaded, "
+            "even after a newer version has been published."
+        ),
+        parameters=PUBLISHED_VERSION_PARAMETERS,
+        responses={
+            200: OpenApiResponse(
+                response=SERIALIZED_PAGE_SCHEMA,
+                description="Page structure"
+            ),
+            400: OpenApiResponse(description="Invalid version number"),
+            404: OpenApiResponse(description="Form, published version or page not found")
+        }
+    )
+    @action(detail=True, methods=['get'], url_path=r'pages/(?P<page_slug>[^/.]+)', url_name='page')
+    def page(self, request, slug=None, page_slug=None):
+        """Get one page of the latest or the requested published version"""
+        entry, error = self.published_pages_or_error(request, slug)
+        if error is not None:
+            return error
+        bodies = entry['pages'].get(page_slug)
+        if bodies is None:
+            return Response({'error': 'Page not found'}, status=status.HTTP_404_NOT_FOUND)
+        return self.published_body_response(request, entry, bodies)
 
     @extend_schema(
         summary="Get draft form structure",
         description="Returns the current draft structure of the form (for admin/editing purposes)",
+        parameters=projection_parameters(),
         responses={
             200: DynamicFormSerializer,
             404: OpenApiResponse(description="Form not found")
@@ -147,13 +376,17 @@ class FormViewSet(ModelViewSet):
     @action(detail=True, methods=['get'])
     def draft(self, request, slug=None):
         """Get current draft structure (for admin)"""
-        form = get_object_or_404(DynamicForm, slug=slug, is_active=True)
+        form = get_object_or_404(self.get_queryset(), slug=slug)
         serializer = self.get_serializer(form)
         return Response(serializer.data)
 
     @extend_schema(
         summary="List form versions",
-        description="Returns all versions of a form, ordered by version number (newest first)",
+        description=(
+            "Returns all versions of a form, ordered by version number (newest first). With "
+            "summary=true, returns cursor-paginated summaries without the serialized form data."
+        ),
+        parameters=projection_parameters() + VERSION_SUMMARY_PARAMETERS,
         responses={
             200: FormVersionSerializer(many=True),
             404: OpenApiResponse(description="Form not found")
@@ -163,8 +396,10 @@ class FormViewSet(ModelViewSet):
     def versions(self, request, slug=None):
         """List all versions of a form"""
         form = get_object_or_404(DynamicForm, slug=slug, is_active=True)
-        versions = form.versions.all()
-        serializer = FormVersionSerializer(versions, many=True)
+        if is_summary_request(request):
+            return version_summary_response(self, form.versions.all())
+        versions = version_list_queryset(form.versions.all(), self.get_projected_serializer(FormVersionSerializer))
+        serializer = FormVersionSerializer(versions, many=True, projection=self.get_projection())
         return Response(serializer.data)
 
     @extend_schema(
@@ -173,7 +408,7 @@ class FormViewSet(ModelViewSet):
         request=CreateVersionSerializer,
         responses={
             201: FormVersionSerializer,
-            400: OpenApiResponse(description="Invalid request data"),
+            400: OpenApiResponse(description="Invalid request data, or the version cannot be published"),
             404: OpenApiResponse(description="Form not found")
         },
         examples=[
@@ -195,15 +430,19 @@ class FormViewSet(ModelViewSet):
         serializer = CreateVersionSerializer(data=request.data)
         
         if serializer.is_valid():
-            version = form.create_version(
-                notes=serializer.validated_data.get('notes', ''),
-                created_by=serializer.validated_data.get('created_by', '')
-            )
-            
-            # Publish if requested
-            if serializer.validated_data.get('is_published', False):
-                version.is_published = True
-                version.save()
+            try:
+                # A version that fails to publish is not kept
+                with transaction.atomic():
+                    version = form.create_version(
+                        notes=serializer.validated_data.get('notes', ''),
+                        created_by=serializer.validated_data.get('created_by', '')
+                    )
+                    
+                    # Publish if requested
+                    if serializer.validated_data.get('is_published', False):
+                        version.publish()
+            except PublishError as e:
+                return publish_error_response(e)
             
             return Response(
                 FormVersionSerializer(version).data,
@@ -216,18 +455,26 @@ class FormViewSet(ModelViewSet):
 @extend_schema_view(
     list=extend_schema(
         summary="List form versions",
-        description="Returns all versions for a specific form"
+        description=(
+            "Returns all versions for a specific form. With summary=true, returns cursor-paginated "
+            "summaries (sizes and page/question counts) without the serialized form data."
+        ),
+        parameters=projection_parameters() + VERSION_SUMMARY_PARAMETERS
     )
 )
-class FormVersionViewSet(ModelViewSet):
+class FormVersionViewSet(ProjectionViewMixin, ModelViewSet):
     """ViewSet for managing individual form versions."""
     serializer_class = FormVersionSerializer
+    projection_actions = ('list',)
     
     def get_queryset(self):
         form_slug = self.kwargs.get('form_slug')
-        if form_slug:
-            return FormVersion.objects.filter(form__slug=form_slug)
-        return FormVersion.objects.none()
+        if not form_slug:
+            return FormVersion.objects.none()
+        queryset = FormVersion.objects.filter(form__slug=form_slug)
+        if self.action == 'list' and not is_summary_request(self.request):
+            queryset = version_list_queryset(queryset, self.get_projected_serializer())
+        return queryset
 
     @extend_schema(
         summary="Get specific form version",
@@ -242,15 +489,35 @@ class FormVersionViewSet(ModelViewSet):
     )
     def retrieve(self, request, form_slug=None, pk=None):
         """Get specific version by version number"""
-        form = get_object_or_404(DynamicForm, slug=form_slug, is_active=True)
-        version = get_object_or_404(form.versions, version_number=pk)
-        return Response(version.serialized_form_data)
+        version = get_object_or_404(
+            FormVersion.objects.only('id', 'version_number', 'created_datetime'),
+            form__slug=form_slug,
+            form__is_active=True,
+            version_number=pk
+        )
+        etag = version.get_etag()
+        
+        # Versions are immutable, so validators are checked before loading any body
+        if is_not_modified(request, etag, version.created_datetime):
+            return not_modified_response(
+                request, etag, version.created_datetime, IMMUTABLE_CACHE_CONTROL
+            )
+        
+        version.refresh_from_db(fields=['encoded_body', 'encoded_body_gzip', 'encoded_body_br'])
+        return encoded_json_response(
+            request,
+            version.get_encoded_bodies(),
+            etag=etag,
+            last_modified=version.created_datetime,
+            cache_control=IMMUTABLE_CACHE_CONTROL
+        )
 
     @extend_schema(
         summary="Publish form version",
         description="Marks a specific version as published, making it available for form rendering",
         responses={
             200: FormVersionSerializer,
+            400: OpenApiResponse(description="Conditional logic has circular references"),
             404: OpenApiResponse(description="Form or version not found")
         }
     )
@@ -260,25 +527,106 @@ class FormVersionViewSet(ModelViewSet):
         form = get_object_or_404(DynamicForm, slug=form_slug, is_active=True)
         version = get_object_or_404(form.versions, version_number=pk)
         
-        version.is_published = True
-        version.save()
+        try:
+            version.publish()
+        except PublishError as e:
+            return publish_error_response(e)
         
         return Response(
             FormVersionSerializer(version).data,
             status=status.HTTP_200_OK
         )
 
+    @extend_schema(
+        summary="Get the conditional logic dependency graph of a form version",
+        description=(
+            "Returns, for every answer slug, the questions and pages whose conditions read it, "
+            "the answer slugs in evaluation order and any circular references. Renderers can "
+            "re-evaluate only the transitive dependents of a changed answer."
+        ),
+        responses={
+            200: OpenApiResponse(response=DEPENDENCY_GRAPH_SCHEMA, description="Dependency graph"),
+            404: OpenApiResponse(description="Form or version not found")
+        }
+    )
+    @action(detail=True, methods=['get'])
+    def dependencies(self, request, form_slug=None, pk=None):
+        """Get a version's conditional logic dependency graph"""
+        version = get_object_or_404(
+            FormVersion.objects.only('id', 'dependency_graph'),
+            form__slug=form_slug,
+            form__is_active=True,
+            version_number=pk
+        )
+        return Response(version.get_dependency_graph())
+
+    @extend_schema(
+        summary="Export submissions of a form version",
+        description=(
+            "Streams every submission of this version as CSV (default) or NDJSON, "
+            "with one column per question of the version, grouped questions included."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name='export_format',
+                type=str,
+                enum=list(EXPORT_FORMATS),
+                description="Output format (default: csv)"
+            )
+        ],
+        responses={
+            200: OpenApiResponse(description="CSV or NDJSON file"),
+            400: OpenApiResponse(description="Unknown export format"),
+            404: OpenApiResponse(description="Form or version not found")
+        }
+    )
+    @action(detail=True, methods=['get'])
+    def export(self, request, form_slug=None, pk=None):
+        """Stream a version's submissions as CSV or NDJSON"""
+        # DRF reserves ?format= for renderer selection
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'export_format must be one of: {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        version = get_object_or_404(
+            FormVersion.objects.select_related('form'),
+            form__slug=form_slug,
+            form__is_active=True,
+            version_number=pk
+        )
+        
+        response = StreamingHttpResponse(
+            iter_export(version, export_format),
+            content_type=CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(version, export_format)}"'
+        return response
+
+    # Defined last: the name shadows the ``list`` builtin in the class body
+    def list(self, request, form_slug=None):
+        """List versions, or paginated summaries of them"""
+        if is_summary_request(request):
+            return version_summary_response(self, self.get_queryset())
+        return super().list(request)
+
 
 @extend_schema_view(
     list=extend_schema(
         summary="List submissions",
-        description="Returns all form submissions with pagination support"
+        description="Returns all form submissions with pagination support",
+        parameters=projection_parameters()
+    ),
+    retrieve=extend_schema(
+        parameters=projection_parameters()
     )
 )
-class FormSubmissionViewSet(ModelViewSet):
+class FormSubmissionViewSet(ProjectionViewMixin, ModelViewSet):
     """ViewSet for managing form submissions and responses."""
-    queryset = FormSubmission.objects.all()
+    queryset = FormSubmission.objects.select_related('form_version__form')
     serializer_class = FormSubmissionSerializer
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Filter submissions by query parameters"""
@@ -293,8 +641,50 @@ class FormSubmissionViewSet(ModelViewSet):
         form_slug = self.request.query_params.get('form_slug')
         if form_slug:
             queryset = queryset.filter(form_version__form__slug=form_slug)
+        
+        # Only the version number and form name are shown, never the definition
+        queryset = queryset.defer(
+            'form_version__serialized_form_data',
+            *(f'form_version__{name}' for name in FormVersion.DERIVED_FIELDS)
+        )
+        projected = self.get_projected_serializer()
+        if projected is not None:
+            # The keyset cursor and the ETag read these whether or not they are shown
+            deferred = projected.get_deferred_fields()[FormSubmission] - {'created_datetime', 'revision'}
+            queryset = queryset.defer(*deferred)
             
-        return queryset.order_by('-created_datetime')
+        return queryset.order_by('-created_datetime', '-id')
+
+    def submission_response(self, submission, status_code=status.HTTP_200_OK):
+        """Serialize a submission with its revision as the ETag"""
+        return Response(
+            self.get_serializer(submission).data,
+            status=status_code,
+            headers={'ETag': revision_etag(submission.revision)}
+        )
+
+    def conflict_response(self, submission):
+        """409 carrying the current submission, so the client can reconcile"""
+        return Response(
+            {
+                'error': 'Submission was changed by another request',
+                'submission': FormSubmissionSerializer(submission).data
+            },
+            status=status.HTTP_409_CONFLICT,
+            headers={'ETag': revision_etag(submission.revision)}
+        )
+
+    def invalid_answers_response(self, errors):
+        """400 listing the messages per invalid answer slug"""
+        return Response(
+            {'error': 'Some answers are invalid', 'answers': errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    def retrieve(self, request, pk=None):
+        """Get a submission, with its revision as the ETag"""
+        flush_autosaves(pk)
+        return self.submission_response(self.get_object())
 
     @extend_schema(
         summary="Create form submission",
@@ -369,12 +759,23 @@ class FormSubmissionViewSet(ModelViewSet):
 
     @extend_schema(
         summary="Update submission answers",
-        description="Updates the answers for a form submission. Can also mark submission as complete.",
+        description=(
+            "Updates the answers for a form submission. Can also mark submission as complete. "
+            "Send If-Match (or a revision field) to fail with 409 instead of applying the update "
+            "when the submission has changed since the client read it."
+        ),
         request=UpdateSubmissionSerializer,
+        parameters=[
+            OpenApiParameter(
+                name='If-Match', type=str, location=OpenApiParameter.HEADER, required=False,
+                description='ETag (revision) the client last saw; the update is only applied if it is still current'
+            )
+        ],
         responses={
             200: FormSubmissionSerializer,
             400: OpenApiResponse(description="Invalid request data"),
-            404: OpenApiResponse(description="Submission not found")
+            404: OpenApiResponse(description="Submission not found"),
+            409: OpenApiResponse(description="Submission changed since the expected revision; carries the current submission")
         },
         examples=[
             OpenApiExample(
@@ -393,10 +794,30 @@ class FormSubmissionViewSet(ModelViewSet):
     )
     def update(self, request, pk=None, partial=False):
         """Update submission answers"""
+        flush_autosaves(pk)
         submission = get_object_or_404(FormSubmission, pk=pk)
         serializer = UpdateSubmissionSerializer(data=request.data, partial=partial)
         
-        if serializer.is_valid():
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            expected_revision = if_match_revision(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if expected_revision is None:
+            expected_revision = serializer.validated_data.get('revision')
+        
+        errors = validate_answers(submission.form_version_id, serializer.validated_data.get('answers', {}))
+        if errors:
+            return self.invalid_answers_response(errors)
+        
+        # Conditional writes instead of row locks: re-read and retry if another
+        # request wrote first, unless the client pinned the revision it saw
+        for _ in range(MAX_ATTEMPTS):
+            if expected_revision is not None and submission.revision != expected_revision:
+                break
+            
             # Update answers by merging with existing data
             if 'answers' in serializer.validated_data:
                 submission.answers.update(serializer.validated_data['answers'])
@@ -405,16 +826,22 @@ class FormSubmissionViewSet(ModelViewSet):
                 submission.is_complete = serializer.validated_data['is_complete']
             
             if submission.is_complete and not submission.completed_datetime:
+                if autosaves_pending(pk):
+                    # Autosaves queued since the flush above must be in the answers
+                    flush_autosaves(pk)
+                    submission = get_object_or_404(FormSubmission, pk=pk)
+                    continue
+                # Completing requires every required question to be answered
+                errors = validate_answers(submission.form_version_id, submission.answers, complete=True)
+                if errors:
+                    return self.invalid_answers_response(errors)
                 submission.completed_datetime = timezone.now()
             
-            submission.save()
-            
-            return Response(
-                FormSubmissionSerializer(submission).data,
-                status=status.HTTP_200_OK
-            )
+            if submission.save_if_unchanged(['answers', 'is_complete', 'completed_datetime']):
+                return self.submission_response(submission)
+            submission = get_object_or_404(FormSubmission, pk=pk)
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return self.conflict_response(submission)
 
     def partial_update(self, request, pk=None):
         """Partial update submission answers"""
@@ -431,18 +858,258 @@ class FormSubmissionViewSet(ModelViewSet):
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         """Mark submission as complete"""
+        # Buffered autosaves must land before the submission is closed
+        flush_autosaves(pk)
         submission = get_object_or_404(FormSubmission, pk=pk)
         
-        if not submission.is_complete:
+        # Only the completion columns are written, so concurrent answer saves are kept
+        for _ in range(MAX_ATTEMPTS):
+            if submission.is_complete:
+                break
+            if autosaves_pending(pk):
+                # Autosaves queued since the flush above must be validated too
+                flush_autosaves(pk)
+                submission = get_object_or_404(FormSubmission, pk=pk)
+                continue
+            errors = validate_answers(submission.form_version_id, submission.answers, complete=True)
+            if errors:
+                return self.invalid_answers_response(errors)
             submission.is_complete = True
             submission.completed_datetime = timezone.now()
-            submission.save()
+            if submission.save_if_unchanged(['is_complete', 'completed_datetime']):
+                break
+            submission = get_object_or_404(FormSubmission, pk=pk)
+        else:
+            return self.conflict_response(submission)
         
+        return self.submission_response(submission)
+
+    @extend_schema(
+        summary="Patch submission answers",
+        description=(
+            "Applies only the changed answers, atomically. Send an RFC 7396 merge patch with "
+            "Content-Type application/merge-patch+json (null removes an answer), or JSON "
+            '{"operations": [{"op": "set", "slug": ..., "value": ...}, {"op": "unset", "slug": ...}]}. '
+            "The response holds just the submission id, revision and modified_datetime. "
+            "With If-Match (or a revision field next to operations) the patch is only applied "
+            "if the submission is still at that revision."
+        ),
+        request=OpenApiTypes.OBJECT,
+        parameters=[
+            OpenApiParameter(name='If-Match', type=str, location=OpenApiParameter.HEADER, required=False)
+        ],
+        responses={
+            200: OpenApiResponse(description="Patch applied"),
+            400: OpenApiResponse(description="Malformed patch or operations"),
+            404: OpenApiResponse(description="Submission not found"),
+            409: OpenApiResponse(description="Submission changed since the expected revision; carries the current submission")
+        },
+        examples=[
+            OpenApiExample(
+                'Set and unset answers',
+                request_only=True,
+                value={
+                    "operations": [
+                        {"op": "set", "slug": "email_address", "value": "john@example.com"},
+                        {"op": "unset", "slug": "phone_number"}
+                    ]
+                }
+            )
+        ]
+    )
+    @action(detail=True, methods=['patch'], parser_classes=[MergePatchParser, JSONParser])
+    def answers(self, request, pk=None):
+        """Apply a merge patch or set/unset operations to the answers"""
+        if not is_uuid(pk):
+            return Response({'error': 'Submission not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            expected_revision = if_match_revision(request)
+            if request.content_type.startswith(MergePatchParser.media_type):
+                sets, removes, nested = split_merge_patch(request.data)
+            elif isinstance(request.data, dict) and 'operations' in request.data:
+                serializer = AnswerOperationsSerializer(data=request.data)
+                if not serializer.is_valid():
+                    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+                if expected_revision is None:
+                    expected_revision = serializer.validated_data.get('revision')
+                sets, removes = parse_operations(serializer.validated_data['operations'])
+                nested = {}
+            else:
+                return Response(
+                    {'error': f'Send a merge patch as {MergePatchParser.media_type} or an "operations" list'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        except (AnswerPatchError, TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = FormSubmission.objects.filter(pk=pk).values_list('form_version_id', 'is_complete').first()
+        if found is None:
+            return Response({'error': 'Submission not found'}, status=status.HTTP_404_NOT_FOUND)
+        version_id, is_complete = found
+        # Flat answers of open submissions are checked slug by slug; merged objects
+        # need the stored value, and completed submissions must stay complete
+        patched = sets
+        if nested or is_complete:
+            flush_autosaves(pk)
+            answers = FormSubmission.objects.filter(pk=pk).values_list('answers', flat=True).first()
+            patched = patched_answers(answers, sets, removes, nested)
+        errors = validate_answers(version_id, patched, complete=is_complete)
+        if errors:
+            return self.invalid_answers_response(errors)
+
+        # Unconditional flat patches to open submissions can wait in the write-behind buffer
+        buffer = get_autosave_buffer()
+        if buffer.enabled and expected_revision is None and not nested and not is_complete:
+            buffer.add(pk, sets, removes)
+            return Response({'id': pk, 'buffered': True}, status=status.HTTP_202_ACCEPTED)
+
+        flush_autosaves(pk)
+        try:
+            result = apply_answer_patch(pk, sets, removes, nested, expected_revision)
+        except RevisionConflict:
+            return self.conflict_response(get_object_or_404(FormSubmission, pk=pk))
+
+        if result is None:
+            return Response({'error': 'Submission not found'}, status=status.HTTP_404_NOT_FOUND)
+        modified, revision = result
         return Response(
-            FormSubmissionSerializer(submission).data,
-            status=status.HTTP_200_OK
+            {'id': pk, 'revision': revision, 'modified_datetime': modified},
+            headers={'ETag': revision_etag(revision)}
         )
 
+    @extend_schema(
+        summary="Get the next page of a submission",
+        description=(
+            "Evaluates page conditional logic and disabled conditions against the submission's "
+            "stored answers and returns the definition of the next shown, enabled page after "
+            "`page` (the first one when omitted), so multi-page forms can be rendered without "
+            "downloading the whole form version. `page` is null when no page is left."
+        ),
+        parameters=[
+            OpenApiParameter(name='page', type=str, description="Slug of the current page")
+        ],
+        responses={
+            200: OpenApiTypes.OBJECT,
+            400: OpenApiResponse(description="Unknown page"),
+            404: OpenApiResponse(description="Submission not found")
+        }
+    )
+    @action(detail=True, methods=['get'], url_path='next-page')
+    def next_page(self, request, pk=None):
+        """Get the next page to show, evaluated against the stored answers"""
+        if not is_uuid(pk):
+            return Response({'error': 'Submission not found'}, status=status.HTTP_404_NOT_FOUND)
+        flush_autosaves(pk)
+        row = FormSubmission.objects.filter(pk=pk).values_list('form_version_id', 'answers').first()
+        if row is None:
+            return Response({'error': 'Submission not found'}, status=status.HTTP_404_NOT_FOUND)
+        version_id, answers = row
+        if not isinstance(answers, dict):
+            # Rows written outside the API may hold other JSON
+            answers = {}
+        plan = get_logic_plan(version_id)
+        
+        current = request.query_params.get('page') or None
+        try:
+            slug = plan.next_page(answers, current)
+        except KeyError:
+            return Response({'error': f'Unknown page: {current}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'page': plan.page_definitions[slug] if slug else None,
+            'position': plan.page_index[slug] + 1 if slug else None,
+            'page_count': len(plan.pages),
+            'is_last': slug is None or plan.next_page(answers, slug) is None
+        })
+
+    @extend_schema(
+        summary="Autosave buffer metrics",
+        description="Queue depth and flush latency of the write-behind autosave buffer (this worker's counters); staff only",
+        responses={200: OpenApiTypes.OBJECT, 403: OpenApiResponse(description="Not a staff user")}
+    )
+    @action(detail=False, methods=['get'], url_path='autosave-metrics', permission_classes=[IsAdminUser])
+    def autosave_metrics(self, request):
+        """Report the autosave buffer's queue depth and flush latency"""
+        return Response(get_autosave_buffer().metrics())
+
+    @extend_schema(
+        summary="Get submission counts for a form",
+        description=(
+            "Counts a form's submissions in the database, so dashboards can show totals "
+            "without paging through every submission"
+        ),
+        parameters=[
+            OpenApiParameter(name='form_slug', type=str, required=True)
+        ],
+        responses={
+            200: OpenApiTypes.OBJECT,
+            400: OpenApiResponse(description="Missing form_slug")
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Count a form's submissions, complete and in progress"""
+        form_slug = request.query_params.get('form_slug')
+        if not form_slug:
+            return Response({'error': 'form_slug is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        counts = FormSubmission.objects.filter(form_version__form__slug=form_slug).aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(is_complete=True))
+        )
+        return Response({**counts, 'in_progress': counts['total'] - counts['completed']})
+
+    @extend_schema(
+        summary="Get the active submission for a session",
+        description=(
+            "Returns the newest in-progress submission of a session for a form, together with "
+            "the form version it is pinned to, so a session can be resumed with one request"
+        ),
+        parameters=[
+            OpenApiParameter(name='form_slug', type=str, required=True),
+            OpenApiParameter(name='user_session_id', type=str, required=True)
+        ],
+        responses={
+            200: FormSubmissionSerializer,
+            400: OpenApiResponse(description="Missing form_slug or user_session_id"),
+            404: OpenApiResponse(description="No in-progress submission")
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def active(self, request):
+        """Resume a session's in-progress submission"""
+        form_slug = request.query_params.get('form_slug')
+        user_session_id = request.query_params.get('user_session_id')
+        if not form_slug or not user_session_id:
+            return Response(
+                {'error': 'form_slug and user_session_id are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # One query: the session index narrows the rows, the version and form are joined in
+        submission = (
+            FormSubmission.objects
+            .select_related('form_version__form')
+            .defer(*(f'form_version__{name}' for name in FormVersion.DERIVED_FIELDS))
+            .filter(
+                user_session_id=user_session_id,
+                form_version__form__slug=form_slug,
+                form_version__form__is_active=True,
+                is_complete=False
+            )
+            .order_by('-created_datetime', '-id')
+            .first()
+        )
+        if submission is None:
+            return Response({'error': 'No active submission'}, status=status.HTTP_404_NOT_FOUND)
+        if flush_autosaves(submission.pk):
+            submission.refresh_from_db(fields=['answers', 'revision', 'modified_datetime'])
+        
+        return Response({
+            **FormSubmissionSerializer(submission).data,
+            'form_version': FormVersionSerializer(submission.form_version).data
+        })
+
 
 @extend_schema(
     summary="Get CSRF token",
@@ -500,7 +1167,10 @@ class FormBuilderPageViewSet(ModelViewSet):
     def get_queryset(self):
         form_slug = self.kwargs.get('form_slug')
         if form_slug:
-            return Page.objects.filter(form__slug=form_slug, form__is_active=True).order_by('order')
+            queryset = Page.objects.filter(form__slug=form_slug, form__is_active=True).order_by('order')
+            if self.action in ('list', 'retrieve'):
+                queryset = queryset.prefetch_related(*page_tree_prefetches())
+            return queryset
         return Page.objects.none()
     
     def get_serializer_class(self):
@@ -515,12 +1185,11 @@ class FormBuilderPageViewSet(ModelViewSet):
         form = get_object_or_404(DynamicForm, slug=form_slug, is_active=True)
         
         # Get next order number
-        last_page = form.pages.order_by('order').last()
-        next_order = (last_page.order + 1) if last_page else 1
+        order = next_order(form_page_sequences(form.id))
         
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            page = serializer.save(form=form, order=next_order)
+            page = serializer.save(form=form, order=order)
             # Return full page data
             return Response(
                 PageSerializer(page).data,
@@ -551,31 +1220,36 @@ class FormBuilderPageViewSet(ModelViewSet):
     def reorder(self, request, form_slug=None):
         """Reorder pages in a form"""
         form = get_object_or_404(DynamicForm, slug=form_slug, is_active=True)
-        page_orders = request.data.get('page_orders', [])
-        
-        # To avoid unique constraint violations, we need to update in batches
-        # First, set all pages to negative orders temporarily
-        pages_to_update = []
-        for page_data in page_orders:
-            page_id = page_data.get('id')
-            new_order = page_data.get('order')
-            try:
-                page = form.pages.get(id=page_id)
-                pages_to_update.append((page, new_order))
-            except Page.DoesNotExist:
-                continue
         
-        # Set temporary negative orders to avoid conflicts
-        for i, (page, _) in enumerate(pages_to_update):
-            page.order = -(i + 1000)  # Use negative numbers that won't conflict
-            page.save()
-        
-        # Now set the final orders
-        for page, new_order in pages_to_update:
-            page.order = new_order
-            page.save()
+        try:
+            apply_orders(form.pages.all(), request.data.get('page_orders', []))
+        except ReorderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({'status': 'success'})
+    
+    @extend_schema(
+        summary="Move page",
+        description="Move a single page to a new position without rewriting its siblings",
+        request={
+            "type": "object",
+            "properties": {
+                "position": {"type": "integer", "description": "New 1-based position"}
+            }
+        },
+        responses={200: PageSerializer}
+    )
+    @action(detail=True, methods=['post'], url_path='move')
+    def move(self, request, form_slug=None, pk=None):
+        """Move a page to a new position"""
+        page = get_object_or_404(Page, id=pk, form__slug=form_slug, form__is_active=True)
+        
+        try:
+            move_to_position(page, request.data.get('position'))
+        except ReorderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(PageSerializer(page).data)
 
 
 @extend_schema_view(
@@ -606,7 +1280,7 @@ class FormBuilderQuestionViewSet(ModelViewSet):
     def get_queryset(self):
         page_id = self.kwargs.get('page_pk')
         if page_id:
-            return Question.objects.filter(page__id=page_id).order_by('order')
+            return Question.objects.filter(page__id=page_id).select_related('type').order_by('order')
         return Question.objects.none()
     
     def get_serializer_class(self):
@@ -620,9 +1294,8 @@ class FormBuilderQuestionViewSet(ModelViewSet):
         """Create a new question for a page"""
         page = get_object_or_404(Page, id=page_pk, form__slug=form_slug, form__is_active=True)
         
-        # Get next order number
-        last_question = page.questions.order_by('order').last()
-        next_order = (last_question.order + 1) if last_question else 1
+        # Place the question after every question and group on the page
+        order = next_order(page_item_sequences(page.id))
         
         # Get question type
         question_type_slug = request.data.get('type_slug')
@@ -640,7 +1313,7 @@ class FormBuilderQuestionViewSet(ModelViewSet):
             question = Question.objects.create(
                 page=page,
                 type=question_type,
-                order=next_order,
+                order=order,
                 **question_data
             )
             
@@ -704,45 +1377,64 @@ class FormBuilderQuestionViewSet(ModelViewSet):
     def reorder(self, request, form_slug=None, page_pk=None):
         """Reorder questions in a page"""
         page = get_object_or_404(Page, id=page_pk, form__slug=form_slug, form__is_active=True)
-        question_orders = request.data.get('question_orders', [])
-        
-        # To avoid unique constraint violations, we need to update in batches
-        # First, set all questions to negative orders temporarily
-        questions_to_update = []
-        for question_data in question_orders:
-            question_id = question_data.get('id')
-            new_order = question_data.get('order')
-            try:
-                question = page.questions.get(id=question_id)
-                questions_to_update.append((question, new_order))
-            except Question.DoesNotExist:
-                continue
         
-        # Set temporary negative orders to avoid conflicts
-        for i, (question, _) in enumerate(questions_to_update):
-            question.order = -(i + 1000)  # Use negative numbers that won't conflict
-            question.save()
-        
-        # Now set the final orders
-        for question, new_order in questions_to_update:
-            question.order = new_order
-            question.save()
+        try:
+            apply_orders(
+                page.questions.all(), request.data.get('question_orders', []),
+                sequences=page_item_sequences(page.id)
+            )
+        except ReorderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({'status': 'success'})
+    
+    @extend_schema(
+        summary="Move question",
+        description="Move a single question to a new position among the page's questions and groups",
+        request={
+            "type": "object",
+            "properties": {
+                "position": {"type": "integer", "description": "New 1-based position"}
+            }
+        },
+        responses={200: QuestionSerializer}
+    )
+    @action(detail=True, methods=['post'], url_path='move')
+    def move(self, request, form_slug=None, page_pk=None, pk=None):
+        """Move a question to a new position on its page"""
+        page = get_object_or_404(Page, id=page_pk, form__slug=form_slug, form__is_active=True)
+        question = get_object_or_404(Question, id=pk, page=page)
+        
+        try:
+            move_to_position(question, request.data.get('position'))
+        except ReorderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(QuestionSerializer(question).data)
 
 
 @extend_schema_view(
     create=extend_schema(
         summary="Create form with initial structure",
         description="Create a new form with an optional initial page and question structure"
-    )
+    ),
+    list=extend_schema(parameters=projection_parameters()),
+    retrieve=extend_schema(parameters=projection_parameters())
 )
-class FormBuilderFormViewSet(ModelViewSet):
+class FormBuilderFormViewSet(ProjectionViewMixin, ModelViewSet):
     """Extended ViewSet for form builder operations."""
     queryset = DynamicForm.objects.filter(is_active=True)
     serializer_class = FullDynamicFormSerializer
     lookup_field = 'slug'
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve', 'batch'):
+            # The builder edits groups and grouped questions too, and batch responses
+            # re-serialize the form after applying operations
+            queryset = form_tree_queryset(queryset, self.get_projected_serializer())
+        return queryset
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return CreateFormSerializer
@@ -766,7 +1458,7 @@ class FormBuilderFormViewSet(ModelViewSet):
                     form=form,
                     name="Page 1",
                     slug="page-1",
-                    order=1
+                    order=ORDER_GAP
                 )
             
             return Response(
@@ -783,41 +1475,62 @@ class FormBuilderFormViewSet(ModelViewSet):
     def duplicate(self, request, slug=None):
         """Duplicate a form with all its structure"""
         original_form = get_object_or_404(DynamicForm, slug=slug, is_active=True)
-        
-        # Create new form
-        new_form = DynamicForm.objects.create(
+        new_form = original_form.duplicate(
             name=f"{original_form.name} (Copy)",
             slug=f"{original_form.slug}-copy"
         )
-        
-        # Copy pages and questions
-        for page in original_form.pages.all():
-            new_page = Page.objects.create(
-                form=new_form,
-                name=page.name,
-                slug=f"{page.slug}-copy",
-                order=page.order,
-                conditional_logic=page.conditional_logic,
-                config=page.config
-            )
-            
-            # Copy questions
-            for question in page.questions.all():
-                Question.objects.create(
-                    page=new_page,
-                    type=question.type,
-                    name=question.name,
-                    slug=f"{question.slug}-copy",
-                    text=question.text,
-                    subtext=question.subtext,
-                    required=question.required,
-                    config=question.config,
-                    validation=question.validation,
-                    conditional_logic=question.conditional_logic,
-                    order=question.order
-                )
-        
+        new_form = DynamicForm.objects.prefetch_related(*form_tree_prefetches()).get(pk=new_form.pk)
+
         return Response(
             FullDynamicFormSerializer(new_form).data,
             status=status.HTTP_201_CREATED
         )
+    
+    @extend_schema(
+        summary="Apply structure changes in one request",
+        description=(
+            "Apply a list of create/update/delete/move operations to the form's pages, "
+            "questions and groups in a single transaction, and return the resulting form. "
+            "Items created with a `ref` can be referenced by later operations; the `refs` "
+            "key of the response maps each ref to the created id."
+        ),
+        request={
+            "type": "object",
+            "properties": {
+                "operations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "op": {"type": "string", "enum": ["create", "update", "delete", "move"]},
+                            "type": {"type": "string", "enum": ["page", "question", "group"]},
+                            "id": {"type": "string"},
+                            "ref": {"type": "string"},
+                            "page": {"type": "string"},
+                            "group": {"type": "string"},
+                            "position": {"type": "integer"},
+                            "data": {"type": "object"}
+                        }
+                    }
+                }
+            }
+        },
+        responses={200: FullDynamicFormSerializer}
+    )
+    @action(detail=True, methods=['post'])
+    def batch(self, request, slug=None):
+        """Apply a batch of structure operations to a form"""
+        form = get_object_or_404(DynamicForm, slug=slug, is_active=True)
+        
+        try:
+            refs = apply_batch(form, request.data.get('operations', []))
+        except BatchError as e:
+            error = {'error': str(e)}
+            if e.index is not None:
+                error['operation'] = e.index
+            if e.details:
+                error['details'] = e.details
+            return Response(error, status=status.HTTP_400_BAD_REQUEST)
+        
+        form = self.get_object()
+        return Response({**FullDynamicFormSerializer(form).data, 'refs': refs})
@@ -1,6 +1,7 @@
 """
 ViewSet for managing question groups in the form builder.
 """
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.decorators import action
@@ -8,7 +9,11 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse
 
-from apps.form_builder.models import Page, QuestionGroup, Question, QuestionType, QuestionGroupTemplate
+from apps.form_builder.models import (
+    Page, QuestionGroup, Question, QuestionType, QuestionGroupTemplate,
+    group_question_sequences, page_item_sequences
+)
+from apps.form_builder.ordering import ReorderError, apply_orders, move_to_position, next_order
 from .serializers import (
     QuestionGroupSerializer, CreateQuestionGroupSerializer, 
     UpdateQuestionGroupSerializer, QuestionSerializer,
@@ -49,6 +54,8 @@ class FormBuilderQuestionGroupViewSet(ModelViewSet):
                 page__id=page_pk,
                 page__form__slug=form_slug,
                 page__form__is_active=True
+            ).prefetch_related(
+                Prefetch('questions', queryset=Question.objects.select_related('type').order_by('order'))
             ).order_by('order')
         return QuestionGroup.objects.none()
     
@@ -63,9 +70,8 @@ class FormBuilderQuestionGroupViewSet(ModelViewSet):
         """Create a new question group for a page"""
         page = get_object_or_404(Page, id=page_pk, form__slug=form_slug, form__is_active=True)
         
-        # Get next order number
-        last_group = page.question_groups.order_by('order').last()
-        next_order = (last_group.order + 1) if last_group else 1
+        # Place the group after every question and group on the page
+        order = next_order(page_item_sequences(page.id))
         
         # Check if creating from template
         template_slug = request.data.get('template_slug')
@@ -77,7 +83,7 @@ class FormBuilderQuestionGroupViewSet(ModelViewSet):
                 group = template.create_group_from_template(
                     page=page,
                     group_name=request.data.get('name', template.name),
-                    order=next_order
+                    order=order
                 )
                 
                 # Return full group data with questions
@@ -95,7 +101,7 @@ class FormBuilderQuestionGroupViewSet(ModelViewSet):
         # Regular group creation (without template)
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            group = serializer.save(page=page, order=next_order)
+            group = serializer.save(page=page, order=order)
             
             # Return full group data with questions
             return Response(
@@ -157,30 +163,40 @@ class FormBuilderQuestionGroupViewSet(ModelViewSet):
     def reorder(self, request, form_slug=None, page_pk=None):
         """Reorder question groups in a page"""
         page = get_object_or_404(Page, id=page_pk, form__slug=form_slug, form__is_active=True)
-        group_orders = request.data.get('group_orders', [])
         
-        # To avoid unique constraint violations, update in batches
-        groups_to_update = []
-        for group_data in group_orders:
-            group_id = group_data.get('id')
-            new_order = group_data.get('order')
-            try:
-                group = page.question_groups.get(id=group_id)
-                groups_to_update.append((group, new_order))
-            except QuestionGroup.DoesNotExist:
-                continue
+        try:
+            apply_orders(
+                page.question_groups.all(), request.data.get('group_orders', []),
+                sequences=page_item_sequences(page.id)
+            )
+        except ReorderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Set temporary negative orders to avoid conflicts
-        for i, (group, _) in enumerate(groups_to_update):
-            group.order = -(i + 1000)
-            group.save()
+        return Response({'status': 'success'})
+    
+    @extend_schema(
+        summary="Move question group",
+        description="Move a single group to a new position among the page's questions and groups",
+        request={
+            "type": "object",
+            "properties": {
+                "position": {"type": "integer", "description": "New 1-based position"}
+            }
+        },
+        responses={200: QuestionGroupSerializer}
+    )
+    @action(detail=True, methods=['post'], url_path='move')
+    def move(self, request, form_slug=None, page_pk=None, pk=None):
+        """Move a question group to a new position on its page"""
+        page = get_object_or_404(Page, id=page_pk, form__slug=form_slug, form__is_active=True)
+        group = get_object_or_404(QuestionGroup, id=pk, page=page)
         
-        # Now set the final orders
-        for group, new_order in groups_to_update:
-            group.order = new_order
-            group.save()
+        try:
+            move_to_position(group, request.data.get('position'))
+        except ReorderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({'status': 'success'})
+        return Response(QuestionGroupSerializer(group).data)
     
     @extend_schema(
         summary="Add question to group",
@@ -197,8 +213,7 @@ class FormBuilderQuestionGroupViewSet(ModelViewSet):
         group = get_object_or_404(QuestionGroup, id=pk, page=page)
         
         # Get next order number
-        last_question = group.questions.order_by('order').last()
-        next_order = (last_question.order + 1) if last_question else 1
+        order = next_order(group_question_sequences(group.id))
         
         # Get question type
         question_type_slug = request.data.get('type_slug')
@@ -216,7 +231,7 @@ class FormBuilderQuestionGroupViewSet(ModelViewSet):
             question = Question.objects.create(
                 question_group=group,
                 type=question_type,
-                order=next_order,
+                order=order,
                 **question_data
             )
             
@@ -260,7 +275,7 @@ class GroupedQuestionViewSet(ModelViewSet):
                 question_group__page__id=page_pk,
                 question_group__page__form__slug=form_slug,
                 question_group__page__form__is_active=True
-            ).order_by('order')
+            ).select_related('type').order_by('order')
         return Question.objects.none()
     
     def get_serializer_class(self):
@@ -338,27 +353,39 @@ class GroupedQuestionViewSet(ModelViewSet):
             page__form__is_active=True
         )
         
-        question_orders = request.data.get('question_orders', [])
-        
-        # To avoid unique constraint violations, update in batches
-        questions_to_update = []
-        for question_data in question_orders:
-            question_id = question_data.get('id')
-            new_order = question_data.get('order')
-            try:
-                question = group.questions.get(id=question_id)
-                questions_to_update.append((question, new_order))
-            except Question.DoesNotExist:
-                continue
+        try:
+            apply_orders(group.questions.all(), request.data.get('question_orders', []))
+        except ReorderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Set temporary negative orders to avoid conflicts
-        for i, (question, _) in enumerate(questions_to_update):
-            question.order = -(i + 1000)
-            question.save()
+        return Response({'status': 'success'})
+    
+    @extend_schema(
+        summary="Move question in group",
+        description="Move a single question to a new position within its group",
+        request={
+            "type": "object",
+            "properties": {
+                "position": {"type": "integer", "description": "New 1-based position"}
+            }
+        },
+        responses={200: QuestionSerializer}
+    )
+    @action(detail=True, methods=['post'], url_path='move')
+    def move(self, request, form_slug=None, page_pk=None, group_pk=None, pk=None):
+        """Move a question to a new position within its group"""
+        question = get_object_or_404(
+            Question,
+            id=pk,
+            question_group__id=group_pk,
+            question_group__page__id=page_pk,
+            question_group__page__form__slug=form_slug,
+            question_group__page__form__is_active=True
+        )
         
-        # Now set the final orders
-        for question, new_order in questions_to_update:
-            question.order = new_order
-            question.save()
+        try:
+            move_to_position(question, request.data.get('position'))
+        except ReorderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({'status': 'success'})
\ No newline at end of file
+        return Response(QuestionSerializer(question).data)
\ No newline at end of file
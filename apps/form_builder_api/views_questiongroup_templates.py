@@ -1,12 +1,15 @@
 """
 ViewSet for managing question group templates.
 """
+from django.core.exceptions import ValidationError
+from django.shortcuts import get_object_or_404
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from drf_spectacular.utils import extend_schema, extend_schema_view
 
-from apps.form_builder.models import QuestionGroupTemplate
+from apps.form_builder.models import Page, QuestionGroupTemplate, QuestionType
 from .serializers import QuestionGroupTemplateSerializer
 
 
@@ -30,4 +33,51 @@ class QuestionGroupTemplateViewSet(ReadOnlyModelViewSet):
     """ViewSet for listing and retrieving question group templates."""
     serializer_class = QuestionGroupTemplateSerializer
     queryset = QuestionGroupTemplate.objects.filter(is_active=True).order_by('name')
-    lookup_field = 'slug'
\ No newline at end of file
+    lookup_field = 'slug'
+
+    @extend_schema(
+        summary="Add this template to many pages",
+        description=(
+            "Create a question group from this template at the end of each listed page, "
+            "in one transaction. Pages must belong to active forms."
+        ),
+        request={
+            "type": "object",
+            "properties": {
+                "page_ids": {"type": "array", "items": {"type": "string", "format": "uuid"}},
+                "name": {"type": "string"}
+            },
+            "required": ["page_ids"]
+        }
+    )
+    @action(detail=True, methods=['post'])
+    def apply(self, request, slug=None):
+        """Stamp this template onto many pages at once"""
+        template = get_object_or_404(QuestionGroupTemplate, slug=slug, is_active=True)
+        page_ids = request.data.get('page_ids')
+        if not isinstance(page_ids, list) or not page_ids:
+            return Response({'error': 'page_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            pages = list(Page.objects.filter(id__in=page_ids, form__is_active=True))
+        except ValidationError:
+            return Response({'error': 'Invalid page id'}, status=status.HTTP_400_BAD_REQUEST)
+        missing = {str(page_id) for page_id in page_ids} - {str(page.id) for page in pages}
+        if missing:
+            return Response(
+                {'error': f'Unknown pages: {", ".join(sorted(missing))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            groups = template.create_groups_from_template(pages, group_name=request.data.get('name'))
+        except QuestionType.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {'groups': [
+                {'id': str(group.id), 'page_id': str(group.page_id), 'slug': group.slug}
+                for group in groups
+            ]},
+            status=status.HTTP_201_CREATED
+        )
@@ -205,3 +205,57 @@ SPECTACULAR_SETTINGS = {
     'SERVE_PERMISSIONS': ['rest_framework.permissions.AllowAny'],
     'SERVE_AUTHENTICATION': ['rest_framework.authentication.SessionAuthentication'],
 }
+
+# Published form definition cache (see apps/form_builder_api/cache.py).
+# BACKEND 'local' keeps a per-process LRU; 'django' also shares entries
+# through the Django cache named by CACHE_ALIAS.
+FORMATIC_PUBLISHED_FORM_CACHE = {
+    'BACKEND': os.getenv('FORMATIC_FORM_CACHE_BACKEND', 'local'),
+    'CACHE_ALIAS': 'default',
+    'MAX_ENTRIES': int(os.getenv('FORMATIC_FORM_CACHE_MAX_ENTRIES', '512')),
+    'TIMEOUT': int(os.getenv('FORMATIC_FORM_CACHE_TIMEOUT', '300')),
+}
+
+# Submission list pagination (see apps/form_builder_api/pagination.py).
+# Clients may ask for ?page_size= up to MAX_PAGE_SIZE.
+FORMATIC_SUBMISSION_PAGINATION = {
+    'PAGE_SIZE': int(os.getenv('FORMATIC_SUBMISSION_PAGE_SIZE', '100')),
+    'MAX_PAGE_SIZE': int(os.getenv('FORMATIC_SUBMISSION_MAX_PAGE_SIZE', '1000')),
+}
+
+# Pagination of version listings in summary mode (?summary=true, see
+# apps/form_builder_api/pagination.py).
+FORMATIC_VERSION_PAGINATION = {
+    'PAGE_SIZE': int(os.getenv('FORMATIC_VERSION_PAGE_SIZE', '50')),
+    'MAX_PAGE_SIZE': int(os.getenv('FORMATIC_VERSION_MAX_PAGE_SIZE', '500')),
+}
+
+# Write-behind buffer for autosave answer patches (see
+# apps/form_builder_api/autosave.py). BACKEND 'django' buffers in the Django
+# cache named by CACHE_ALIAS, which must be shared by all workers (e.g. Redis)
+# when more than one process serves the API; 'local' buffers per process and
+# is only safe with a single worker. Batches are written every FLUSH_INTERVAL
+# seconds or once MAX_PENDING submissions are waiting.
+FORMATIC_AUTOSAVE_BUFFER = {
+    'ENABLED': os.getenv('FORMATIC_AUTOSAVE_BUFFER', 'False').lower() in ('true', '1', 'yes'),
+    'BACKEND': os.getenv('FORMATIC_AUTOSAVE_BUFFER_BACKEND', 'django'),
+    'CACHE_ALIAS': 'default',
+    'FLUSH_INTERVAL': float(os.getenv('FORMATIC_AUTOSAVE_FLUSH_INTERVAL', '2')),
+    'MAX_PENDING': int(os.getenv('FORMATIC_AUTOSAVE_MAX_PENDING', '500')),
+}
+
+# Server-side validation of submission answers against their form version
+# (see apps/form_builder_api/validation.py). Compiled validators are cached
+# per version id in each process.
+FORMATIC_ANSWER_VALIDATION = {
+    'ENABLED': os.getenv('FORMATIC_ANSWER_VALIDATION', 'True').lower() in ('true', '1', 'yes'),
+    'MAX_ENTRIES': int(os.getenv('FORMATIC_ANSWER_VALIDATION_MAX_ENTRIES', '256')),
+    'TIMEOUT': int(os.getenv('FORMATIC_ANSWER_VALIDATION_TIMEOUT', '3600')),
+}
+
+# Compiled conditional logic plans (see apps/form_builder_api/logic.py),
+# cached per form version id in each process.
+FORMATIC_CONDITIONAL_LOGIC = {
+    'MAX_ENTRIES': int(os.getenv('FORMATIC_CONDITIONAL_LOGIC_MAX_ENTRIES', '256')),
+    'TIMEOUT': int(os.getenv('FORMATIC_CONDITIONAL_LOGIC_TIMEOUT', '3600')),
+}
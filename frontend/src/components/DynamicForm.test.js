@@ -16,6 +16,7 @@ vi.mock('../services/api', () => ({
   submissionApi: {
     createSubmission: vi.fn(),
     getSubmission: vi.fn(),
+    getActiveSubmission: vi.fn(),
     updateSubmission: vi.fn(),
     submitForm: vi.fn()
   }
@@ -105,6 +106,7 @@ describe('DynamicForm Component', () => {
     api.questionTypesApi.getQuestionTypes.mockResolvedValue({ data: mockQuestionTypes })
     api.submissionApi.createSubmission.mockResolvedValue({ data: mockSubmission })
     api.submissionApi.getSubmission.mockResolvedValue({ data: mockSubmission })
+    api.submissionApi.getActiveSubmission.mockRejectedValue({ response: { status: 404 } })
     api.submissionApi.updateSubmission.mockResolvedValue({ data: mockSubmission })
     api.submissionApi.submitForm.mockResolvedValue({ data: { ...mockSubmission, is_complete: true } })
   })
@@ -139,7 +141,8 @@ describe('DynamicForm Component', () => {
     
     await waitFor(() => {
       expect(api.submissionApi.createSubmission).toHaveBeenCalledWith({
-        form_slug: 'test-form'
+        form_slug: 'test-form',
+        user_session_id: expect.any(String)
       })
     })
 
@@ -149,6 +152,19 @@ describe('DynamicForm Component', () => {
     }, { timeout: 10000 })
   })
 
+  it('resumes the session\'s in-progress submission instead of creating one', async () => {
+    api.submissionApi.getActiveSubmission.mockResolvedValue({ data: { ...mockSubmission, id: 789 } })
+    const { router } = renderWithRouter(DynamicForm, { props: { formSlug: 'test-form' } })
+
+    await router.push({ name: 'form', params: { slug: 'test-form' } })
+
+    await waitFor(() => {
+      expect(router.currentRoute.value.params.submissionId).toBe('789')
+    }, { timeout: 10000 })
+    expect(api.submissionApi.getActiveSubmission).toHaveBeenCalledWith('test-form', expect.any(String))
+    expect(api.submissionApi.createSubmission).not.toHaveBeenCalled()
+  })
+
   it('loads existing submission from URL parameters', async () => {
     const existingSubmissionData = {
       ...mockSubmission,
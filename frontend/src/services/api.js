@@ -103,6 +103,12 @@ export const formApi = {
   }
 }
 
+// Fetch one page of a cursor-paginated list: the first page of `url`, or the page
+// a previous response's `next` link points to
+const getPage = (url, params, next) => {
+  return next ? api.get(next) : api.get(url, { params })
+}
+
 // Submission API methods
 export const submissionApi = {
   // Create new submission
@@ -115,19 +121,31 @@ export const submissionApi = {
     return api.patch(`/submissions/${submissionId}/`, data)
   },
 
+  // Apply set/unset operations to the changed answers only
+  patchAnswers(submissionId, operations) {
+    return api.patch(`/submissions/${submissionId}/answers/`, { operations })
+  },
+
   // Get submission
   getSubmission(submissionId) {
     return api.get(`/submissions/${submissionId}/`)
   },
 
-  // Get submissions by session ID
-  getSubmissionsBySession(sessionId) {
-    return api.get(`/submissions/?user_session_id=${sessionId}`)
+  // Get a page of submissions by session ID; pass the previous page's `next` link to continue
+  getSubmissionsBySession(sessionId, next = null) {
+    return getPage('/submissions/', { user_session_id: sessionId }, next)
+  },
+
+  // Get the session's in-progress submission for a form, with its pinned version
+  getActiveSubmission(formSlug, sessionId) {
+    return api.get('/submissions/active/', {
+      params: { form_slug: formSlug, user_session_id: sessionId }
+    })
   },
 
-  // Get submissions by form slug
-  getSubmissionsByForm(formSlug) {
-    return api.get(`/submissions/?form_slug=${formSlug}`)
+  // Get a page of submissions by form slug; pass the previous page's `next` link to continue
+  getSubmissionsByForm(formSlug, next = null) {
+    return getPage('/submissions/', { form_slug: formSlug }, next)
   },
 
   // Submit final answers
@@ -138,9 +156,9 @@ export const submissionApi = {
     })
   },
 
-  // Get submission statistics for a form
+  // Get submission counts for a form (total, completed, in_progress)
   getSubmissionStats(formSlug) {
-    return api.get(`/submissions/stats/?form_slug=${formSlug}`)
+    return api.get('/submissions/stats/', { params: { form_slug: formSlug } })
   }
 }
 
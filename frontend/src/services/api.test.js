@@ -147,6 +147,21 @@ describe('API Service', () => {
       expect(result.data).toEqual(mockResponse)
     })
 
+    it('fetches submissions one cursor page at a time', async () => {
+      const firstPage = { results: [{ id: 1 }], next: 'http://testserver/api/submissions/?cursor=abc' }
+      axios.get = vi.fn().mockResolvedValue({ data: firstPage })
+
+      const result = await submissionApi.getSubmissionsByForm('survey')
+
+      expect(axios.get).toHaveBeenCalledWith('/submissions/', { params: { form_slug: 'survey' } })
+      expect(result.data).toEqual(firstPage)
+
+      await submissionApi.getSubmissionsByForm('survey', firstPage.next)
+
+      expect(axios.get).toHaveBeenLastCalledWith(firstPage.next)
+      expect(axios.get).toHaveBeenCalledTimes(2)
+    })
+
     // submitFinal method doesn't exist in the actual API
 
     // getFormSubmissions method doesn't exist in the actual API
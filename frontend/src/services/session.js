@@ -0,0 +1,23 @@
+// Identifies this browser across visits, so an unfinished submission can be resumed
+const SESSION_KEY = 'formatic_session_id'
+
+const newSessionId = () => {
+  if (window.crypto?.randomUUID) {
+    return window.crypto.randomUUID()
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+}
+
+export const getSessionId = () => {
+  try {
+    let sessionId = localStorage.getItem(SESSION_KEY)
+    if (!sessionId) {
+      sessionId = newSessionId()
+      localStorage.setItem(SESSION_KEY, sessionId)
+    }
+    return sessionId
+  } catch (error) {
+    // Storage can be disabled (e.g. private browsing); such sessions cannot be resumed
+    return null
+  }
+}